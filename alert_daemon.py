@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+가격 알림 데몬 - 미리 계산한 오더블록 구간을 감시하다가 진입 구간 진입 / 손절가 이탈 시 이벤트 발생
+
+사용법:
+    python batch_cli.py watchlist.txt -o levels.json      # 레벨 미리 계산
+    python alert_daemon.py --levels levels.json --interval 30 --sink file:alerts.jsonl
+    python alert_daemon.py --watchlist watchlist.txt --sink webhook:http://127.0.0.1:9000/alerts
+
+싱크: stdout (기본) / file:경로 (JSON Lines 추가) / webhook:URL (JSON POST)
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+import numpy as np
+
+import fetchers
+import http_client
+from config import NAVER_FINANCE_URL
+
+EVENT_QUEUE_SIZE = 10000
+
+
+class ZoneIndex:
+    """종목별 진입 구간 / 손절가를 연속 배열로 보관 (종목 i의 구간 = zone_lo[offsets[i]:offsets[i+1]])"""
+
+    def __init__(self, levels_by_code: dict):
+        self.codes = list(levels_by_code)
+        n = len(self.codes)
+        self.offsets = np.zeros(n + 1, dtype=np.int64)
+        self.stop_loss = np.zeros(n, dtype=np.int32)  # 0 = 손절가 없음
+        lo, hi = [], []
+
+        for i, code in enumerate(self.codes):
+            levels = levels_by_code[code] or {}
+            for zone in levels.get('entry_zones') or []:
+                lo.append(zone['bottom'])
+                hi.append(zone['top'])
+            self.offsets[i + 1] = len(lo)
+            if levels.get('stop_loss'):
+                self.stop_loss[i] = levels['stop_loss']
+
+        # 가격은 원 단위 정수 (구간 / 손절가 모두 호가 단위)
+        self.zone_lo = np.rint(np.array(lo, dtype=np.float64)).astype(np.int32)
+        self.zone_hi = np.rint(np.array(hi, dtype=np.float64)).astype(np.int32)
+        # 상태: 구간 내부 여부 / 손절가 아래 여부 / 마지막 가격
+        self.inside = np.zeros(len(lo), dtype=bool)
+        self.below_stop = np.zeros(n, dtype=bool)
+        self.last_price = np.zeros(n, dtype=np.float64)
+
+    def check(self, i: int, price: float) -> list:
+        """종목 i의 새 가격 반영, 새로 발생한 교차 이벤트 반환 (첫 관측은 상태만 기록)"""
+        first = self.last_price[i] == 0
+        s, e = self.offsets[i], self.offsets[i + 1]
+        events = []
+
+        now_inside = (self.zone_lo[s:e] <= price) & (price <= self.zone_hi[s:e])
+        if not first:
+            for k in np.flatnonzero(now_inside & ~self.inside[s:e]):
+                events.append({'type': 'enter_zone', 'zone_bottom': int(self.zone_lo[s + k]),
+                               'zone_top': int(self.zone_hi[s + k])})
+        self.inside[s:e] = now_inside
+
+        stop = int(self.stop_loss[i])
+        if stop:
+            now_below = price <= stop
+            if now_below and not self.below_stop[i] and not first:
+                events.append({'type': 'stop_break', 'stop_loss': stop})
+            self.below_stop[i] = now_below
+
+        prev = float(self.last_price[i])
+        self.last_price[i] = price
+        for event in events:
+            event.update({'code': self.codes[i], 'price': price, 'prev_price': prev})
+        return events
+
+
+def load_levels_file(path: str) -> dict:
+    """batch_cli.py JSON 결과 → {종목코드: levels}"""
+    with open(path, encoding='utf-8') as f:
+        payload = json.load(f)
+    return {r['code']: r['levels'] for r in payload.get('results', []) if r.get('ok') and r.get('levels')}
+
+
+def compute_levels(codes: list, concurrency: int) -> dict:
+    from batch_cli import run_batch
+    return {r['code']: r['levels'] for r in run_batch(codes, concurrency) if r['ok']}
+
+
+def make_sink(spec: str):
+    """싱크 문자열 → 이벤트 1개를 처리하는 동기 함수"""
+    if spec == 'stdout':
+        def emit(event):
+            print(json.dumps(event, ensure_ascii=False), flush=True)
+        return emit
+
+    if spec.startswith('file:'):
+        path = spec[len('file:'):]
+
+        def emit(event):
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(event, ensure_ascii=False) + '\n')
+        return emit
+
+    if spec.startswith('webhook:'):
+        url = spec[len('webhook:'):]
+
+        def emit(event):
+            http_client.post(url, json=event, timeout=5)
+        return emit
+
+    raise ValueError(f'알 수 없는 싱크: {spec}')
+
+
+class AlertDaemon:
+    """배치 단위 / 속도 제한 폴링 + 교차 이벤트 발행"""
+
+    def __init__(self, index: ZoneIndex, sink, interval: float = 30, batch_size: int = 50,
+                 concurrency: int = 16, fetch_quote=None):
+        self.index = index
+        self.sink = sink
+        self.interval = interval
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.fetch_quote = fetch_quote or fetchers.get_stock_info_naver
+        self.events = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self.dropped = 0
+        self.stats = {'rounds': 0, 'last_round_s': 0.0, 'lag_s': 0.0, 'errors': 0, 'events': 0}
+
+    async def _poll_one(self, sem: asyncio.Semaphore, i: int):
+        async with sem:
+            try:
+                quote = await asyncio.to_thread(self.fetch_quote, self.index.codes[i])
+            except Exception:
+                self.stats['errors'] += 1
+                return
+        price = quote.get('price') or 0
+        if price <= 0:
+            self.stats['errors'] += 1
+            return
+        for event in self.index.check(i, float(price)):
+            self._publish(event)
+
+    def _publish(self, event: dict):
+        event['ts'] = datetime.now().isoformat(timespec='seconds')
+        try:
+            self.events.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def poll_round(self):
+        sem = asyncio.Semaphore(self.concurrency)
+        n = len(self.index.codes)
+        for start in range(0, n, self.batch_size):
+            await asyncio.gather(*(self._poll_one(sem, i) for i in range(start, min(start + self.batch_size, n))))
+
+    async def _sink_worker(self):
+        while True:
+            event = await self.events.get()
+            try:
+                await asyncio.to_thread(self.sink, event)
+                self.stats['events'] += 1
+            except Exception:
+                self.stats['errors'] += 1
+            finally:
+                self.events.task_done()
+
+    async def run(self, rounds: int = 0):
+        """rounds=0이면 무한 반복"""
+        worker = asyncio.create_task(self._sink_worker())
+        try:
+            while rounds == 0 or self.stats['rounds'] < rounds:
+                started = time.monotonic()
+                await self.poll_round()
+                elapsed = time.monotonic() - started
+                self.stats['rounds'] += 1
+                self.stats['last_round_s'] = round(elapsed, 3)
+                # 폴링 지연: 라운드가 주기를 넘긴 시간 (종목별 가격 갱신 간격 = 주기 + 지연)
+                self.stats['lag_s'] = round(max(0.0, elapsed - self.interval), 3)
+                print(f"[round {self.stats['rounds']}] {len(self.index.codes)}종목 {elapsed:.1f}s "
+                      f"lag {self.stats['lag_s']:.1f}s errors {self.stats['errors']} "
+                      f"events {self.stats['events']} dropped {self.dropped}", file=sys.stderr)
+
+                if rounds and self.stats['rounds'] >= rounds:
+                    break
+                await asyncio.sleep(max(0.0, self.interval - elapsed))
+            await self.events.join()
+        finally:
+            worker.cancel()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='오더블록 구간 가격 알림 데몬')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--levels', help='batch_cli.py JSON 결과 파일')
+    source.add_argument('--watchlist', help='관심종목 파일 (시작 시 레벨 계산)')
+    parser.add_argument('--interval', type=float, default=30, help='폴링 주기(초)')
+    parser.add_argument('--batch-size', type=int, default=50, help='라운드 내 배치 크기')
+    parser.add_argument('--concurrency', type=int, default=16, help='동시 요청 수')
+    parser.add_argument('--rate', type=float, help='호스트별 초당 요청 수 제한')
+    parser.add_argument('--sink', default='stdout', help='stdout | file:경로 | webhook:URL')
+    parser.add_argument('--rounds', type=int, default=0, help='실행 라운드 수 (0 = 무한)')
+    args = parser.parse_args(argv)
+
+    if args.rate:
+        http_client.set_rate_limit(urlparse(NAVER_FINANCE_URL).hostname, args.rate)
+
+    try:
+        sink = make_sink(args.sink)
+        if args.levels:
+            levels = load_levels_file(args.levels)
+        else:
+            from batch_cli import read_watchlist
+            levels = compute_levels(read_watchlist(args.watchlist), args.concurrency)
+    except (OSError, ValueError) as e:
+        print(f'초기화 오류: {e}', file=sys.stderr)
+        return 2
+    if not levels:
+        print('감시할 레벨 없음', file=sys.stderr)
+        return 2
+
+    daemon = AlertDaemon(ZoneIndex(levels), sink, args.interval, args.batch_size, args.concurrency)
+    try:
+        asyncio.run(daemon.run(args.rounds))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+오더블록 / 레벨 HTTP JSON API (Streamlit 없이 동작)
+
+사용법:
+    python api_server.py --port 8600
+
+엔드포인트:
+    GET  /orderblocks/{code}?days=60               (days: 1~MAX_DAYS, 데이터 없음 404 / 현재가 없음 502)
+    GET  /levels/{code}?price=71000&days=60      (price 생략 시 현재가, exclude_mitigated=1 이면 미티게이션된 OB 제외)
+    GET  /batch?codes=005930,000660&kind=levels   (kind: levels | orderblocks, exclude_mitigated=1 지원)
+    POST /batch  {"codes": [...], "kind": "levels", "prices": {"005930": 71000}, "exclude_mitigated": true}
+    GET  /health
+    GET  /metrics                                 (Prometheus 텍스트)
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+import fetchers
+import metrics
+from cache import TTLCache, ttl_cache
+from candle_cache import CandleCache
+from config import CANDLE_CACHE_MB, NEGATIVE_CACHE_TTL, WARMUP_INTERVAL, WARMUP_TOP
+from orderblock import calculate_levels, detect_order_blocks
+from shared_cache import shared_fetch
+from warmup import AccessCounter, WarmupScheduler
+
+CANDLE_TTL = 60
+QUOTE_TTL = 60
+MAX_BATCH = 500
+MAX_DAYS = 5000   # 약 20년 (차트 데이터 1회 요청 범위)
+CODE_RE = re.compile(r'^\d{6}$')
+ERROR_STATUS = {'데이터 없음': 404, '현재가 없음': 502}
+
+# app.py의 st.cache_data와 같은 TTL로 프로세스 내 공유 (실패는 NEGATIVE_CACHE_TTL 동안만 기억)
+candle_cache = CandleCache(shared_fetch(fetchers.fetch_daily_candle, CANDLE_TTL), max_bytes=int(CANDLE_CACHE_MB * 2 ** 20),
+                           ttl=CANDLE_TTL, negative_ttl=NEGATIVE_CACHE_TTL)
+get_daily_candle = candle_cache.get
+get_stock_info = ttl_cache(QUOTE_TTL, fallback=lambda code: {'name': code, 'price': 0, 'change_pct': 0},
+                           negative_ttl=NEGATIVE_CACHE_TTL)(shared_fetch(fetchers.fetch_stock_info, QUOTE_TTL))
+
+# 직렬화된 응답 본문 캐시 (캐시 적중 시 계산/직렬화 없이 바로 응답)
+response_cache = TTLCache(CANDLE_TTL, maxsize=20000)
+
+batch_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix='api-batch')
+
+# 단일 종목 요청 빈도 (OB_WARMUP_TOP 지정 시 상위 종목을 장전 / 장중 예열)
+access_counter = AccessCounter()
+
+
+def to_json_value(value):
+    """numpy 값 → JSON 기본형"""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f'직렬화 불가: {type(value)}')
+
+
+def parse_days(value) -> int:
+    """days 파라미터 (1~MAX_DAYS, 벗어나면 ValueError)"""
+    days = int(value)
+    if not 1 <= days <= MAX_DAYS:
+        raise ValueError(f'days는 1~{MAX_DAYS}')
+    return days
+
+
+def parse_flag(value) -> bool:
+    """불리언 파라미터 (1 / true / JSON true)"""
+    return value is True or str(value).lower() in ('1', 'true')
+
+
+def analyze_code(code: str, kind: str, price=None, days: int = 60, exclude_mitigated: bool = False) -> dict:
+    """종목 1개 오더블록 또는 레벨 계산 결과"""
+    df = get_daily_candle(code, days)
+    if df.empty:
+        return {'code': code, 'error': '데이터 없음'}
+
+    order_blocks = detect_order_blocks(df)
+    if kind == 'orderblocks':
+        return {'code': code, 'as_of': df.index[-1].strftime('%Y-%m-%d'), 'order_blocks': order_blocks}
+
+    if price is None:
+        price = get_stock_info(code)['price']
+    if not price:
+        return {'code': code, 'error': '현재가 없음'}
+    levels = calculate_levels(price, order_blocks, exclude_mitigated)
+    return {'code': code, 'price': price, 'as_of': df.index[-1].strftime('%Y-%m-%d'), 'levels': levels}
+
+
+def analyze_batch(codes: list, kind: str, prices: dict = None, days: int = 60, exclude_mitigated: bool = False) -> dict:
+    prices = prices or {}
+    futures = {code: batch_pool.submit(analyze_code, code, kind, prices.get(code), days, exclude_mitigated)
+               for code in codes}
+    return {'kind': kind, 'results': [futures[code].result() for code in codes]}
+
+
+class APIHandler(BaseHTTPRequestHandler):
+    server_version = 'OrderBlockAPI/1.0'
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # 헤더/본문 분할 전송 시 지연 ACK 대기 방지
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, etag: str = None, max_age: int = 0,
+              content_type: str = 'application/json; charset=utf-8'):
+        if etag and self.headers.get('If-None-Match') == etag:
+            status, body = 304, b''
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.send_header('Cache-Control', f'public, max-age={max_age}' if max_age else 'no-store')
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str):
+        self._send(status, json.dumps({'error': message}, ensure_ascii=False).encode('utf-8'))
+
+    def _send_cached(self, key, compute):
+        """응답 캐시 적중 시 저장된 본문/ETag 그대로, 아니면 계산 후 저장
+
+        오류 응답과 일부 종목이 실패한 배치는 저장하지 않음 (일시 장애가 TTL 동안 굳지 않게)
+        """
+        (status, body, etag, complete), stored_at = response_cache.get_or_compute(
+            key, lambda: self._encode(compute()), cacheable=lambda entry: entry[3])
+        if status != 200:
+            return self._send(status, body)
+        max_age = max(0, int(response_cache.ttl - (time.time() - stored_at))) if complete else 0
+        self._send(200, body, etag, max_age)
+
+    @staticmethod
+    def _encode(payload) -> tuple:
+        """(상태 코드, 본문, ETag, 오류 없음)"""
+        body = json.dumps(payload, ensure_ascii=False, default=to_json_value).encode('utf-8')
+        status = ERROR_STATUS.get(payload.get('error'), 200)
+        complete = 'error' not in payload and not any('error' in r for r in payload.get('results', ()))
+        return status, body, '"' + hashlib.sha1(body).hexdigest() + '"', complete
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split('/') if p]
+
+        try:
+            days = parse_days(query.get('days', 60))
+            if parts == ['health']:
+                body = json.dumps({'status': 'ok', 'candle_cache': candle_cache.stats()}).encode('utf-8')
+                return self._send(200, body)
+            if parts == ['metrics']:
+                return self._send(200, metrics.to_prometheus().encode('utf-8'),
+                                  content_type='text/plain; version=0.0.4; charset=utf-8')
+
+            if len(parts) == 2 and parts[0] in ('orderblocks', 'levels'):
+                kind, code = parts
+                if not CODE_RE.match(code):
+                    return self._send_error(400, '종목코드는 6자리 숫자')
+                access_counter.record(code)
+                price = int(query['price']) if query.get('price') else None
+                exclude = parse_flag(query.get('exclude_mitigated'))
+                return self._send_cached(
+                    (kind, code, price, days, exclude), lambda: analyze_code(code, kind, price, days, exclude)
+                )
+
+            if parts == ['batch']:
+                codes = [c for c in query.get('codes', '').split(',') if c]
+                return self._batch(codes, query.get('kind', 'levels'), {}, days,
+                                   parse_flag(query.get('exclude_mitigated')))
+        except ValueError:
+            return self._send_error(400, '잘못된 파라미터')
+
+        self._send_error(404, '없는 경로')
+
+    def do_POST(self):
+        if urlparse(self.path).path.rstrip('/') != '/batch':
+            return self._send_error(404, '없는 경로')
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            prices = {str(k): int(v) for k, v in (payload.get('prices') or {}).items()}
+            return self._batch(payload.get('codes', []), payload.get('kind', 'levels'), prices,
+                               parse_days(payload.get('days', 60)), parse_flag(payload.get('exclude_mitigated')))
+        except (ValueError, TypeError, AttributeError):
+            return self._send_error(400, '잘못된 요청 본문')
+
+    def _batch(self, codes: list, kind: str, prices: dict, days: int, exclude_mitigated: bool = False):
+        if kind not in ('levels', 'orderblocks'):
+            return self._send_error(400, 'kind는 levels 또는 orderblocks')
+        codes = list(dict.fromkeys(str(c) for c in codes))
+        if not codes or len(codes) > MAX_BATCH or not all(CODE_RE.match(c) for c in codes):
+            return self._send_error(400, f'codes는 6자리 종목코드 1~{MAX_BATCH}개')
+        key = ('batch', kind, tuple(codes), tuple(sorted(prices.items())), days, exclude_mitigated)
+        self._send_cached(key, lambda: analyze_batch(codes, kind, prices, days, exclude_mitigated))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='오더블록 / 레벨 JSON API 서버')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    args = parser.parse_args(argv)
+
+    server = ThreadingHTTPServer((args.host, args.port), APIHandler)
+    server.daemon_threads = True
+    if WARMUP_TOP:
+        WarmupScheduler(access_counter, lambda code: analyze_code(code, 'levels'), WARMUP_TOP, WARMUP_INTERVAL).start()
+    print(f'listening on http://{args.host}:{args.port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,16 +4,37 @@
 v1.4 - 주도 테마 분석기 추가
 """
 
+import functools
+import hmac
+import logging
+import threading
+import uuid
+from datetime import datetime
+
 import streamlit as st
-import requests
-from bs4 import BeautifulSoup
 import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-import urllib.parse
 import re
 import plotly.express as px
 
+import fetchers
+import http_client
+import metrics
+from cache import TTLCache
+from candle_cache import CandleCache
+from config import (ADMIN_TOKEN, CANDLE_CACHE_MB, METRICS_FILE, METRICS_HOST, METRICS_PORT, NEGATIVE_CACHE_TTL,
+                    PREFETCH_CONCURRENCY, SHEETS_URL, WARMUP_INTERVAL, WARMUP_TOP)
+from shared_cache import get_shared_cache, shared_fetch
+from market_flows import screen_signals, snapshot_version
+from orderblock import calculate_levels, detect_order_blocks
+from orderblock_chart import add_price_line, build_figure, data_version
+from prefetch import Prefetcher
+from screener_index import ScreenerIndex
+from supply_analysis import analyze_supply, analyze_supply_arrays, classify_supply_signal, pack_flows
+from supply_store import SupplyStore
+from theme_analysis import THEME_COLUMNS, parse_theme_csv, score_themes
+from symbol_master import get_symbol_master
+from warmup import AccessCounter, WarmupScheduler
+
 st.set_page_config(
     page_title="주식 분석 도구",
     page_icon="📈",
@@ -30,349 +51,260 @@ st.markdown("""
 # 공통 함수
 # ============================================================
 
-@st.cache_data(ttl=300)
-def search_stock_code(keyword: str) -> list:
-    try:
-        encoded_keyword = urllib.parse.quote(keyword, encoding='euc-kr')
-        url = f"https://finance.naver.com/search/searchList.naver?query={encoded_keyword}"
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=10)
-        response.encoding = 'euc-kr'
+@st.cache_resource
+def load_negative_cache():
+    """실패한 조회 기억 (프로세스 공유, 짧은 TTL)"""
+    return TTLCache(NEGATIVE_CACHE_TTL, maxsize=4096)
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        results = []
 
-        links = soup.select('a.tltle')
-        for link in links[:10]:
-            href = link.get('href', '')
-            name = link.text.strip()
+def cached_data(ttl: int, fallback=None, shared: bool = True):
+    """st.cache_data + 함수별 조회/미스/오류 카운터 (캐시 미스일 때만 본문 실행)
 
-            if 'code=' in href:
-                code = href.split('code=')[1].split('&')[0]
-                if len(code) == 6 and code.isdigit():
-                    results.append({'code': code, 'name': name})
+    공유 캐시(OB_SHARED_CACHE) 사용 시 shared=True 함수는 st.cache_data 대신 공유 캐시에 저장
+    (서버 프로세스 여러 개가 키당 TTL마다 1번만 수집)
 
-        return results
-    except:
-        return []
+    fallback이 있으면 본문 예외는 st.cache_data에 저장되지 않고 NEGATIVE_CACHE_TTL 동안만
+    기억되며, 그동안은 외부 요청 없이 fallback(같은 인자) 결과를 반환 (정상 빈 결과는 ttl 동안 캐시)
+    """
+    def decorator(func):
+        name = func.__name__
+
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            metrics.inc('cache_misses_total', function=name)
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                metrics.inc('cache_errors_total', function=name)
+                raise
 
+        if shared and get_shared_cache() is not None:
+            cached = shared_fetch(compute, ttl)
+        else:
+            cached = st.cache_data(ttl=ttl)(compute)
+
+        @functools.wraps(func)
+        def lookup(*args, **kwargs):
+            metrics.inc('cache_lookups_total', function=name)
+            if fallback is None:
+                return cached(*args, **kwargs)
+
+            key = (name, args, tuple(sorted(kwargs.items())))
+            negative = load_negative_cache()
+            if negative.get(key) is not None:
+                metrics.inc('cache_negative_hits_total', function=name)
+                return fallback(*args, **kwargs)
+            try:
+                return cached(*args, **kwargs)
+            except Exception:
+                negative.set(key, True)
+                return fallback(*args, **kwargs)
 
-@st.cache_data(ttl=60)
-def get_stock_info_naver(stock_code: str) -> dict:
-    try:
-        url = f"https://finance.naver.com/item/main.naver?code={stock_code}"
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=10)
-        response.encoding = 'utf-8'
+        lookup.clear = cached.clear
+        return lookup
+    return decorator
 
-        soup = BeautifulSoup(response.text, 'html.parser')
 
-        price_tag = soup.select_one('p.no_today span.blind')
-        current_price = int(price_tag.text.replace(',', '')) if price_tag else 0
+@st.cache_resource
+def start_metrics_exporter():
+    """Prometheus 지표 내보내기 (OB_METRICS_PORT / OB_METRICS_FILE 지정 시, 프로세스당 1회)"""
+    if METRICS_PORT or METRICS_FILE:
+        metrics.start_exporter(port=METRICS_PORT or None, path=METRICS_FILE or None, host=METRICS_HOST)
+    return True
 
-        name_tag = soup.select_one('div.wrap_company h2 a')
-        name = name_tag.text.strip() if name_tag else stock_code
 
-        change_tag = soup.select_one('p.no_exday em span.blind')
-        change_text = change_tag.text if change_tag else "0"
+start_metrics_exporter()
+
+
+@st.cache_resource
+def load_symbol_master():
+    """KRX 종목 마스터 (프로세스당 1개, 백그라운드 일일 갱신)"""
+    return get_symbol_master()
+
+
+def lookup_stock_code(keyword: str) -> list:
+    """종목명 → 코드 검색 (로컬 마스터 우선, 없으면 네이버 검색)"""
+    results = load_symbol_master().search(keyword)
+    if results:
+        return results
+    return search_stock_code(keyword)
+
+
+@cached_data(ttl=300, fallback=lambda *args, **kwargs: [])
+def search_stock_code(keyword: str) -> list:
+    return fetchers.fetch_stock_search(keyword)
+
+
+@cached_data(ttl=60, fallback=lambda stock_code: {'name': stock_code, 'price': 0, 'change_pct': 0})
+def get_stock_info_naver(stock_code: str) -> dict:
+    return fetchers.fetch_stock_info(stock_code)
 
-        is_down = soup.select_one('p.no_exday em.no_down')
-        change_pct = float(change_text.replace('%', '').replace(',', ''))
-        if is_down:
-            change_pct = -change_pct
 
-        return {'name': name, 'price': current_price, 'change_pct': change_pct}
-    except:
-        return {'name': stock_code, 'price': 0, 'change_pct': 0}
+@st.cache_resource
+def load_candle_cache():
+    """일봉 캐시 (종목당 프레임 1개, CANDLE_CACHE_MB 예산 LRU)"""
+    return CandleCache(shared_fetch(fetchers.fetch_daily_candle, 60), max_bytes=int(CANDLE_CACHE_MB * 2 ** 20),
+                       ttl=60, negative_ttl=NEGATIVE_CACHE_TTL)
 
 
-@st.cache_data(ttl=60)
 def get_daily_candle_naver(stock_code: str, days: int = 60) -> pd.DataFrame:
-    try:
-        url = f"https://finance.naver.com/item/sise_day.naver?code={stock_code}"
-        all_data = []
-        page = 1
-
-        while len(all_data) < days and page <= 10:
-            page_url = f"{url}&page={page}"
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(page_url, headers=headers, timeout=10)
-            response.encoding = 'euc-kr'
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            table = soup.find('table', class_='type2')
-            if not table:
-                break
-
-            rows = table.find_all('tr')
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) >= 7:
-                    date_text = cols[0].text.strip()
-                    if not date_text:
-                        continue
-                    try:
-                        date = datetime.strptime(date_text, '%Y.%m.%d')
-                        all_data.append({
-                            'date': date,
-                            'open': int(cols[3].text.strip().replace(',', '')),
-                            'high': int(cols[4].text.strip().replace(',', '')),
-                            'low': int(cols[5].text.strip().replace(',', '')),
-                            'close': int(cols[1].text.strip().replace(',', '')),
-                            'volume': int(cols[6].text.strip().replace(',', ''))
-                        })
-                    except:
-                        continue
-            page += 1
-
-        if not all_data:
-            return pd.DataFrame()
-
-        df = pd.DataFrame(all_data)
-        df = df.set_index('date').sort_index(ascending=True)
-        return df.tail(days)
-    except:
-        return pd.DataFrame()
-
-
-@st.cache_data(ttl=300)
+    return load_candle_cache().get(stock_code, days)
+
+
+@cached_data(ttl=300, fallback=lambda *args, **kwargs: [])
 def get_supply_data_naver(stock_code: str, days: int = 10) -> list:
     """네이버 금융에서 외국인/기관 수급 데이터 스크래핑"""
-    try:
-        url = f"https://finance.naver.com/item/frgn.naver?code={stock_code}"
-        all_data = []
-        page = 1
-
-        while len(all_data) < days and page <= 3:
-            page_url = f"{url}&page={page}"
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(page_url, headers=headers, timeout=10)
-            response.encoding = 'euc-kr'
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            # 두 번째 type2 테이블 사용
-            tables = soup.find_all('table', class_='type2')
-            if len(tables) < 2:
-                break
-            table = tables[1]
-
-            rows = table.find_all('tr')
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) >= 7:
-                    date_text = cols[0].text.strip()
-                    if not date_text or '.' not in date_text:
-                        continue
-                    try:
-                        # 날짜
-                        date = datetime.strptime(date_text, '%Y.%m.%d')
-
-                        # 기관 순매매 (컬럼 5)
-                        inst_text = cols[5].text.strip().replace(',', '').replace('+', '')
-                        inst = int(inst_text) if inst_text and inst_text != '-' else 0
-
-                        # 외국인 순매매 (컬럼 6)
-                        foreign_text = cols[6].text.strip().replace(',', '').replace('+', '')
-                        foreign = int(foreign_text) if foreign_text and foreign_text != '-' else 0
-
-                        all_data.append({
-                            'date': date,
-                            'foreign': foreign,
-                            'inst': inst
-                        })
-                    except:
-                        continue
-            page += 1
-
-        return all_data[:days]
-    except:
-        return []
-
-
-@st.cache_data(ttl=300)
+    return fetchers.fetch_supply_data(stock_code, days)
+
+
+@cached_data(ttl=300, fallback=lambda *args, **kwargs: [])
 def get_detailed_supply_pykrx(stock_code: str, days: int = 7) -> list:
     """KRX API로 투자자별 상세 수급 데이터 (연기금, 사모 포함)"""
+    return fetchers.fetch_detailed_supply(stock_code, days)
+
+
+@st.cache_resource
+def load_screener_index():
+    """전종목 오더블록 근접 스크리너 인덱스 (프로세스당 1개)"""
+    return ScreenerIndex()
+
+
+def update_screener_index(stock_code: str, order_blocks: list, price: float, as_of: str):
+    """분석한 종목의 오더블록 / 현재가를 스크리너 인덱스에 반영하고 저장"""
+    load_screener_index().update(stock_code, order_blocks, price, as_of)
+    save_screener_index()
+
+
+def save_screener_index():
+    """스크리너 인덱스 저장 (실패는 기록만 - 다음 저장 때 다시 시도)"""
     try:
-        url = 'http://data.krx.co.kr/comm/bldAttendant/getJsonData.cmd'
-        headers = {
-            'User-Agent': 'Mozilla/5.0',
-            'Content-Type': 'application/x-www-form-urlencoded',
-            'Referer': 'http://data.krx.co.kr/contents/MDC/MDI/mdiLoader/index.cmd?menuId=MDC0201020302'
-        }
-
-        end_date = datetime.now().strftime('%Y%m%d')
-        start_date = (datetime.now() - timedelta(days=days + 5)).strftime('%Y%m%d')
-
-        # 여러 ISIN 형식 시도 (000~009)
-        for suffix in ['003', '000', '001', '002', '004', '005', '006', '007', '008', '009']:
-            krx_code = f'KR7{stock_code}{suffix}'
-
-            data = {
-                'bld': 'dbms/MDC/STAT/standard/MDCSTAT02303',
-                'locale': 'ko_KR',
-                'inqTpCd': '2',
-                'trdVolVal': '1',
-                'askBid': '3',
-                'strtDd': start_date,
-                'endDd': end_date,
-                'isuCd': krx_code,
-                'isuCd2': stock_code,
-                'share': '1',
-                'money': '1',
-                'csvxls_is498': 'false'
-            }
-
-            response = requests.post(url, headers=headers, data=data, timeout=10)
-            result = response.json()
-
-            if 'output' in result and result['output']:
-                all_data = []
-                for row in result['output'][:days]:
-                    def parse_val(v):
-                        try:
-                            return int(str(v).replace(',', '').replace('+', ''))
-                        except:
-                            return 0
-
-                    all_data.append({
-                        'date': datetime.strptime(row['TRD_DD'], '%Y/%m/%d'),
-                        'financial': parse_val(row.get('TRDVAL1', '0')),
-                        'insurance': parse_val(row.get('TRDVAL2', '0')),
-                        'invest_trust': parse_val(row.get('TRDVAL3', '0')),
-                        'private': parse_val(row.get('TRDVAL4', '0')),
-                        'bank': parse_val(row.get('TRDVAL5', '0')),
-                        'other_fin': parse_val(row.get('TRDVAL6', '0')),
-                        'pension': parse_val(row.get('TRDVAL7', '0')),
-                        'corp': parse_val(row.get('TRDVAL8', '0')),
-                        'retail': parse_val(row.get('TRDVAL9', '0')),
-                        'foreign': parse_val(row.get('TRDVAL10', '0')),
-                        'other_foreign': parse_val(row.get('TRDVAL11', '0')),
-                    })
-                return all_data
-    except:
+        load_screener_index().save()
+    except OSError as e:
+        metrics.inc('screener_save_errors_total')
+        logging.getLogger(__name__).warning('스크리너 인덱스 저장 실패: %s', e)
+
+
+@st.cache_resource
+def load_supply_store():
+    """로컬 수급 시계열 저장소 (프로세스당 1개)"""
+    return SupplyStore()
+
+
+@cached_data(ttl=300, shared=False)
+def update_supply_store(stock_code: str) -> int:
+    """저장소 증분 갱신 (최초 1회 백필, 이후 새 거래일만)"""
+    try:
+        return load_supply_store().update(stock_code)
+    except Exception:
+        return 0
+
+
+@st.cache_resource
+def load_access_counter():
+    """종목별 조회 빈도 (예열 대상 선정용, 프로세스당 1개)"""
+    return AccessCounter()
+
+
+def record_access(stock_code: str):
+    counter = load_access_counter()
+    counter.record(stock_code)
+    try:
+        counter.save()
+    except OSError:
         pass
 
-    return []
 
+def warm_stock(stock_code: str):
+    """화면과 같은 인자로 시세 / 일봉 / 수급 캐시를 채우고 오더블록(현재가 대비 구간)을 스크리너 인덱스에 반영
 
-def analyze_supply(data: list) -> dict:
-    """수급 데이터 분석"""
-    if not data:
-        return {'daily_data': [], 'total_foreign': 0, 'total_inst': 0, 'buy_days': 0, 'sell_days': 0}
+    인덱스 저장은 라운드가 끝난 뒤 한 번 (WarmupScheduler after_round)
+    """
+    price_info = get_stock_info_naver(stock_code)
+    df = get_daily_candle_naver(stock_code, 60)
+    get_supply_data_naver(stock_code, days=7)
+    get_detailed_supply_pykrx(stock_code, days=7)
+    update_supply_store(stock_code)
+    if not df.empty and price_info['price']:
+        order_blocks = detect_order_blocks(df)
+        load_screener_index().update(stock_code, order_blocks, price_info['price'], df.index[-1].strftime('%Y-%m-%d'))
 
-    daily_data = []
-    for row in data:
-        date_str = row['date'].strftime('%m/%d')
-        foreign = row['foreign']
-        inst = row['inst']
-        smart_net = foreign + inst
 
-        daily_data.append({
-            'date': date_str,
-            'foreign': foreign,
-            'inst': inst,
-            'smart_net': smart_net,
-            'is_buy': smart_net > 0
-        })
+class BackgroundLogFilter(logging.Filter):
+    """예열 / 선수집 스레드는 화면 없이 캐시 함수만 호출하므로 'missing ScriptRunContext' 경고 제외"""
 
-    total_foreign = sum(d['foreign'] for d in daily_data)
-    total_inst = sum(d['inst'] for d in daily_data)
-    buy_days = sum(1 for d in daily_data if d['is_buy'])
-    sell_days = len(daily_data) - buy_days
+    def filter(self, record):
+        return not threading.current_thread().name.startswith(('warmup', 'prefetch'))
 
-    return {
-        'daily_data': daily_data,
-        'total_foreign': total_foreign,
-        'total_inst': total_inst,
-        'buy_days': buy_days,
-        'sell_days': sell_days
-    }
 
+@st.cache_resource
+def install_background_log_filter():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    logging.getLogger(get_script_run_ctx.__module__).addFilter(BackgroundLogFilter())
 
-# ============================================================
-# 오더블록 함수
-# ============================================================
 
-def detect_order_blocks(df: pd.DataFrame, lookback: int = 50, body_multiplier: float = 1.5) -> list:
-    if df is None or len(df) < 15:
-        return []
+@st.cache_resource
+def start_warmup_scheduler():
+    """장전 / 장중 캐시 예열 (OB_WARMUP_TOP 지정 시, 프로세스당 1개)"""
+    if not WARMUP_TOP:
+        return None
+    install_background_log_filter()
+    return WarmupScheduler(load_access_counter(), warm_stock, WARMUP_TOP, WARMUP_INTERVAL,
+                           after_round=save_screener_index).start()
 
-    opens = df['open'].values
-    highs = df['high'].values
-    lows = df['low'].values
-    closes = df['close'].values
-    order_blocks = []
 
-    for i in range(len(df) - 2, max(len(df) - lookback, 10), -1):
-        try:
-            curr_open = opens[i + 1]
-            curr_close = closes[i + 1]
-            curr_body = abs(curr_close - curr_open)
-
-            prev_open = opens[i]
-            prev_close = closes[i]
-            prev_high = highs[i]
-            prev_low = lows[i]
-
-            avg_body = np.mean([abs(closes[k] - opens[k]) for k in range(max(0, i - 10), i)])
-            if avg_body == 0:
-                continue
-
-            ob_date = df.index[i].strftime('%Y-%m-%d')
-
-            if (prev_close < prev_open) and (curr_close > curr_open) and \
-               (curr_close > prev_high) and (curr_body > avg_body * body_multiplier):
-                order_blocks.append({
-                    'type': 'bullish', 'type_kr': '상승',
-                    'date': ob_date, 'top': prev_high, 'bottom': prev_low,
-                    'strength': curr_body / avg_body
-                })
-
-            if (prev_close > prev_open) and (curr_close < curr_open) and \
-               (curr_close < prev_low) and (curr_body > avg_body * body_multiplier):
-                order_blocks.append({
-                    'type': 'bearish', 'type_kr': '하락',
-                    'date': ob_date, 'top': prev_high, 'bottom': prev_low,
-                    'strength': curr_body / avg_body
-                })
-        except:
-            continue
+start_warmup_scheduler()
+
+
+@st.cache_resource
+def load_prefetcher():
+    """탭 간 선수집 (OB_PREFETCH_CONCURRENCY > 0일 때, 프로세스당 1개)"""
+    if not PREFETCH_CONCURRENCY:
+        return None
+    install_background_log_filter()
+    return Prefetcher(PREFETCH_CONCURRENCY)
 
-    order_blocks.sort(key=lambda x: x['strength'], reverse=True)
-    return order_blocks
 
+def prefetch_session_id() -> str:
+    return st.session_state.setdefault('prefetch_session', uuid.uuid4().hex)
 
-def calculate_levels(current_price: float, order_blocks: list) -> dict:
-    result = {
-        'entry_zones': [], 'take_profit_zones': [],
-        'stop_loss': None, 'nearest_support': None, 'nearest_resistance': None
-    }
 
-    bullish_obs = [ob for ob in order_blocks if ob['type'] == 'bullish']
-    bearish_obs = [ob for ob in order_blocks if ob['type'] == 'bearish']
+# 탭별 선수집 대상 (다른 탭에서 분석하면 이 탭이 쓸 캐시를 미리 채움)
+PREFETCH_TARGETS = {
+    'supply': lambda code: (get_supply_data_naver(code, days=7), get_detailed_supply_pykrx(code, days=7)),
+    'orderblock': lambda code: get_daily_candle_naver(code, 60),
+}
 
-    for ob in bullish_obs:
-        mid = (ob['top'] + ob['bottom']) / 2
-        if mid <= current_price * 1.05:
-            result['entry_zones'].append(ob)
 
-    for ob in bearish_obs:
-        mid = (ob['top'] + ob['bottom']) / 2
-        if mid >= current_price * 0.95:
-            result['take_profit_zones'].append(ob)
+def prefetch_tab(tab: str, stock_code: str):
+    """다른 탭 데이터 백그라운드 선수집 시작"""
+    prefetcher = load_prefetcher()
+    if prefetcher is not None:
+        prefetcher.submit(prefetch_session_id(), (tab, stock_code), functools.partial(PREFETCH_TARGETS[tab], stock_code))
 
-    supports = [ob for ob in bullish_obs if (ob['top'] + ob['bottom'])/2 < current_price]
-    if supports:
-        nearest = min(supports, key=lambda x: current_price - (x['top'] + x['bottom'])/2)
-        result['nearest_support'] = nearest
-        result['stop_loss'] = nearest['bottom'] * 0.998
 
-    resistances = [ob for ob in bearish_obs if (ob['top'] + ob['bottom'])/2 > current_price]
-    if resistances:
-        nearest = min(resistances, key=lambda x: (x['top'] + x['bottom'])/2 - current_price)
-        result['nearest_resistance'] = nearest
+def claim_prefetch(tab: str, stock_code: str):
+    """이 탭 데이터를 선수집해 뒀으면 사용으로 집계 (진행 중이면 끝날 때까지 잠시 대기)"""
+    prefetcher = load_prefetcher()
+    if prefetcher is not None:
+        prefetcher.claim(prefetch_session_id(), (tab, stock_code))
 
-    return result
+
+CHART_PERIODS = {60: '3개월', 250: '1년', 750: '3년', 2500: '10년'}
+
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def load_orderblock_figure(stock_code: str, version: str, period: int, _df: pd.DataFrame) -> dict:
+    """(종목, 일봉 버전, 기간)별 차트 그림 dict (세션 간 공유, 호출마다 사본 - 현재가 선은 받은 쪽에서 추가)"""
+    return build_figure(_df, detect_order_blocks(_df, lookback=len(_df))).to_plotly_json()
+
+
+def mitigation_label(ob: dict) -> str:
+    """오더블록 미티게이션 상태 표시 문자열"""
+    if ob.get('broken'):
+        return f" · {ob['broken_date']} 이탈"
+    if ob.get('mitigated'):
+        return f" · {ob['mitigated_date']} 터치"
+    return " · 미터치"
 
 
 # ============================================================
@@ -391,447 +323,576 @@ tab1, tab2, tab3 = st.tabs([
 # ============================================================
 # 탭1: 오더블록 계산기
 # ============================================================
-with tab1:
-    st.markdown('<h3><i class="fa-solid fa-cube" style="color: #667eea;"></i> 오더블록 계산기</h3>', unsafe_allow_html=True)
-    st.caption("손절가 / 익절구간 / 진입구간 계산")
 
-    col1, col2 = st.columns([4, 1])
-    with col1:
-        ob_stock_code = st.text_input("종목코드", placeholder="005930", label_visibility="collapsed", max_chars=6, key="ob_code")
-    with col2:
-        ob_search_btn = st.button("분석", width="stretch", key="ob_btn")
+def render_zone_list(zones: list, current_price: float):
+    if not zones:
+        st.write("없음")
+        return
+    for ob in zones[:5]:
+        dist = ((ob['top'] + ob['bottom'])/2 - current_price) / current_price * 100
+        st.write(f"**{ob['bottom']:,.0f} ~ {ob['top']:,.0f}원** ({dist:+.1f}%) - {ob['date']}{mitigation_label(ob)}")
 
-    if ob_stock_code and ob_search_btn:
-        if not re.match(r'^\d{6}$', ob_stock_code):
-            st.error("종목코드는 6자리 숫자")
-        else:
-            with st.spinner("분석 중..."):
-                price_info = get_stock_info_naver(ob_stock_code)
-                df = get_daily_candle_naver(ob_stock_code, 60)
 
-                if df.empty or price_info['price'] == 0:
-                    st.error("데이터 없음")
-                else:
-                    current_price = price_info['price']
-                    order_blocks = detect_order_blocks(df)
-                    levels = calculate_levels(current_price, order_blocks)
-
-                    st.markdown("---")
-                    st.subheader(f"{price_info['name']} ({ob_stock_code})")
-
-                    col1, col2, col3 = st.columns(3)
-                    col1.metric("현재가", f"{current_price:,}원")
-                    col2.metric("오더블록", f"{len(order_blocks)}개")
-                    if levels['stop_loss']:
-                        loss_pct = (levels['stop_loss'] - current_price) / current_price * 100
-                        col3.metric("손절가", f"{levels['stop_loss']:,.0f}원", f"{loss_pct:+.1f}%")
-                    else:
-                        col3.metric("손절가", "-")
-
-                    st.markdown("---")
-
-                    st.markdown('<h4><i class="fa-solid fa-arrow-trend-up" style="color: #28a745;"></i> 진입 구간 (상승 OB)</h4>', unsafe_allow_html=True)
-                    if levels['entry_zones']:
-                        for ob in levels['entry_zones'][:5]:
-                            dist = ((ob['top'] + ob['bottom'])/2 - current_price) / current_price * 100
-                            st.write(f"**{ob['bottom']:,.0f} ~ {ob['top']:,.0f}원** ({dist:+.1f}%) - {ob['date']}")
-                    else:
-                        st.write("없음")
+def render_orderblock_result(stock_code: str, exclude_mitigated: bool, clicked: bool):
+    """현재가 → 오더블록 / 레벨 순으로 도착하는 대로 표시 (빈 자리를 먼저 만들고 채움)"""
+    st.markdown("---")
+    header = st.empty()
+    header.subheader(stock_code)
+    col1, col2, col3 = st.columns(3)
+    price_slot, count_slot, stop_slot = col1.empty(), col2.empty(), col3.empty()
+    price_slot.metric("현재가", "조회 중")
+    count_slot.metric("오더블록", "계산 중")
+    stop_slot.metric("손절가", "계산 중")
+
+    price_info = get_stock_info_naver(stock_code)
+    if price_info['price'] == 0:
+        st.error("데이터 없음")
+        return
+    current_price = price_info['price']
+    header.subheader(f"{price_info['name']} ({stock_code})")
+    price_slot.metric("현재가", f"{current_price:,}원")
+
+    with st.spinner("일봉 분석 중..."):
+        df = get_daily_candle_naver(stock_code, 60)
+    if df.empty:
+        st.error("데이터 없음")
+        return
+
+    order_blocks = detect_order_blocks(df)
+    levels = calculate_levels(current_price, order_blocks, exclude_mitigated)
+    if clicked:
+        update_screener_index(stock_code, order_blocks, current_price, df.index[-1].strftime('%Y-%m-%d'))
+
+    count_slot.metric("오더블록", f"{len(order_blocks)}개")
+    if levels['stop_loss']:
+        loss_pct = (levels['stop_loss'] - current_price) / current_price * 100
+        stop_slot.metric("손절가", f"{levels['stop_loss']:,.0f}원", f"{loss_pct:+.1f}%")
+    else:
+        stop_slot.metric("손절가", "-")
 
-                    st.markdown("---")
+    st.markdown("---")
 
-                    st.markdown('<h4><i class="fa-solid fa-arrow-trend-down" style="color: #dc3545;"></i> 익절 구간 (하락 OB)</h4>', unsafe_allow_html=True)
-                    if levels['take_profit_zones']:
-                        for ob in levels['take_profit_zones'][:5]:
-                            dist = ((ob['top'] + ob['bottom'])/2 - current_price) / current_price * 100
-                            st.write(f"**{ob['bottom']:,.0f} ~ {ob['top']:,.0f}원** ({dist:+.1f}%) - {ob['date']}")
-                    else:
-                        st.write("없음")
+    st.markdown('<h4><i class="fa-solid fa-arrow-trend-up" style="color: #28a745;"></i> 진입 구간 (상승 OB)</h4>', unsafe_allow_html=True)
+    render_zone_list(levels['entry_zones'], current_price)
 
     st.markdown("---")
-    st.caption("네이버 금융 데이터 기반 / 참고용")
 
+    st.markdown('<h4><i class="fa-solid fa-arrow-trend-down" style="color: #dc3545;"></i> 익절 구간 (하락 OB)</h4>', unsafe_allow_html=True)
+    render_zone_list(levels['take_profit_zones'], current_price)
 
-# ============================================================
-# 탭2: 수급 추적기
-# ============================================================
-with tab2:
-    st.markdown('<h3><i class="fa-solid fa-coins" style="color: #28a745;"></i> 수급 추적기</h3>', unsafe_allow_html=True)
-    st.caption("외국인/기관 매매 현황 조회")
+    st.markdown("---")
 
-    col1, col2 = st.columns([4, 1])
-    with col1:
-        supply_input = st.text_input("종목코드 또는 종목명", placeholder="005930 또는 삼성전자", label_visibility="collapsed", key="supply_input")
-    with col2:
-        supply_btn = st.button("조회", width="stretch", key="supply_btn")
-
-    supply_code = None
-    if supply_input and not supply_input.isdigit():
-        results = search_stock_code(supply_input)
-        if results:
-            options = [f"{r['name']} ({r['code']})" for r in results]
-            selected = st.selectbox("검색 결과", options, key="supply_select")
-            if selected:
-                supply_code = selected.split('(')[1].replace(')', '')
-    elif supply_input and len(supply_input) == 6:
-        supply_code = supply_input
-
-    if supply_code and supply_btn:
-        with st.spinner("조회 중..."):
-            stock_info = get_stock_info_naver(supply_code)
-            supply_data = get_supply_data_naver(supply_code, days=7)
-
-            if not supply_data:
-                st.error("데이터 없음")
+    st.markdown('<h4><i class="fa-solid fa-chart-column" style="color: #1f77b4;"></i> 차트</h4>', unsafe_allow_html=True)
+    chart_days = st.radio("차트 기간", list(CHART_PERIODS), format_func=CHART_PERIODS.get, horizontal=True,
+                          label_visibility="collapsed", key="ob_chart_days")
+    chart_df = df if chart_days <= len(df) else get_daily_candle_naver(stock_code, chart_days)
+    if chart_df.empty:
+        st.info("차트 데이터 없음")
+        return
+    fig = load_orderblock_figure(stock_code, data_version(chart_df), chart_days, chart_df)
+    st.plotly_chart(add_price_line(fig, current_price), width="stretch", config={'displayModeBar': False, 'scrollZoom': True})
+
+
+@st.fragment
+def render_orderblock_tab():
+    """오더블록 계산기 (분석 버튼 / 옵션 변경 시 이 부분만 다시 실행)"""
+    with metrics.span('render.orderblock'):
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            ob_stock_code = st.text_input("종목코드", placeholder="005930", label_visibility="collapsed", max_chars=6, key="ob_code")
+        with col2:
+            ob_search_btn = st.button("분석", width="stretch", key="ob_btn")
+        ob_exclude_mitigated = st.checkbox("이미 가격이 다녀간 오더블록 제외", key="ob_exclude_mitigated")
+
+        if ob_stock_code and ob_search_btn:
+            if not re.match(r'^\d{6}$', ob_stock_code):
+                st.session_state.pop('ob_active', None)
+                st.error("종목코드는 6자리 숫자")
             else:
-                analysis = analyze_supply(supply_data)
+                st.session_state['ob_active'] = ob_stock_code
+                record_access(ob_stock_code)
+                claim_prefetch('orderblock', ob_stock_code)
+                prefetch_tab('supply', ob_stock_code)
+
+        # 마지막으로 분석한 종목은 다른 위젯 조작으로 다시 실행돼도 캐시에서 바로 다시 그림
+        if st.session_state.get('ob_active'):
+            render_orderblock_result(st.session_state['ob_active'], ob_exclude_mitigated, bool(ob_search_btn))
+
+
+@st.fragment
+def render_proximity_screener():
+    """전종목 오더블록 근접 스크리너 (필터 변경 시 이 부분만 다시 실행)"""
+    with st.expander("오더블록 근접 종목 (전종목 스크리너)"):
+        col1, col2, col3 = st.columns(3)
+        screen_kind = col1.selectbox("구간", ['bullish', 'bearish'], key="screen_kind",
+                                     format_func=lambda k: '상승 OB (지지)' if k == 'bullish' else '하락 OB (저항)')
+        screen_within = col2.slider("구간까지 거리(%)", 0.5, 10.0, 2.0, 0.5, key="screen_within")
+        screen_strength = col3.number_input("최소 강도", 0.0, 20.0, 0.0, 0.5, key="screen_strength")
+        screen_fresh = st.checkbox("가격이 다녀가지 않은 오더블록만", value=True, key="screen_fresh")
+
+        screener = load_screener_index()
+        screener.refresh()
+        screened_blocks = screener.query(screen_kind, screen_within / 100, screen_strength, screen_fresh)
+        if screened_blocks:
+            master = load_symbol_master()
+            st.dataframe([{
+                '종목': (master.get(r['code']) or {}).get('name', r['code']),
+                '코드': r['code'],
+                '구간': f"{r['bottom']:,.0f} ~ {r['top']:,.0f}원",
+                '가격': f"{r['close']:,.0f}원",
+                '거리': f"{r['distance'] * 100:.2f}%",
+                '강도': f"{r['strength']:.1f}",
+                '기준일': r['date'],
+            } for r in screened_blocks], width="stretch", hide_index=True)
+        else:
+            st.info("조건에 맞는 종목 없음 (python screener_index.py build)")
 
-                # 연기금/사모/투신 상세 데이터 미리 가져오기 (종합 해석용)
-                detailed_data = get_detailed_supply_pykrx(supply_code, days=7)
 
-                # 상세 데이터 합계
-                if detailed_data:
-                    total_pension = sum(d['pension'] for d in detailed_data)
-                    total_private = sum(d['private'] for d in detailed_data)
-                    total_invest_trust = sum(d['invest_trust'] for d in detailed_data)
-                    total_financial = sum(d['financial'] for d in detailed_data)
-                else:
-                    total_pension = 0
-                    total_private = 0
-                    total_invest_trust = 0
-                    total_financial = 0
+with tab1:
+    st.markdown('<h3><i class="fa-solid fa-cube" style="color: #667eea;"></i> 오더블록 계산기</h3>', unsafe_allow_html=True)
+    st.caption("손절가 / 익절구간 / 진입구간 계산")
+    render_orderblock_tab()
 
-                st.markdown("---")
-                st.subheader(f"{stock_info['name']} ({supply_code})")
+    # 전종목 오더블록 근접 스크리너 (screener_index.py build 로 만든 인덱스 + 분석한 종목)
+    st.markdown("---")
+    render_proximity_screener()
+
+    st.markdown("---")
+    st.caption("네이버 금융 데이터 기반 / 참고용")
 
-                col1, col2, col3 = st.columns(3)
-                col1.metric("현재가", f"{stock_info['price']:,}원", f"{stock_info['change_pct']:+.1f}%")
-                col2.metric("순매수일", f"{analysis['buy_days']}일")
-                col3.metric("순매도일", f"{analysis['sell_days']}일")
 
-                st.markdown("---")
+# ============================================================
+# 탭2: 수급 추적기
+# ============================================================
 
-                col1, col2 = st.columns(2)
-                # 주식수 기준이므로 억 단위로 변환하지 않음
-                total_foreign = analysis['total_foreign']
-                total_inst = analysis['total_inst']
+def detail_totals(detailed_data: list) -> dict:
+    """KRX 상세 수급 7일 합계 (연기금 / 사모 / 투신 / 금융투자, 데이터 없으면 0)"""
+    fields = ['pension', 'private', 'invest_trust', 'financial']
+    if not detailed_data:
+        return {field: 0 for field in fields}
+    totals = analyze_supply_arrays(pack_flows(detailed_data, fields))['totals']
+    return {field: int(totals[field]) for field in fields}
+
+
+def render_supply_signal(analysis: dict, detailed_data: list, totals: dict):
+    """종합 수급 해석 (KRX 상세 수급 반영)"""
+    total_foreign = analysis['total_foreign']
+    total_inst = analysis['total_inst']
+    total_pension = totals['pension']
+    total_private = totals['private']
+    total_invest_trust = totals['invest_trust']
+
+    st.markdown('<h4><i class="fa-solid fa-lightbulb" style="color: #ffc107;"></i> 종합 수급 해석</h4>', unsafe_allow_html=True)
+
+    total_smart = total_foreign + total_inst
+
+    # 최근 추세 분석 (최근 3일 vs 이전 4일)
+    recent_3 = analysis['recent_3']
+    prev_4 = analysis['prev_4']
+
+    # 투자자별 방향 체크
+    foreign_buy = total_foreign > 0
+    inst_buy = total_inst > 0
+    pension_buy = total_pension > 0
+    private_buy = total_private > 0
+    trust_buy = total_invest_trust > 0
+
+    # 방향 일치 수 (매수 방향)
+    buy_count = sum([foreign_buy, inst_buy, pension_buy, private_buy, trust_buy])
+    sell_count = 5 - buy_count
+
+    # 종합 수급 판단 (연기금, 사모 등 포함) - supply_analysis 규칙 엔진
+    signal = classify_supply_signal(
+        total_foreign=total_foreign, total_inst=total_inst,
+        total_pension=total_pension, total_private=total_private,
+        total_invest_trust=total_invest_trust,
+        buy_days=analysis['buy_days'], sell_days=analysis['sell_days'],
+        recent_3=recent_3, prev_4=prev_4, has_detail=bool(detailed_data)
+    )
+    signal_text = signal['text']
+    signal_color = signal['color']
+    signal_icon = signal['icon']
+    tip = signal['tip']
+
+    # 메인 신호 박스
+    st.markdown(f'''
+    <div style="background: linear-gradient(135deg, {signal_color}22, {signal_color}11);
+                border-left: 4px solid {signal_color};
+                padding: 15px; border-radius: 8px; margin: 10px 0;">
+        <h4 style="margin:0; color:{signal_color};">
+            <i class="fa-solid {signal_icon}"></i> {signal_text}
+        </h4>
+        <p style="margin:8px 0 0 0; color:#aaa; font-size:14px;">
+            {tip}
+        </p>
+        <p style="margin:8px 0 0 0; color:#888; font-size:12px;">
+            외국인+기관: {total_smart/10000:+,.1f}만주 | 순매수 {analysis['buy_days']}일 / 순매도 {analysis['sell_days']}일
+        </p>
+    </div>
+    ''', unsafe_allow_html=True)
+
+    # 투자자별 방향 요약 (상세 데이터 있을 때만)
+    if detailed_data:
+        def get_direction_badge(is_buy, amount):
+            if amount == 0:
+                return '<span style="color:#6c757d;">중립</span>'
+            color = "#28a745" if is_buy else "#dc3545"
+            icon = "▲" if is_buy else "▼"
+            return f'<span style="color:{color};">{icon}</span>'
+
+        st.markdown(f'''
+        <div style="background:#1a1a2e; padding:12px; border-radius:8px; margin:10px 0;">
+            <div style="font-size:13px; color:#888; margin-bottom:8px;">투자자별 방향 (7일 합계)</div>
+            <div style="display:flex; justify-content:space-around; flex-wrap:wrap; gap:8px;">
+                <div style="text-align:center;">
+                    <div style="color:#aaa; font-size:11px;">외국인</div>
+                    <div>{get_direction_badge(foreign_buy, total_foreign)}</div>
+                </div>
+                <div style="text-align:center;">
+                    <div style="color:#aaa; font-size:11px;">기관</div>
+                    <div>{get_direction_badge(inst_buy, total_inst)}</div>
+                </div>
+                <div style="text-align:center;">
+                    <div style="color:#aaa; font-size:11px;">연기금</div>
+                    <div>{get_direction_badge(pension_buy, total_pension)}</div>
+                </div>
+                <div style="text-align:center;">
+                    <div style="color:#aaa; font-size:11px;">사모</div>
+                    <div>{get_direction_badge(private_buy, total_private)}</div>
+                </div>
+                <div style="text-align:center;">
+                    <div style="color:#aaa; font-size:11px;">투신</div>
+                    <div>{get_direction_badge(trust_buy, total_invest_trust)}</div>
+                </div>
+            </div>
+            <div style="text-align:center; margin-top:10px; font-size:12px; color:#888;">
+                매수 {buy_count}곳 / 매도 {sell_count}곳
+            </div>
+        </div>
+        ''', unsafe_allow_html=True)
+
+
+def render_supply_detail(detailed_data: list, totals: dict):
+    """연기금 / 사모 상세 (KRX)"""
+    total_pension = totals['pension']
+    total_private = totals['private']
+    total_invest_trust = totals['invest_trust']
+    total_financial = totals['financial']
+
+    st.markdown('<h4><i class="fa-solid fa-building-columns" style="color: #9b59b6;"></i> 연기금 / 사모 상세</h4>', unsafe_allow_html=True)
+
+    if detailed_data:
+        def fmt_num(n):
+            if abs(n) >= 10000:
+                return f"{n/10000:+,.1f}만주"
+            return f"{n:+,}주"
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("연기금 (7일)", fmt_num(total_pension))
+        col2.metric("사모펀드 (7일)", fmt_num(total_private))
+        col3.metric("투신 (7일)", fmt_num(total_invest_trust))
+
+        # 상세 테이블
+        detail_table = []
+        for d in detailed_data:
+            def fmt_short(n):
+                if abs(n) >= 10000:
+                    return f"{n/10000:+,.1f}만"
+                return f"{n:+,}"
+
+            detail_table.append({
+                '날짜': d['date'].strftime('%m/%d'),
+                '연기금': fmt_short(d['pension']),
+                '사모': fmt_short(d['private']),
+                '투신': fmt_short(d['invest_trust']),
+                '금융투자': fmt_short(d['financial']),
+            })
+
+        st.dataframe(detail_table, width="stretch", hide_index=True)
+
+        # 투자자별 특성 해석
+        st.markdown("##### 투자자별 해석")
+
+        interpretations = []
+
+        # 연기금 해석
+        if total_pension > 0:
+            interpretations.append(f"✅ **연기금** 순매수 {fmt_num(total_pension)} - 국민연금 등 장기 투자자 매집 (장기 상승 기대)")
+        elif total_pension < 0:
+            interpretations.append(f"⚠️ **연기금** 순매도 {fmt_num(total_pension)} - 장기 투자자 비중 축소")
+
+        # 사모펀드 해석
+        if total_private > 0:
+            interpretations.append(f"✅ **사모펀드** 순매수 {fmt_num(total_private)} - 단기/중기 수익 기대하는 자금 유입")
+        elif total_private < 0:
+            interpretations.append(f"⚠️ **사모펀드** 순매도 {fmt_num(total_private)} - 차익실현 또는 리스크 회피")
+
+        # 투신 해석
+        if total_invest_trust > 0:
+            interpretations.append(f"✅ **투신(펀드)** 순매수 {fmt_num(total_invest_trust)} - 펀드 자금 유입 중")
+        elif total_invest_trust < 0:
+            interpretations.append(f"⚠️ **투신(펀드)** 순매도 {fmt_num(total_invest_trust)} - 펀드 환매 또는 비중 축소")
+
+        # 금융투자 해석
+        if total_financial > 0:
+            interpretations.append(f"✅ **금융투자** 순매수 {fmt_num(total_financial)} - 증권사 자기매매 매수")
+        elif total_financial < 0:
+            interpretations.append(f"⚠️ **금융투자** 순매도 {fmt_num(total_financial)} - 증권사 물량 정리")
+
+        if interpretations:
+            for interp in interpretations:
+                st.markdown(interp)
+        else:
+            st.info("특이 동향 없음")
 
-                # 만주 단위로 표시
-                if abs(total_foreign) >= 10000:
-                    col1.metric("외국인 (7일)", f"{total_foreign/10000:+,.1f}만주")
-                else:
-                    col1.metric("외국인 (7일)", f"{total_foreign:+,}주")
+    else:
+        st.info("연기금/사모 상세 데이터 없음 (해당 종목 미지원)")
+
+
+def render_supply_windows(supply_code: str):
+    """기간별 누적 수급 (로컬 저장소, 증분 갱신)"""
+    st.markdown('<h4><i class="fa-solid fa-clock-rotate-left" style="color: #3498db;"></i> 기간별 누적 수급</h4>', unsafe_allow_html=True)
+
+    def fmt_window(n):
+        if abs(n) >= 10000:
+            return f"{n/10000:+,.1f}만"
+        return f"{n:+,}"
+
+    def fmt_detail(n, sums):
+        """KRX 상세 항목 - 상세 행이 없으면 '-', 일부 거래일만 있으면 합산한 일수 표시"""
+        if n is None:
+            return "-"
+        if sums['detail_days'] < sums['days']:
+            return f"{fmt_window(n)} ({sums['detail_days']}일)"
+        return fmt_window(n)
+
+    update_supply_store(supply_code)
+    store = load_supply_store()
+    window_table = []
+    partial = False
+    for window_days in (20, 60, 120):
+        window_analysis = analyze_supply(store.rows(supply_code, window_days))
+        if not window_analysis['daily_data']:
+            continue
+        sums = store.window_sums(supply_code, (window_days,))[window_days]
+        partial |= sums['detail_days'] < sums['days']
+        window_table.append({
+            '기간': f"{len(window_analysis['daily_data'])}일",
+            '외국인': fmt_window(window_analysis['total_foreign']),
+            '기관': fmt_window(window_analysis['total_inst']),
+            '연기금': fmt_detail(sums['pension'], sums),
+            '사모': fmt_detail(sums['private'], sums),
+            '투신': fmt_detail(sums['invest_trust'], sums),
+            '순매수/순매도일': f"{window_analysis['buy_days']} / {window_analysis['sell_days']}",
+        })
 
-                if abs(total_inst) >= 10000:
-                    col2.metric("기관 (7일)", f"{total_inst/10000:+,.1f}만주")
-                else:
-                    col2.metric("기관 (7일)", f"{total_inst:+,}주")
+    if window_table:
+        st.dataframe(window_table, width="stretch", hide_index=True)
+        if partial:
+            st.caption("연기금 / 사모 / 투신은 KRX 상세 데이터가 있는 거래일만 합산 (괄호 안 일수, 없으면 -)")
+    else:
+        st.info("저장된 수급 이력 없음")
 
-                # 해석 요약
-                st.markdown("---")
-                st.markdown('<h4><i class="fa-solid fa-lightbulb" style="color: #ffc107;"></i> 종합 수급 해석</h4>', unsafe_allow_html=True)
 
-                total_smart = total_foreign + total_inst
+def render_supply_result(supply_code: str):
+    """현재가 → 네이버 수급 → KRX 상세 순으로 도착하는 대로 표시 (느린 KRX 구간은 빈 자리에 마지막으로 채움)"""
+    st.markdown("---")
+    header = st.empty()
+    header.subheader(supply_code)
+    col1, col2, col3 = st.columns(3)
+    price_slot, buy_slot, sell_slot = col1.empty(), col2.empty(), col3.empty()
+    price_slot.metric("현재가", "조회 중")
+    buy_slot.metric("순매수일", "조회 중")
+    sell_slot.metric("순매도일", "조회 중")
+
+    stock_info = get_stock_info_naver(supply_code)
+    header.subheader(f"{stock_info['name']} ({supply_code})")
+    price_slot.metric("현재가", f"{stock_info['price']:,}원", f"{stock_info['change_pct']:+.1f}%")
+
+    supply_data = get_supply_data_naver(supply_code, days=7)
+    if not supply_data:
+        st.error("데이터 없음")
+        return
+
+    analysis = analyze_supply(supply_data)
+    buy_slot.metric("순매수일", f"{analysis['buy_days']}일")
+    sell_slot.metric("순매도일", f"{analysis['sell_days']}일")
 
-                # 종합 스마트머니 (연기금+사모+투신 포함)
-                total_all_smart = total_foreign + total_inst + total_pension + total_private + total_invest_trust
+    st.markdown("---")
 
-                # 최근 추세 분석 (최근 3일 vs 이전 4일)
-                daily = analysis['daily_data']
-                if len(daily) >= 5:
-                    recent_3 = sum(d['smart_net'] for d in daily[:3])
-                    prev_4 = sum(d['smart_net'] for d in daily[3:])
-                    trend_turning = (recent_3 > 0 and prev_4 < 0) or (recent_3 < 0 and prev_4 > 0)
-                else:
-                    recent_3 = 0
-                    prev_4 = 0
-                    trend_turning = False
-
-                # 투자자별 방향 체크
-                foreign_buy = total_foreign > 0
-                inst_buy = total_inst > 0
-                pension_buy = total_pension > 0
-                private_buy = total_private > 0
-                trust_buy = total_invest_trust > 0
-
-                # 방향 일치 수 (매수 방향)
-                buy_count = sum([foreign_buy, inst_buy, pension_buy, private_buy, trust_buy])
-                sell_count = 5 - buy_count
-
-                # 종합 수급 판단 (연기금, 사모 등 포함)
-                if detailed_data and total_all_smart > 0 and buy_count >= 4:
-                    signal_text = "전방위 매집"
-                    signal_color = "#28a745"
-                    signal_icon = "fa-arrows-up-to-line"
-                    tip = "외국인+기관+연기금+사모 모두 매수 중! 강력한 상승 신호"
-                elif detailed_data and total_pension > 0 and total_smart > 0:
-                    signal_text = "장기 스마트머니 매집"
-                    signal_color = "#28a745"
-                    signal_icon = "fa-landmark"
-                    tip = "연기금(국민연금 등) + 외국인/기관 동반 매수. 장기 상승 기대"
-                elif detailed_data and total_pension > 0 and total_smart < 0:
-                    signal_text = "연기금 단독 매집"
-                    signal_color = "#17a2b8"
-                    signal_icon = "fa-landmark"
-                    tip = "연기금 매수 vs 외국인/기관 매도. 장기 관점에서 긍정적"
-                elif total_smart > 0 and analysis['buy_days'] >= 5:
-                    signal_text = "강한 매집"
-                    signal_color = "#28a745"
-                    signal_icon = "fa-arrow-up"
-                    tip = "스마트머니가 적극 매수 중. 단기 상승 가능성 높음"
-                elif total_smart > 0 and analysis['buy_days'] >= 4:
-                    signal_text = "매집 중"
-                    signal_color = "#28a745"
-                    signal_icon = "fa-arrow-up"
-                    tip = "외국인+기관 순매수 우위. 상승 추세 지속 가능"
-                elif detailed_data and total_all_smart < 0 and sell_count >= 4:
-                    signal_text = "전방위 매도"
-                    signal_color = "#dc3545"
-                    signal_icon = "fa-arrows-down-to-line"
-                    tip = "외국인+기관+연기금+사모 모두 매도! 강력한 하락 신호"
-                elif detailed_data and total_pension < 0 and total_smart < 0:
-                    signal_text = "장기 자금 이탈"
-                    signal_color = "#dc3545"
-                    signal_icon = "fa-landmark"
-                    tip = "연기금까지 매도 중. 장기 하락 주의"
-                elif total_smart < 0 and analysis['sell_days'] >= 5:
-                    signal_text = "강한 매도"
-                    signal_color = "#dc3545"
-                    signal_icon = "fa-arrow-down"
-                    tip = "스마트머니 대량 이탈 중. 하락 주의"
-                elif total_smart < 0 and analysis['sell_days'] >= 4:
-                    signal_text = "물량 정리"
-                    signal_color = "#dc3545"
-                    signal_icon = "fa-arrow-down"
-                    tip = "외국인+기관 순매도 우위. 추가 하락 가능성"
-                elif trend_turning and recent_3 > 0:
-                    signal_text = "매수 전환"
-                    signal_color = "#17a2b8"
-                    signal_icon = "fa-rotate"
-                    tip = "최근 3일 매수로 전환! 추세 변화 가능성"
-                elif trend_turning and recent_3 < 0:
-                    signal_text = "매도 전환"
-                    signal_color = "#fd7e14"
-                    signal_icon = "fa-rotate"
-                    tip = "최근 3일 매도로 전환. 차익실현 또는 하락 전조"
-                elif total_foreign > 0 and total_inst < 0:
-                    signal_text = "외국인 주도"
-                    signal_color = "#17a2b8"
-                    signal_icon = "fa-globe"
-                    tip = "외국인 매수 vs 기관 매도. 외국인 방향 주시"
-                elif total_foreign < 0 and total_inst > 0:
-                    signal_text = "기관 주도"
-                    signal_color = "#fd7e14"
-                    signal_icon = "fa-building"
-                    tip = "기관 매수 vs 외국인 매도. 기관 방향 주시"
-                else:
-                    signal_text = "관망"
-                    signal_color = "#6c757d"
-                    signal_icon = "fa-minus"
-                    tip = "뚜렷한 방향 없음. 추가 관찰 필요"
-
-                # 메인 신호 박스
-                st.markdown(f'''
-                <div style="background: linear-gradient(135deg, {signal_color}22, {signal_color}11);
-                            border-left: 4px solid {signal_color};
-                            padding: 15px; border-radius: 8px; margin: 10px 0;">
-                    <h4 style="margin:0; color:{signal_color};">
-                        <i class="fa-solid {signal_icon}"></i> {signal_text}
-                    </h4>
-                    <p style="margin:8px 0 0 0; color:#aaa; font-size:14px;">
-                        {tip}
-                    </p>
-                    <p style="margin:8px 0 0 0; color:#888; font-size:12px;">
-                        외국인+기관: {total_smart/10000:+,.1f}만주 | 순매수 {analysis['buy_days']}일 / 순매도 {analysis['sell_days']}일
-                    </p>
-                </div>
-                ''', unsafe_allow_html=True)
+    col1, col2 = st.columns(2)
+    # 주식수 기준이므로 억 단위로 변환하지 않음
+    total_foreign = analysis['total_foreign']
+    total_inst = analysis['total_inst']
 
-                # 투자자별 방향 요약 (상세 데이터 있을 때만)
-                if detailed_data:
-                    def get_direction_badge(is_buy, amount):
-                        if amount == 0:
-                            return '<span style="color:#6c757d;">중립</span>'
-                        color = "#28a745" if is_buy else "#dc3545"
-                        icon = "▲" if is_buy else "▼"
-                        return f'<span style="color:{color};">{icon}</span>'
+    # 만주 단위로 표시
+    if abs(total_foreign) >= 10000:
+        col1.metric("외국인 (7일)", f"{total_foreign/10000:+,.1f}만주")
+    else:
+        col1.metric("외국인 (7일)", f"{total_foreign:+,}주")
 
-                    st.markdown(f'''
-                    <div style="background:#1a1a2e; padding:12px; border-radius:8px; margin:10px 0;">
-                        <div style="font-size:13px; color:#888; margin-bottom:8px;">투자자별 방향 (7일 합계)</div>
-                        <div style="display:flex; justify-content:space-around; flex-wrap:wrap; gap:8px;">
-                            <div style="text-align:center;">
-                                <div style="color:#aaa; font-size:11px;">외국인</div>
-                                <div>{get_direction_badge(foreign_buy, total_foreign)}</div>
-                            </div>
-                            <div style="text-align:center;">
-                                <div style="color:#aaa; font-size:11px;">기관</div>
-                                <div>{get_direction_badge(inst_buy, total_inst)}</div>
-                            </div>
-                            <div style="text-align:center;">
-                                <div style="color:#aaa; font-size:11px;">연기금</div>
-                                <div>{get_direction_badge(pension_buy, total_pension)}</div>
-                            </div>
-                            <div style="text-align:center;">
-                                <div style="color:#aaa; font-size:11px;">사모</div>
-                                <div>{get_direction_badge(private_buy, total_private)}</div>
-                            </div>
-                            <div style="text-align:center;">
-                                <div style="color:#aaa; font-size:11px;">투신</div>
-                                <div>{get_direction_badge(trust_buy, total_invest_trust)}</div>
-                            </div>
-                        </div>
-                        <div style="text-align:center; margin-top:10px; font-size:12px; color:#888;">
-                            매수 {buy_count}곳 / 매도 {sell_count}곳
-                        </div>
-                    </div>
-                    ''', unsafe_allow_html=True)
+    if abs(total_inst) >= 10000:
+        col2.metric("기관 (7일)", f"{total_inst/10000:+,.1f}만주")
+    else:
+        col2.metric("기관 (7일)", f"{total_inst:+,}주")
 
-                # 외국인 vs 기관 비교
-                st.markdown("---")
-                col1, col2 = st.columns(2)
+    # 해석 요약 (KRX 상세 수급 도착 후 채움)
+    st.markdown("---")
+    signal_slot = st.empty()
+    signal_slot.info("종합 수급 해석: KRX 상세 수급 불러오는 중...")
 
-                with col1:
-                    if total_foreign > 0:
-                        st.markdown(f'''
-                        <div style="background:#1a472a; padding:10px; border-radius:8px; text-align:center;">
-                            <div style="color:#28a745; font-size:12px;">외국인</div>
-                            <div style="color:#28a745; font-size:18px; font-weight:bold;">매수 우위</div>
-                            <div style="color:#888; font-size:11px;">{total_foreign/10000:+,.1f}만주</div>
-                        </div>
-                        ''', unsafe_allow_html=True)
-                    else:
-                        st.markdown(f'''
-                        <div style="background:#4a1a1a; padding:10px; border-radius:8px; text-align:center;">
-                            <div style="color:#dc3545; font-size:12px;">외국인</div>
-                            <div style="color:#dc3545; font-size:18px; font-weight:bold;">매도 우위</div>
-                            <div style="color:#888; font-size:11px;">{total_foreign/10000:+,.1f}만주</div>
-                        </div>
-                        ''', unsafe_allow_html=True)
+    # 외국인 vs 기관 비교
+    st.markdown("---")
+    col1, col2 = st.columns(2)
 
-                with col2:
-                    if total_inst > 0:
-                        st.markdown(f'''
-                        <div style="background:#1a472a; padding:10px; border-radius:8px; text-align:center;">
-                            <div style="color:#28a745; font-size:12px;">기관</div>
-                            <div style="color:#28a745; font-size:18px; font-weight:bold;">매수 우위</div>
-                            <div style="color:#888; font-size:11px;">{total_inst/10000:+,.1f}만주</div>
-                        </div>
-                        ''', unsafe_allow_html=True)
-                    else:
-                        st.markdown(f'''
-                        <div style="background:#4a1a1a; padding:10px; border-radius:8px; text-align:center;">
-                            <div style="color:#dc3545; font-size:12px;">기관</div>
-                            <div style="color:#dc3545; font-size:18px; font-weight:bold;">매도 우위</div>
-                            <div style="color:#888; font-size:11px;">{total_inst/10000:+,.1f}만주</div>
-                        </div>
-                        ''', unsafe_allow_html=True)
+    with col1:
+        if total_foreign > 0:
+            st.markdown(f'''
+            <div style="background:#1a472a; padding:10px; border-radius:8px; text-align:center;">
+                <div style="color:#28a745; font-size:12px;">외국인</div>
+                <div style="color:#28a745; font-size:18px; font-weight:bold;">매수 우위</div>
+                <div style="color:#888; font-size:11px;">{total_foreign/10000:+,.1f}만주</div>
+            </div>
+            ''', unsafe_allow_html=True)
+        else:
+            st.markdown(f'''
+            <div style="background:#4a1a1a; padding:10px; border-radius:8px; text-align:center;">
+                <div style="color:#dc3545; font-size:12px;">외국인</div>
+                <div style="color:#dc3545; font-size:18px; font-weight:bold;">매도 우위</div>
+                <div style="color:#888; font-size:11px;">{total_foreign/10000:+,.1f}만주</div>
+            </div>
+            ''', unsafe_allow_html=True)
 
-                st.markdown("---")
+    with col2:
+        if total_inst > 0:
+            st.markdown(f'''
+            <div style="background:#1a472a; padding:10px; border-radius:8px; text-align:center;">
+                <div style="color:#28a745; font-size:12px;">기관</div>
+                <div style="color:#28a745; font-size:18px; font-weight:bold;">매수 우위</div>
+                <div style="color:#888; font-size:11px;">{total_inst/10000:+,.1f}만주</div>
+            </div>
+            ''', unsafe_allow_html=True)
+        else:
+            st.markdown(f'''
+            <div style="background:#4a1a1a; padding:10px; border-radius:8px; text-align:center;">
+                <div style="color:#dc3545; font-size:12px;">기관</div>
+                <div style="color:#dc3545; font-size:18px; font-weight:bold;">매도 우위</div>
+                <div style="color:#888; font-size:11px;">{total_inst/10000:+,.1f}만주</div>
+            </div>
+            ''', unsafe_allow_html=True)
 
-                st.markdown('<h4><i class="fa-solid fa-calendar-days" style="color: #fd7e14;"></i> 일별 현황</h4>', unsafe_allow_html=True)
+    st.markdown("---")
 
-                table_data = []
-                for d in analysis['daily_data']:
-                    foreign = d['foreign']
-                    inst = d['inst']
-                    total = d['smart_net']
+    st.markdown('<h4><i class="fa-solid fa-calendar-days" style="color: #fd7e14;"></i> 일별 현황</h4>', unsafe_allow_html=True)
 
-                    # 만주 단위 또는 주 단위
-                    if abs(foreign) >= 10000:
-                        f_str = f"{foreign/10000:+,.1f}만"
-                    else:
-                        f_str = f"{foreign:+,}"
+    table_data = []
+    for d in analysis['daily_data']:
+        foreign = d['foreign']
+        inst = d['inst']
+        total = d['smart_net']
 
-                    if abs(inst) >= 10000:
-                        i_str = f"{inst/10000:+,.1f}만"
-                    else:
-                        i_str = f"{inst:+,}"
+        # 만주 단위 또는 주 단위
+        if abs(foreign) >= 10000:
+            f_str = f"{foreign/10000:+,.1f}만"
+        else:
+            f_str = f"{foreign:+,}"
 
-                    if abs(total) >= 10000:
-                        t_str = f"{total/10000:+,.1f}만"
-                    else:
-                        t_str = f"{total:+,}"
+        if abs(inst) >= 10000:
+            i_str = f"{inst/10000:+,.1f}만"
+        else:
+            i_str = f"{inst:+,}"
 
-                    table_data.append({
-                        '날짜': d['date'],
-                        '외국인': f_str,
-                        '기관': i_str,
-                        '합계': t_str
-                    })
+        if abs(total) >= 10000:
+            t_str = f"{total/10000:+,.1f}만"
+        else:
+            t_str = f"{total:+,}"
 
-                st.dataframe(table_data, width="stretch", hide_index=True)
+        table_data.append({
+            '날짜': d['date'].strftime('%m/%d'),
+            '외국인': f_str,
+            '기관': i_str,
+            '합계': t_str
+        })
 
-                # 연기금/사모 상세 데이터 (KRX)
-                st.markdown("---")
-                st.markdown('<h4><i class="fa-solid fa-building-columns" style="color: #9b59b6;"></i> 연기금 / 사모 상세</h4>', unsafe_allow_html=True)
+    st.dataframe(table_data, width="stretch", hide_index=True)
 
-                if detailed_data:
-                    def fmt_num(n):
-                        if abs(n) >= 10000:
-                            return f"{n/10000:+,.1f}만주"
-                        return f"{n:+,}주"
+    # 연기금/사모 상세 데이터 (KRX) / 기간별 누적 수급 (로컬 저장소) - 가장 느린 구간
+    st.markdown("---")
+    detail_slot = st.empty()
+    detail_slot.info("연기금 / 사모 상세 불러오는 중...")
+    st.markdown("---")
+    windows_slot = st.empty()
+
+    with st.spinner("KRX 상세 수급 조회 중..."):
+        detailed_data = get_detailed_supply_pykrx(supply_code, days=7)
+    totals = detail_totals(detailed_data)
+    with signal_slot.container():
+        render_supply_signal(analysis, detailed_data, totals)
+    with detail_slot.container():
+        render_supply_detail(detailed_data, totals)
+    with windows_slot.container():
+        render_supply_windows(supply_code)
+
+
+@st.fragment
+def render_supply_tab():
+    """수급 추적기 (조회 버튼 / 종목 선택 시 이 부분만 다시 실행)"""
+    with metrics.span('render.supply'):
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            supply_input = st.text_input("종목코드 또는 종목명", placeholder="005930 또는 삼성전자", label_visibility="collapsed", key="supply_input")
+        with col2:
+            supply_btn = st.button("조회", width="stretch", key="supply_btn")
+
+        supply_code = None
+        if supply_input and not supply_input.isdigit():
+            results = lookup_stock_code(supply_input)
+            if results:
+                options = [f"{r['name']} ({r['code']})" for r in results]
+                selected = st.selectbox("검색 결과", options, key="supply_select")
+                if selected:
+                    supply_code = selected.split('(')[1].replace(')', '')
+        elif supply_input and len(supply_input) == 6:
+            supply_code = supply_input
+
+        if supply_code and supply_btn:
+            st.session_state['supply_active'] = supply_code
+            record_access(supply_code)
+            claim_prefetch('supply', supply_code)
+            prefetch_tab('orderblock', supply_code)
+
+        # 마지막으로 조회한 종목은 다른 위젯 조작으로 다시 실행돼도 캐시에서 바로 다시 그림
+        if st.session_state.get('supply_active'):
+            render_supply_result(st.session_state['supply_active'])
+
+
+@cached_data(ttl=3600, shared=False)
+def load_screened_signals(days: int, today: str, version: int) -> list:
+    """전종목 매집 스크리너 결과 (날짜 / 최신 스냅샷 시각이 바뀔 때만 다시 계산)"""
+    return screen_signals(days=days)
 
-                    col1, col2, col3 = st.columns(3)
-                    col1.metric("연기금 (7일)", fmt_num(total_pension))
-                    col2.metric("사모펀드 (7일)", fmt_num(total_private))
-                    col3.metric("투신 (7일)", fmt_num(total_invest_trust))
 
-                    # 상세 테이블
-                    detail_table = []
-                    for d in detailed_data:
-                        def fmt_short(n):
-                            if abs(n) >= 10000:
-                                return f"{n/10000:+,.1f}만"
-                            return f"{n:+,}"
-
-                        detail_table.append({
-                            '날짜': d['date'].strftime('%m/%d'),
-                            '연기금': fmt_short(d['pension']),
-                            '사모': fmt_short(d['private']),
-                            '투신': fmt_short(d['invest_trust']),
-                            '금융투자': fmt_short(d['financial']),
-                        })
-
-                    st.dataframe(detail_table, width="stretch", hide_index=True)
-
-                    # 투자자별 특성 해석
-                    st.markdown("##### 투자자별 해석")
-
-                    interpretations = []
-
-                    # 연기금 해석
-                    if total_pension > 0:
-                        interpretations.append(f"✅ **연기금** 순매수 {fmt_num(total_pension)} - 국민연금 등 장기 투자자 매집 (장기 상승 기대)")
-                    elif total_pension < 0:
-                        interpretations.append(f"⚠️ **연기금** 순매도 {fmt_num(total_pension)} - 장기 투자자 비중 축소")
-
-                    # 사모펀드 해석
-                    if total_private > 0:
-                        interpretations.append(f"✅ **사모펀드** 순매수 {fmt_num(total_private)} - 단기/중기 수익 기대하는 자금 유입")
-                    elif total_private < 0:
-                        interpretations.append(f"⚠️ **사모펀드** 순매도 {fmt_num(total_private)} - 차익실현 또는 리스크 회피")
-
-                    # 투신 해석
-                    if total_invest_trust > 0:
-                        interpretations.append(f"✅ **투신(펀드)** 순매수 {fmt_num(total_invest_trust)} - 펀드 자금 유입 중")
-                    elif total_invest_trust < 0:
-                        interpretations.append(f"⚠️ **투신(펀드)** 순매도 {fmt_num(total_invest_trust)} - 펀드 환매 또는 비중 축소")
-
-                    # 금융투자 해석
-                    if total_financial > 0:
-                        interpretations.append(f"✅ **금융투자** 순매수 {fmt_num(total_financial)} - 증권사 자기매매 매수")
-                    elif total_financial < 0:
-                        interpretations.append(f"⚠️ **금융투자** 순매도 {fmt_num(total_financial)} - 증권사 물량 정리")
-
-                    if interpretations:
-                        for interp in interpretations:
-                            st.markdown(interp)
-                    else:
-                        st.info("특이 동향 없음")
+with tab2:
+    st.markdown('<h3><i class="fa-solid fa-coins" style="color: #28a745;"></i> 수급 추적기</h3>', unsafe_allow_html=True)
+    st.caption("외국인/기관 매매 현황 조회")
+    render_supply_tab()
 
-                else:
-                    st.info("연기금/사모 상세 데이터 없음 (해당 종목 미지원)")
+    # 전종목 매집 스크리너 (market_flows.py로 수집한 로컬 스냅샷 기준)
+    st.markdown("---")
+    with st.expander("오늘의 매집 종목 (전종목 스크리너)"):
+        screened = load_screened_signals(7, datetime.now().strftime('%Y%m%d'), snapshot_version())
+        if screened:
+            master = load_symbol_master()
+            st.dataframe([{
+                '종목': (master.get(r['code']) or {}).get('name', r['code']),
+                '코드': r['code'],
+                '신호': r['signal'],
+                '외국인+기관': f"{(r['total_foreign'] + r['total_inst'])/10000:+,.1f}만주",
+                '연기금': f"{r['total_pension']/10000:+,.1f}만주",
+                '순매수일': f"{r['buy_days']}일",
+            } for r in screened[:100]], width="stretch", hide_index=True)
+        else:
+            st.info("수집된 전종목 수급 데이터 없음 (python market_flows.py --days 7)")
 
     st.markdown("---")
     st.caption("네이버 금융 + KRX 데이터 기반 / 참고용")
@@ -842,64 +903,37 @@ with tab2:
 # ============================================================
 
 # Google Sheets 자동 로드 함수
-@st.cache_data(ttl=300)  # 5분 캐시
+@cached_data(ttl=300)  # 5분 캐시
 def load_theme_data_from_sheets():
     """Google Sheets에서 주도테마 데이터 자동 로드"""
     try:
         # 시트 ID
         sheet_id = "1BG_oNWSJtIgN3cYeNb5AZPsIgP__Ty-4eDgvjJwKg04"
-        csv_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid=0"
+        csv_url = f"{SHEETS_URL}/spreadsheets/d/{sheet_id}/export?format=csv&gid=0"
 
         # requests로 직접 다운로드 (리다이렉트 따라감)
-        import io
-        response = requests.get(csv_url, timeout=15)
+        response = http_client.get(csv_url, timeout=15)
         response.raise_for_status()
 
         # UTF-8로 디코딩
         response.encoding = 'utf-8'
         content = response.content.decode('utf-8')
 
-        # CSV 파싱
-        df = pd.read_csv(io.StringIO(content))
-
-        if df.empty:
-            return None, "시트에 데이터가 없습니다"
-
-        # 컬럼명 정리
-        df.columns = df.columns.str.strip()
-
-        # 필수 컬럼 확인 (영어 컬럼명)
-        required_cols = ['theme', 'days']
-        if not all(col in df.columns for col in required_cols):
-            return None, f"필수 컬럼 없음. 현재 컬럼: {list(df.columns)}"
-
-        # 컬럼명 한글로 변환 (표시용)
-        df = df.rename(columns={
-            'theme': '테마',
-            'days': '출현일수',
-            'max_streak': '연속일(최대)',
-            'current_streak': '현재연속',
-            'stocks': '총 종목수',
-            'volume': '거래대금(억)',
-            'leading': '주도일수',
-            'avg_change': '평균상승률'
-        })
-
-        return df, None
+        return parse_theme_csv(content)
     except Exception as e:
         return None, str(e)
 
 
-@st.cache_data(ttl=300)  # 5분 캐시
+@cached_data(ttl=300)  # 5분 캐시
 def load_cycle_data_from_sheets():
     """Google Sheets에서 순환 예측 데이터 로드 (cycle 시트)"""
     try:
         sheet_id = "1BG_oNWSJtIgN3cYeNb5AZPsIgP__Ty-4eDgvjJwKg04"
         # gid를 cycle 시트로 변경 (두 번째 시트)
-        csv_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv&sheet=cycle"
+        csv_url = f"{SHEETS_URL}/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv&sheet=cycle"
 
         import io
-        response = requests.get(csv_url, timeout=15)
+        response = http_client.get(csv_url, timeout=15)
         response.raise_for_status()
 
         content = response.content.decode('utf-8')
@@ -914,7 +948,7 @@ def load_cycle_data_from_sheets():
         return None, str(e)
 
 
-with tab3:
+with tab3, metrics.span('render.theme'):
     st.markdown('<h3><i class="fa-solid fa-fire" style="color: #ff6b6b;"></i> 주도 테마 분석</h3>', unsafe_allow_html=True)
     st.caption("테마별 출현 빈도, 모멘텀, 다음 주도 테마 예측")
 
@@ -950,32 +984,11 @@ with tab3:
     if df_theme is not None and len(df_theme) > 0:
         try:
             # 필수 컬럼 확인 (일부만 있어도 동작)
-            has_all_cols = all(col in df_theme.columns for col in ['테마', '출현일수', '연속일(최대)', '현재연속', '거래대금(억)', '주도일수', '평균상승률'])
+            has_all_cols = all(col in df_theme.columns for col in THEME_COLUMNS)
 
             if has_all_cols:
-                # 데이터 타입 변환
-                df_theme['출현일수'] = pd.to_numeric(df_theme['출현일수'], errors='coerce').fillna(0).astype(int)
-                df_theme['현재연속'] = pd.to_numeric(df_theme['현재연속'], errors='coerce').fillna(0).astype(int)
-                df_theme['거래대금(억)'] = pd.to_numeric(df_theme['거래대금(억)'], errors='coerce').fillna(0)
-                df_theme['주도일수'] = pd.to_numeric(df_theme['주도일수'], errors='coerce').fillna(0).astype(int)
-                df_theme['평균상승률'] = pd.to_numeric(df_theme['평균상승률'], errors='coerce').fillna(0)
-
-                # 주도력 계산 (주도일수 / 출현일수)
-                df_theme['주도력'] = df_theme.apply(
-                    lambda x: (x['주도일수'] / x['출현일수'] * 100) if x['출현일수'] > 0 else 0, axis=1
-                )
-
-                # 종합 점수 계산 (다음 주도 테마 예측용)
-                # 가중치: 현재연속(40%) + 거래대금정규화(30%) + 주도력(20%) + 평균상승률(10%)
-                max_volume = df_theme['거래대금(억)'].max() if df_theme['거래대금(억)'].max() > 0 else 1
-                max_consecutive = df_theme['현재연속'].max() if df_theme['현재연속'].max() > 0 else 1
-
-                df_theme['종합점수'] = (
-                    (df_theme['현재연속'] / max_consecutive * 40) +
-                    (df_theme['거래대금(억)'] / max_volume * 30) +
-                    (df_theme['주도력'] / 100 * 20) +
-                    (df_theme['평균상승률'] / 100 * 10)
-                )
+                # 데이터 타입 변환 + 주도력 / 종합점수 계산
+                df_theme = score_themes(df_theme)
 
                 st.markdown("---")
 
@@ -1301,3 +1314,56 @@ with tab3:
 
     st.markdown("---")
     st.caption("주도주 테마 데이터 기반 분석 / 참고용")
+
+
+# ============================================================
+# 관리자: 성능 지표 (?admin=1)
+# ============================================================
+
+if st.query_params.get('admin') == '1':
+    with st.sidebar:
+        st.markdown('<h4><i class="fa-solid fa-gauge-high"></i> 성능 지표</h4>', unsafe_allow_html=True)
+        st.caption("프로세스 시작 후 누적 (모든 세션 합산)")
+
+        st.markdown("**단계별 소요시간**")
+        stage_rows = metrics.stage_table()
+        if stage_rows:
+            st.dataframe(pd.DataFrame(stage_rows), hide_index=True, width="stretch")
+
+        st.markdown("**캐시 적중률**")
+        cache_rows = metrics.cache_table()
+        if cache_rows:
+            st.dataframe(pd.DataFrame(cache_rows), hide_index=True, width="stretch")
+
+        st.markdown("**일봉 캐시**")
+        st.dataframe(pd.DataFrame([load_candle_cache().stats()]), hide_index=True, width="stretch")
+
+        if get_shared_cache() is not None:
+            st.markdown("**공유 캐시**")
+            st.dataframe(pd.DataFrame([get_shared_cache().stats()]), hide_index=True, width="stretch")
+
+        if start_warmup_scheduler() is not None:
+            st.markdown("**캐시 예열**")
+            st.dataframe(pd.DataFrame([start_warmup_scheduler().stats]), hide_index=True, width="stretch")
+            st.dataframe(pd.DataFrame(load_access_counter().table(WARMUP_TOP)), hide_index=True, width="stretch")
+
+        if load_prefetcher() is not None:
+            st.markdown("**탭 간 선수집**")
+            st.caption("사용률 = 선수집 후 같은 세션이 다른 탭에서 조회한 비율")
+            st.dataframe(pd.DataFrame([load_prefetcher().stats()]), hide_index=True, width="stretch")
+
+        st.markdown("**외부 호스트 회로 상태**")
+        breaker_rows = http_client.breaker_states()
+        if breaker_rows:
+            st.dataframe(pd.DataFrame(breaker_rows), hide_index=True, width="stretch")
+
+        with st.expander("Prometheus 텍스트"):
+            prometheus_text = metrics.to_prometheus()
+            st.code(prometheus_text, language="text")
+            st.download_button("metrics.prom 다운로드", prometheus_text, file_name="metrics.prom", mime="text/plain")
+
+        # 지표 초기화는 누구나 여는 ?admin=1이 아니라 서버에 설정한 토큰(OB_ADMIN_TOKEN)으로만
+        can_reset = bool(ADMIN_TOKEN) and hmac.compare_digest(st.query_params.get('token', '').encode('utf-8'),
+                                                               ADMIN_TOKEN.encode('utf-8'))
+        if can_reset and st.button("지표 초기화", key="metrics_reset"):
+            metrics.registry.reset()
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+관심종목 일괄 분석 CLI - 캔들 수집 → 오더블록 → 레벨 (+ 선택: 수급 분석)
+
+사용법:
+    python batch_cli.py watchlist.txt --concurrency 8 --format json -o result.json
+    python batch_cli.py watchlist.txt --supply --format csv
+
+관심종목 파일: 한 줄에 종목코드 1개 (쉼표 뒤 메모, # 주석 허용)
+종료 코드: 0 전체 성공 / 1 일부 실패 / 2 전체 실패 또는 입력 오류
+"""
+
+import argparse
+import csv
+import json
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import numpy as np
+
+import fetchers
+import http_client
+from config import KRX_URL, NAVER_CHART_URL, NAVER_FINANCE_URL
+from orderblock import calculate_levels, detect_order_blocks
+from supply_analysis import summarize_supply
+
+CODE_RE = re.compile(r'^\d{6}$')
+
+EXIT_OK = 0
+EXIT_PARTIAL = 1
+EXIT_FAILED = 2
+
+
+def read_watchlist(path: str) -> list:
+    """관심종목 파일 → 중복 제거된 종목코드 목록 (잘못된 줄은 ValueError)"""
+    codes = []
+    with open(path, encoding='utf-8-sig') as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            code = line.split(',', 1)[0].strip()
+            if not CODE_RE.match(code):
+                raise ValueError(f'{path}:{lineno}: 잘못된 종목코드 {code!r}')
+            codes.append(code)
+    return list(dict.fromkeys(codes))
+
+
+def analyze_ticker(code: str, days: int = 60, with_supply: bool = False, exclude_mitigated: bool = False) -> dict:
+    """종목 1개 분석 결과 + 단계별 소요시간(ms)"""
+    result = {'code': code, 'ok': False, 'error': None, 'timing': {}}
+    timing = result['timing']
+    started = time.perf_counter()
+
+    try:
+        t = time.perf_counter()
+        df = fetchers.fetch_daily_candle(code, days)
+        quote = fetchers.fetch_stock_info(code)
+        timing['fetch_ms'] = round((time.perf_counter() - t) * 1000, 1)
+
+        if df.empty:
+            result['error'] = '일봉 없음'
+            return result
+        if not quote['price']:
+            result['error'] = '현재가 없음'
+            return result
+
+        t = time.perf_counter()
+        order_blocks = detect_order_blocks(df)
+        levels = calculate_levels(quote['price'], order_blocks, exclude_mitigated)
+        timing['analyze_ms'] = round((time.perf_counter() - t) * 1000, 1)
+
+        result.update({
+            'name': quote['name'],
+            'price': quote['price'],
+            'as_of': df.index[-1].strftime('%Y-%m-%d'),
+            'order_blocks': order_blocks,
+            'levels': levels,
+        })
+
+        if with_supply:
+            t = time.perf_counter()
+            try:
+                supply_data = fetchers.fetch_supply_data(code, days=7)
+                detailed_data = fetchers.fetch_detailed_supply(code, days=7)
+            except Exception as e:
+                # 레벨은 그대로 두고 수급 실패만 실패로 표시
+                result['supply'] = None
+                result['error'] = f'수급 {type(e).__name__}: {e}'
+                return result
+            finally:
+                timing['supply_ms'] = round((time.perf_counter() - t) * 1000, 1)
+            if not supply_data:
+                result['supply'] = None
+                result['error'] = '수급 없음'
+                return result
+            result['supply'] = summarize_supply(supply_data, detailed_data)
+
+        result['ok'] = True
+        return result
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+        return result
+    finally:
+        timing['total_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def run_batch(codes: list, concurrency: int = 8, days: int = 60, with_supply: bool = False,
+              progress=None, exclude_mitigated: bool = False) -> list:
+    """종목 병렬 분석 (입력 순서대로 반환)"""
+    results = {}
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='batch') as pool:
+        futures = {pool.submit(analyze_ticker, code, days, with_supply, exclude_mitigated): code for code in codes}
+        for done, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            if progress:
+                progress(done, len(codes), results[futures[future]])
+    return [results[code] for code in codes]
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f'직렬화 불가: {type(value)}')
+
+
+def _fmt(value):
+    return '' if value is None else value
+
+
+def write_csv(results: list, out):
+    """종목당 1행 요약 CSV"""
+    fields = ['code', 'name', 'ok', 'error', 'price', 'as_of', 'order_blocks', 'stop_loss',
+              'support_bottom', 'support_top', 'resistance_bottom', 'resistance_top',
+              'entry_zones', 'take_profit_zones', 'supply_signal',
+              'fetch_ms', 'analyze_ms', 'supply_ms', 'total_ms']
+    writer = csv.DictWriter(out, fieldnames=fields)
+    writer.writeheader()
+    for r in results:
+        levels = r.get('levels') or {}
+        support = levels.get('nearest_support') or {}
+        resistance = levels.get('nearest_resistance') or {}
+        stop_loss = levels.get('stop_loss')
+        writer.writerow({
+            'code': r['code'],
+            'name': _fmt(r.get('name')),
+            'ok': int(r['ok']),
+            'error': _fmt(r['error']),
+            'price': _fmt(r.get('price')),
+            'as_of': _fmt(r.get('as_of')),
+            'order_blocks': len(r.get('order_blocks') or []),
+            'stop_loss': '' if stop_loss is None else round(float(stop_loss)),
+            'support_bottom': _fmt(support.get('bottom')),
+            'support_top': _fmt(support.get('top')),
+            'resistance_bottom': _fmt(resistance.get('bottom')),
+            'resistance_top': _fmt(resistance.get('top')),
+            'entry_zones': len(levels.get('entry_zones') or []),
+            'take_profit_zones': len(levels.get('take_profit_zones') or []),
+            'supply_signal': (r.get('supply') or {}).get('signal', ''),
+            'fetch_ms': _fmt(r['timing'].get('fetch_ms')),
+            'analyze_ms': _fmt(r['timing'].get('analyze_ms')),
+            'supply_ms': _fmt(r['timing'].get('supply_ms')),
+            'total_ms': _fmt(r['timing'].get('total_ms')),
+        })
+
+
+def write_json(results: list, summary: dict, out):
+    json.dump({'summary': summary, 'results': results}, out, ensure_ascii=False, indent=2, default=_json_default)
+    out.write('\n')
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='관심종목 오더블록 / 레벨 일괄 분석')
+    parser.add_argument('watchlist', help='관심종목 파일 (한 줄에 종목코드 1개)')
+    parser.add_argument('--concurrency', type=int, default=8, help='동시 처리 종목 수 (기본 8)')
+    parser.add_argument('--days', type=int, default=60, help='캔들 조회 일수 (기본 60)')
+    parser.add_argument('--supply', action='store_true', help='수급 분석 포함')
+    parser.add_argument('--exclude-mitigated', action='store_true', help='이미 가격이 다녀간 오더블록은 레벨 계산에서 제외')
+    parser.add_argument('--format', choices=['json', 'csv'], default='json')
+    parser.add_argument('-o', '--output', help='출력 파일 (기본 표준출력)')
+    parser.add_argument('--rate', type=float, help='호스트별 초당 요청 수 제한')
+    args = parser.parse_args(argv)
+
+    try:
+        codes = read_watchlist(args.watchlist)
+    except (OSError, ValueError) as e:
+        print(f'관심종목 파일 오류: {e}', file=sys.stderr)
+        return EXIT_FAILED
+    if not codes:
+        print('관심종목이 비어 있음', file=sys.stderr)
+        return EXIT_FAILED
+
+    if args.rate:
+        for base_url in (NAVER_FINANCE_URL, NAVER_CHART_URL, KRX_URL):
+            http_client.set_rate_limit(urlparse(base_url).hostname, args.rate)
+
+    def progress(done, total, result):
+        status = 'ok' if result['ok'] else f"FAIL ({result['error']})"
+        print(f"[{done}/{total}] {result['code']} {status} {result['timing'].get('total_ms', 0):.0f}ms",
+              file=sys.stderr)
+
+    started = time.perf_counter()
+    results = run_batch(codes, max(1, args.concurrency), args.days, args.supply, progress,
+                        args.exclude_mitigated)
+    failed = [r['code'] for r in results if not r['ok']]
+    summary = {
+        'total': len(results),
+        'succeeded': len(results) - len(failed),
+        'failed': len(failed),
+        'failed_codes': failed,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
+
+    out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        if args.format == 'csv':
+            write_csv(results, out)
+        else:
+            write_json(results, summary, out)
+    finally:
+        if args.output:
+            out.close()
+
+    print(f"완료: 성공 {summary['succeeded']} / 실패 {summary['failed']} ({summary['elapsed_ms'] / 1000:.1f}초)",
+          file=sys.stderr)
+    if not failed:
+        return EXIT_OK
+    return EXIT_FAILED if len(failed) == len(results) else EXIT_PARTIAL
+
+
+if __name__ == '__main__':
+    sys.exit(main())
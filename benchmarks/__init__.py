@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""분석 / 파싱 핫패스 마이크로 벤치마크"""
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+분석 / 파싱 핫패스 마이크로 벤치마크 (네트워크 없이 합성 데이터만 사용)
+
+사용법:
+    python -m benchmarks.bench                          # 전체 실행, 결과 출력
+    python -m benchmarks.bench --save base.json         # 결과 저장
+    python -m benchmarks.bench --baseline base.json     # 기준 대비 20% 이상 느려지면 종료 코드 1
+    python -m benchmarks.bench --filter detect --quick  # 이름 필터 / 짧게 측정
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import timeit
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import fetchers
+from benchmarks import fixtures
+from orderblock import calculate_levels, detect_order_blocks
+from orderblock_chart import build_figure
+from supply_analysis import SIGNAL_INPUTS, analyze_supply, analyze_supply_arrays, classify_signals
+from theme_analysis import parse_theme_csv, score_themes
+
+
+def build_cases() -> dict:
+    """벤치마크 이름 → 인자 없는 호출 함수 (입력 데이터는 미리 생성)"""
+    cases = {}
+
+    for n in (60, 1000, 10000, 100000):
+        df = fixtures.make_candles(n, seed=n)
+        cases[f'detect_order_blocks[{n}]'] = lambda df=df: detect_order_blocks(df)
+        if n <= 10000:
+            cases[f'detect_order_blocks[{n},full]'] = lambda df=df, n=n: detect_order_blocks(df, lookback=n)
+
+    for n in (10, 100, 1000, 10000):
+        blocks = fixtures.make_order_blocks(n, seed=n)
+        cases[f'calculate_levels[{n}]'] = lambda blocks=blocks: calculate_levels(50000, blocks)
+    cases['calculate_levels[10000,unmitigated]'] = lambda blocks=blocks: calculate_levels(50000, blocks, True)
+
+    chart_df = fixtures.make_candles(2500, seed=2500)
+    chart_blocks = detect_order_blocks(chart_df, lookback=2500)
+    cases['build_figure[2500]'] = lambda: build_figure(chart_df, chart_blocks, 50000)
+
+    for n in (7, 120, 1000):
+        rows = fixtures.make_supply_rows(n, seed=n)
+        cases[f'analyze_supply[{n}]'] = lambda rows=rows: analyze_supply(rows)
+
+    rng = np.random.default_rng(0)
+    flows = {f: rng.integers(-100000, 100000, (120, 2500)) for f in ('foreign', 'inst', 'pension', 'private')}
+    cases['analyze_supply_arrays[120x2500]'] = lambda: analyze_supply_arrays(flows, windows=(20, 60, 120))
+
+    columns = {k: rng.integers(-10 ** 9, 10 ** 9, 2500) for k in SIGNAL_INPUTS}
+    columns.update({'buy_days': rng.integers(0, 8, 2500), 'sell_days': rng.integers(0, 8, 2500),
+                    'has_detail': rng.integers(0, 2, 2500).astype(bool)})
+    cases['classify_signals[2500]'] = lambda: classify_signals(columns)
+
+    theme_csv = fixtures.make_theme_csv(200)
+    theme_df = fixtures.make_theme_frame(200)
+    cases['parse_theme_csv[200]'] = lambda: parse_theme_csv(theme_csv)
+    cases['score_themes[200]'] = lambda: score_themes(theme_df.copy())
+
+    candles = fixtures.make_candles(10)
+    sise_html = fixtures.sise_day_html(candles)
+    chart_xml = fixtures.chart_xml(fixtures.make_candles(750))
+    frgn_html = fixtures.frgn_html(fixtures.make_supply_rows(20))
+    main_html = fixtures.item_main_html()
+    search_html = fixtures.search_list_html([(f'{i:06d}', f'종목{i}') for i in range(20)])
+    krx_output = fixtures.krx_investor_output(fixtures.make_detail_rows(250))
+    cases['parse_daily_candle_page'] = lambda: fetchers.parse_daily_candle_page(sise_html)
+    cases['parse_chart_data[750]'] = lambda: fetchers.parse_chart_data(chart_xml)
+    cases['parse_supply_page'] = lambda: fetchers.parse_supply_page(frgn_html)
+    cases['parse_stock_info'] = lambda: fetchers.parse_stock_info(main_html, '005930')
+    cases['parse_search_results'] = lambda: fetchers.parse_search_results(search_html)
+    cases['parse_krx_investor_rows[250]'] = lambda: fetchers.parse_krx_investor_rows(krx_output)
+
+    return cases
+
+
+def measure(func, repeat: int, min_time: float) -> dict:
+    """min_time 이상 걸리는 반복 횟수를 정한 뒤 repeat번 측정 (1회 호출당 초)"""
+    timer = timeit.Timer(func)
+    loops, total = timer.autorange()
+    if total < min_time:
+        loops = max(loops, int(loops * min_time / max(total, 1e-9)))
+    samples = [t / loops for t in timer.repeat(repeat=repeat, number=loops)]
+    return {'median': statistics.median(samples), 'min': min(samples), 'loops': loops, 'repeat': repeat}
+
+
+def _fmt_time(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:8.2f} {unit}'
+    return f'{seconds / 1e-9:8.2f} ns'
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """기준 대비 중앙값이 threshold 비율 이상 느려진 벤치마크 목록"""
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        ratio = r['median'] / base['median'] - 1
+        r['change'] = round(ratio, 4)
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='분석 / 파싱 핫패스 마이크로 벤치마크')
+    parser.add_argument('--filter', default='', help='이름에 이 문자열이 포함된 벤치마크만')
+    parser.add_argument('--quick', action='store_true', help='반복 횟수를 줄여 빠르게 측정')
+    parser.add_argument('--save', help='결과 JSON 저장 경로')
+    parser.add_argument('--baseline', help='비교할 기준 결과 JSON')
+    parser.add_argument('--threshold', type=float, default=0.2, help='회귀 판정 비율 (기본 0.2 = 20%%)')
+    args = parser.parse_args(argv)
+
+    repeat, min_time = (3, 0.05) if args.quick else (7, 0.2)
+    cases = {k: v for k, v in build_cases().items() if args.filter in k}
+
+    results = {}
+    for name, func in cases.items():
+        results[name] = measure(func, repeat, min_time)
+        print(f"{name:40s} {_fmt_time(results[name]['median'])}  (min {_fmt_time(results[name]['min']).strip()}, "
+              f"{results[name]['loops']} loops x {repeat})", file=sys.stderr)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for name in results:
+            if 'change' in results[name]:
+                mark = '  << 회귀' if name in regressions else ''
+                print(f"{name:40s} {results[name]['change'] * 100:+7.1f}%{mark}", file=sys.stderr)
+
+    if args.save:
+        meta = {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+        }
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'results': results}, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+
+    if regressions:
+        print(f'성능 회귀 {len(regressions)}건: {", ".join(regressions)}', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+벤치마크 / 오프라인 재생용 합성 데이터
+(네이버 금융 HTML은 실제 페이지와 같은 표 구조로 생성)
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from fetchers import KRX_INVESTOR_FIELDS
+
+
+def make_candles(n: int, seed: int = 0, end: datetime = datetime(2024, 6, 28)) -> pd.DataFrame:
+    """랜덤워크 일봉 n개 (get_daily_candle_naver와 같은 스키마)"""
+    rng = np.random.default_rng(seed)
+    close = np.maximum(100, 50000 + np.cumsum(rng.normal(0, 600, n))).astype(np.int64)
+    open_ = np.maximum(100, close + rng.normal(0, 500, n)).astype(np.int64)
+    high = np.maximum(open_, close) + rng.integers(0, 400, n)
+    low = np.maximum(50, np.minimum(open_, close) - rng.integers(0, 400, n))
+    index = pd.bdate_range(end=end, periods=n, name='date')
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close,
+                         'volume': rng.integers(10000, 5000000, n)}, index=index)
+
+
+def make_order_blocks(n: int, seed: int = 0, center: int = 50000) -> list:
+    """detect_order_blocks 결과 형식의 오더블록 n개"""
+    rng = np.random.default_rng(seed)
+    blocks = []
+    for i in range(n):
+        bottom = int(center * rng.uniform(0.7, 1.3))
+        bullish = bool(rng.integers(0, 2))
+        blocks.append({
+            'type': 'bullish' if bullish else 'bearish', 'type_kr': '상승' if bullish else '하락',
+            'date': (datetime(2024, 6, 28) - timedelta(days=i)).strftime('%Y-%m-%d'),
+            'top': bottom + int(rng.integers(100, 2000)), 'bottom': bottom,
+            'strength': float(rng.uniform(1.5, 6)),
+            # 난수 순서를 바꾸지 않도록 미티게이션은 3개 중 1개로 고정
+            'mitigated': i % 3 == 0, 'broken': False,
+            'mitigated_date': (datetime(2024, 6, 28) - timedelta(days=i // 2)).strftime('%Y-%m-%d') if i % 3 == 0 else None,
+            'broken_date': None,
+        })
+    blocks.sort(key=lambda x: x['strength'], reverse=True)
+    return blocks
+
+
+def make_supply_rows(n: int, seed: int = 0, end: datetime = datetime(2024, 6, 28)) -> list:
+    """get_supply_data_naver 결과 형식 (최신순)"""
+    rng = np.random.default_rng(seed)
+    start = end
+    return [{'date': start - timedelta(days=i), 'foreign': int(f), 'inst': int(s)}
+            for i, (f, s) in enumerate(zip(rng.integers(-500000, 500000, n), rng.integers(-500000, 500000, n)))]
+
+
+def make_detail_rows(n: int, seed: int = 0, end: datetime = datetime(2024, 6, 28)) -> list:
+    """get_detailed_supply_pykrx 결과 형식 (최신순)"""
+    rng = np.random.default_rng(seed)
+    start = end
+    rows = []
+    for i in range(n):
+        row = {'date': start - timedelta(days=i)}
+        for _, field in KRX_INVESTOR_FIELDS:
+            row[field] = int(rng.integers(-200000, 200000))
+        rows.append(row)
+    return rows
+
+
+def make_theme_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    """주도 테마 시트 형식 (표시용 한글 컬럼)"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        '테마': [f'테마{i}' for i in range(n)],
+        '출현일수': rng.integers(0, 20, n),
+        '연속일(최대)': rng.integers(0, 10, n),
+        '현재연속': rng.integers(0, 10, n),
+        '총 종목수': rng.integers(1, 50, n),
+        '거래대금(억)': rng.uniform(0, 100000, n).round(1),
+        '주도일수': rng.integers(0, 10, n),
+        '평균상승률': rng.uniform(-5, 20, n).round(1),
+    })
+
+
+def make_theme_csv(n: int, seed: int = 0) -> str:
+    """Google Sheets export CSV (영문 컬럼)"""
+    df = make_theme_frame(n, seed).rename(columns={
+        '테마': 'theme', '출현일수': 'days', '연속일(최대)': 'max_streak', '현재연속': 'current_streak',
+        '총 종목수': 'stocks', '거래대금(억)': 'volume', '주도일수': 'leading', '평균상승률': 'avg_change'
+    })
+    return df.to_csv(index=False)
+
+
+def _num(v: int) -> str:
+    return f'{v:,}'
+
+
+def _signed(v: int) -> str:
+    return f'+{v:,}' if v > 0 else f'{v:,}'
+
+
+def sise_day_html(df: pd.DataFrame) -> str:
+    """일별 시세 페이지 (sise_day.naver, 최신순 10행 기준)"""
+    rows = []
+    for date, r in df.sort_index(ascending=False).iterrows():
+        rows.append(
+            '<tr onmouseover="mouseOver(this)" onmouseout="mouseOut(this)">'
+            f'<td align="center"><span class="tah p10 gray03">{date:%Y.%m.%d}</span></td>'
+            f'<td class="num"><span class="tah p11">{_num(r.close)}</span></td>'
+            '<td class="num"><em class="bu_p bu_pup"><span class="blind">상승</span></em>'
+            '<span class="tah p11 red02">100</span></td>'
+            f'<td class="num"><span class="tah p11">{_num(r.open)}</span></td>'
+            f'<td class="num"><span class="tah p11">{_num(r.high)}</span></td>'
+            f'<td class="num"><span class="tah p11">{_num(r.low)}</span></td>'
+            f'<td class="num"><span class="tah p11">{_num(r.volume)}</span></td>'
+            '</tr>'
+        )
+    return (
+        '<html><head><meta charset="euc-kr"></head><body>'
+        '<table cellspacing="0" class="type2"><tr><th>날짜</th><th>종가</th><th>전일비</th>'
+        '<th>시가</th><th>고가</th><th>저가</th><th>거래량</th></tr>'
+        '<tr><td colspan="7" height="8"></td></tr>'
+        + ''.join(rows) +
+        '</table><table class="Nnavi"><tr><td class="on"><a href="#">1</a></td></tr></table></body></html>'
+    )
+
+
+def chart_xml(df: pd.DataFrame, code: str = '005930', name: str = '삼성전자') -> str:
+    """차트 데이터 응답 (fchart sise.nhn, 오래된순 item)"""
+    items = ''.join(f'<item data="{date:%Y%m%d}|{r.open}|{r.high}|{r.low}|{r.close}|{r.volume}" />\n'
+                    for date, r in df.sort_index().iterrows())
+    return (
+        '<?xml version="1.0" encoding="EUC-KR" ?>\n<protocol>\n'
+        f'<chartdata symbol="{code}" name="{name}" count="{len(df)}" timeframe="day" precision="0" '
+        f'origintime="19900103">\n{items}</chartdata>\n</protocol>\n'
+    )
+
+
+def frgn_html(rows: list, close: int = 50000) -> str:
+    """외국인/기관 매매 페이지 (frgn.naver, 두 번째 type2 표)"""
+    body = []
+    for r in rows:
+        body.append(
+            '<tr onmouseover="mouseOver(this)" onmouseout="mouseOut(this)">'
+            f'<td class="tc"><span class="tah p10 gray03">{r["date"]:%Y.%m.%d}</span></td>'
+            f'<td class="num"><span class="tah p11">{_num(close)}</span></td>'
+            '<td class="num"><span class="tah p11 red02">100</span></td>'
+            '<td class="num"><span class="tah p11 red01">+0.20%</span></td>'
+            '<td class="num"><span class="tah p11">1,234,567</span></td>'
+            f'<td class="num"><span class="tah p11 red01">{_signed(r["inst"])}</span></td>'
+            f'<td class="num"><span class="tah p11 blue01">{_signed(r["foreign"])}</span></td>'
+            '<td class="num"><span class="tah p11">3,000,000,000</span></td>'
+            '<td class="num"><span class="tah p11">52.10%</span></td>'
+            '</tr>'
+        )
+    return (
+        '<html><head><meta charset="euc-kr"></head><body>'
+        '<table class="type2"><tr><th>거래원</th></tr><tr><td>-</td></tr></table>'
+        '<table summary="외국인 기관 순매매 거래량" class="type2">'
+        '<tr><th>날짜</th><th>종가</th><th>전일비</th><th>등락률</th><th>거래량</th>'
+        '<th>기관 순매매량</th><th>외국인 순매매량</th><th>보유주수</th><th>보유율</th></tr>'
+        + ''.join(body) +
+        '</table></body></html>'
+    )
+
+
+def item_main_html(name: str = '삼성전자', price: int = 71000, change: float = 1.2) -> str:
+    """종목 메인 페이지 (item/main.naver) 시세 영역"""
+    cls = 'no_down' if change < 0 else 'no_up'
+    return (
+        '<html><head><meta charset="utf-8"></head><body>'
+        f'<div class="wrap_company"><h2><a href="#">{name}</a></h2></div>'
+        f'<div class="rate_info"><div class="today"><p class="no_today"><em class="{cls}">'
+        f'<span class="blind">{_num(price)}</span></em></p>'
+        f'<p class="no_exday"><em class="{cls}"><span class="blind">{abs(change):.2f}</span></em>'
+        f'<em class="{cls}"><span class="blind">{abs(change):.2f}</span>%</em></p></div></div>'
+        '</body></html>'
+    )
+
+
+def search_list_html(items: list) -> str:
+    """종목 검색 결과 (searchList.naver), items = [(code, name)]"""
+    links = ''.join(
+        f'<tr><td class="tit"><img src="#"><a href="/item/main.naver?code={code}" class="tltle">{name}</a></td>'
+        '<td class="num">71,000</td></tr>'
+        for code, name in items
+    )
+    return f'<html><body><div class="section_search"><table class="tbl_search"><tbody>{links}</tbody></table></div></body></html>'
+
+
+def krx_investor_output(rows: list) -> list:
+    """KRX 투자자별 거래실적 JSON output 행"""
+    out = []
+    for r in rows:
+        item = {'TRD_DD': r['date'].strftime('%Y/%m/%d')}
+        for col, field in KRX_INVESTOR_FIELDS:
+            item[col] = _signed(r[field])
+        out.append(item)
+    return out
+
+
+def make_cycle_csv(n: int, seed: int = 0) -> str:
+    """Google Sheets cycle 시트 CSV (순환 예측)"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'theme': [f'테마{i}' for i in range(n)],
+        'status': rng.choice(['RETURNING', 'ACTIVE', 'RESTING'], n),
+        'expected_in': rng.integers(0, 15, n),
+        'avg_cycle': rng.integers(5, 30, n),
+        'days_ago': rng.integers(0, 30, n),
+        'appearances': rng.integers(1, 20, n),
+        'top_stocks': [f'종목{i}, 종목{i + 1}' for i in range(n)],
+    }).to_csv(index=False)
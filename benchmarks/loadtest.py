@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+동시 사용자 부하 테스트 - 오프라인 대역 서버(replay_server) + AppTest 세션으로 앱 전체 경로 측정
+
+세션 1개 = 첫 화면(주도 테마 로드) → 오더블록 분석 → 수급 조회
+AppTest는 스레드 안전하지 않으므로 세션은 작업 프로세스(--concurrency개)에서 하나씩 실행
+작업 프로세스 1개 = Streamlit 서버 프로세스 1개 (캐시는 그 프로세스가 실행한 세션끼리 공유)
+요소 트리가 비거나 위젯을 찾지 못하면 앱 오류가 아닌 하네스 오류로 따로 집계
+
+사용법:
+    python -m benchmarks.loadtest --users 100 --concurrency 20 --codes 30 --latency 80 --jitter 40
+    python -m benchmarks.loadtest --users 20 --error-rate 0.05 --json loadtest.json
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import socket
+import sys
+import tempfile
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+STEPS = ['theme', 'orderblock', 'supply']
+
+_worker = {}  # 작업 프로세스 상태 (캐시 계측 / 시작 RSS)
+
+
+class HarnessError(Exception):
+    """AppTest 실행 자체가 잘못됨 (빈 요소 트리 / 위젯 없음) - 앱 오류와 구분"""
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _rss_bytes() -> int:
+    """현재 프로세스 RSS (리눅스 외에는 최대 RSS)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class CacheCounter:
+    """st.cache_data 함수별 조회 / 적중 횟수 (Streamlit 내부 CachedFunc에 계측 삽입)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.lookups = {}
+        self.hits = {}
+        self.installed = False
+
+    def install(self):
+        try:
+            from streamlit.runtime.caching.cache_utils import CachedFunc
+        except ImportError:
+            return
+        counter = self
+        original_call = CachedFunc.__call__
+        original_hit = CachedFunc._handle_cache_hit
+
+        def counted_call(self, *args, **kwargs):
+            counter._add(counter.lookups, self._info.func.__name__)
+            return original_call(self, *args, **kwargs)
+
+        def counted_hit(self, result):
+            counter._add(counter.hits, self._info.func.__name__)
+            return original_hit(self, result)
+
+        CachedFunc.__call__ = counted_call
+        CachedFunc._handle_cache_hit = counted_hit
+        self.installed = True
+
+    def _add(self, table: dict, name: str):
+        with self.lock:
+            table[name] = table.get(name, 0) + 1
+
+    def snapshot(self) -> tuple:
+        with self.lock:
+            return dict(self.lookups), dict(self.hits)
+
+
+def init_worker(upstream_rate: float):
+    """작업 프로세스 시작 - 대역 서버 속도 제한 / 캐시 계측 설치"""
+    import http_client
+    import streamlit.testing.v1  # noqa: F401 - 시작 RSS에 Streamlit 임포트 포함
+
+    http_client.set_rate_limit('127.0.0.1', upstream_rate)
+    _worker['counter'] = CacheCounter()
+    _worker['counter'].install()
+    _worker['rss_start'] = _rss_bytes()
+
+
+def _checked(at, step: str):
+    """실행 결과 요소 트리가 비어 있으면 하네스 오류"""
+    if not at.main.children:
+        raise HarnessError(f'{step}: 빈 요소 트리')
+    return at
+
+
+def _widget(elements, key: str, step: str):
+    try:
+        return elements(key=key)
+    except KeyError:
+        raise HarnessError(f'{step}: 위젯 {key} 없음') from None
+
+
+def run_session(session_id: int, codes: list, timeout: float) -> dict:
+    """세션 1개 실행 (작업 프로세스 안), 단계별 소요시간(초) / 앱 오류 / 하네스 오류 / 캐시 조회 증가분"""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(session_id)
+    result = {'id': session_id, 'pid': os.getpid(), 'timings': {}, 'errors': [], 'harness_errors': []}
+    counter = _worker.get('counter')
+    before = counter.snapshot() if counter else ({}, {})
+    try:
+        t = time.perf_counter()
+        at = _checked(AppTest.from_file(APP_PATH, default_timeout=timeout).run(), 'theme')
+        result['timings']['theme'] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        _widget(at.text_input, 'ob_code', 'orderblock').input(rng.choice(codes))
+        _checked(_widget(at.button, 'ob_btn', 'orderblock').click().run(), 'orderblock')
+        result['timings']['orderblock'] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        _widget(at.text_input, 'supply_input', 'supply').input(rng.choice(codes))
+        _checked(_widget(at.button, 'supply_btn', 'supply').click().run(), 'supply')
+        result['timings']['supply'] = time.perf_counter() - t
+
+        result['errors'] = [str(e.value) for e in at.exception]
+    except HarnessError as e:
+        result['harness_errors'].append(str(e))
+    except Exception as e:
+        result['errors'].append(f'{type(e).__name__}: {e}')
+
+    if counter:
+        after = counter.snapshot()
+        result['cache'] = [{name: n - table_before.get(name, 0) for name, n in table_after.items()}
+                           for table_before, table_after in zip(before, after)]
+    result['rss'] = (_worker.get('rss_start', 0), _rss_bytes())
+    return result
+
+
+def merge_cache(sessions: list) -> dict:
+    """세션별 캐시 조회 / 적중 증가분 합산"""
+    lookups, hits = {}, {}
+    for s in sessions:
+        for total, delta in zip((lookups, hits), s.get('cache', ({}, {}))):
+            for name, n in delta.items():
+                total[name] = total.get(name, 0) + n
+    return {name: {'lookups': n, 'hits': hits.get(name, 0), 'hit_ratio': round(hits.get(name, 0) / n, 3)}
+            for name, n in sorted(lookups.items()) if n}
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {}
+    arr = np.array(values) * 1000
+    return {'count': len(values), 'p50_ms': round(float(np.percentile(arr, 50)), 1),
+            'p95_ms': round(float(np.percentile(arr, 95)), 1), 'p99_ms': round(float(np.percentile(arr, 99)), 1),
+            'max_ms': round(float(arr.max()), 1)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='동시 사용자 부하 테스트 (오프라인 대역 서버 사용)')
+    parser.add_argument('--users', type=int, default=100, help='전체 세션 수')
+    parser.add_argument('--concurrency', type=int, default=20, help='동시 실행 세션 수 (작업 프로세스 수)')
+    parser.add_argument('--codes', type=int, default=30, help='세션이 고르는 종목 수 (작을수록 캐시 적중 증가)')
+    parser.add_argument('--latency', type=float, default=50, help='대역 서버 응답 지연 평균(ms)')
+    parser.add_argument('--jitter', type=float, default=20, help='대역 서버 응답 지연 편차(ms)')
+    parser.add_argument('--error-rate', type=float, default=0, help='대역 서버 503 오류 확률')
+    parser.add_argument('--upstream-rate', type=float, default=1000,
+                        help='대역 서버 초당 요청 수 제한 (작업 프로세스에 나눠 적용)')
+    parser.add_argument('--timeout', type=float, default=120, help='세션 1회 실행 제한 시간(초)')
+    parser.add_argument('--json', help='결과 JSON 저장 경로')
+    args = parser.parse_args(argv)
+
+    # 대역 서버 주소 / 임시 데이터 디렉터리는 config 임포트 전에 지정
+    port = _free_port()
+    for name in ('OB_NAVER_URL', 'OB_NAVER_CHART_URL', 'OB_KRX_URL', 'OB_SHEETS_URL'):
+        os.environ[name] = f'http://127.0.0.1:{port}'
+    os.environ.setdefault('OB_DATA_DIR', tempfile.mkdtemp(prefix='ob_loadtest_'))
+
+    import replay_server
+
+    server = replay_server.make_server(port=port, latency=args.latency, jitter=args.jitter,
+                                       error_rate=args.error_rate, universe=max(args.codes, 50), seed=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    codes = [code for code, _, _ in server.state.synthetic.universe[:args.codes]]
+
+    # fork는 대역 서버 스레드의 잠금 상태까지 복제하므로 spawn (환경 변수는 그대로 상속)
+    # AppTest가 작업 프로세스의 __main__을 앱 스크립트로 바꾸므로 함수는 모듈 경로로 넘김
+    from benchmarks import loadtest
+
+    workers = max(1, min(args.concurrency, args.users))
+    started = time.perf_counter()
+    sessions = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=loadtest.init_worker, initargs=(args.upstream_rate / workers,)) as pool:
+        futures = [pool.submit(loadtest.run_session, i, codes, args.timeout) for i in range(args.users)]
+        for future in as_completed(futures):
+            sessions.append(future.result())
+            if len(sessions) % max(1, args.users // 10) == 0:
+                print(f'[{len(sessions)}/{args.users}] sessions', file=sys.stderr)
+    elapsed = time.perf_counter() - started
+    sessions.sort(key=lambda s: s['id'])
+
+    # 작업 프로세스별 시작 / 마지막 RSS
+    rss = {}
+    for s in sessions:
+        rss[s['pid']] = (s['rss'][0], max(rss.get(s['pid'], (0, 0))[1], s['rss'][1]))
+    rss_start = sum(start for start, _ in rss.values()) / max(1, len(rss))
+    rss_end = sum(end for _, end in rss.values()) / max(1, len(rss))
+
+    with server.state.lock:
+        upstream = dict(server.state.stats['requests'])
+        injected = server.state.stats['injected_errors']
+    server.shutdown()
+
+    failed = [s for s in sessions if s['errors']]
+    broken = [s for s in sessions if s['harness_errors']]
+    total_upstream = sum(upstream.values())
+    report = {
+        'config': vars(args),
+        'elapsed_s': round(elapsed, 2),
+        'sessions': len(sessions),
+        'failed_sessions': len(failed),
+        'errors': sorted({e for s in failed for e in s['errors']})[:20],
+        'harness_errors': {'sessions': len(broken),
+                           'errors': sorted({e for s in broken for e in s['harness_errors']})[:20]},
+        'latency': {step: percentiles([s['timings'][step] for s in sessions if step in s['timings']])
+                    for step in STEPS},
+        'session_latency': percentiles([sum(s['timings'].values()) for s in sessions
+                                        if len(s['timings']) == len(STEPS)]),
+        'upstream': {'total': total_upstream, 'per_session': round(total_upstream / max(1, len(sessions)), 2),
+                     'injected_errors': injected, 'by_path': upstream},
+        'cache': merge_cache(sessions) or None,
+        'memory': {'workers': len(rss), 'rss_start_mb': round(rss_start / 2 ** 20, 1),
+                   'rss_end_mb': round(rss_end / 2 ** 20, 1),
+                   'growth_per_session_kb': round((rss_end - rss_start) * len(rss) / 1024 / max(1, len(sessions)), 1)},
+    }
+
+    print(f"\n세션 {report['sessions']}개 ({report['failed_sessions']}개 실패, 하네스 오류 {len(broken)}개), "
+          f"{report['elapsed_s']}초")
+    for error in report['harness_errors']['errors']:
+        print(f'  harness      {error}')
+    for step, stats in list(report['latency'].items()) + [('session', report['session_latency'])]:
+        if stats:
+            print(f"  {step:12s} p50 {stats['p50_ms']:8.1f}ms  p95 {stats['p95_ms']:8.1f}ms  max {stats['max_ms']:8.1f}ms")
+    print(f"  upstream     {total_upstream}건 (세션당 {report['upstream']['per_session']}, 오류 주입 {injected})")
+    for name, c in (report['cache'] or {}).items():
+        print(f"  cache        {name:28s} {c['hits']}/{c['lookups']} ({c['hit_ratio'] * 100:.0f}%)")
+    memory = report['memory']
+    print(f"  memory       작업 프로세스 {memory['workers']}개 평균 {memory['rss_start_mb']}MB → {memory['rss_end_mb']}MB "
+          f"(세션당 {memory['growth_per_session_kb']}KB)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+    if broken:
+        return 2
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
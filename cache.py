@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+프로세스 내 공유 TTL 캐시 (Streamlit 밖에서 쓰는 API 서버 / CLI용)
+같은 키를 동시에 요청하면 한 스레드만 원본 함수를 실행하고 나머지는 결과를 기다린다
+"""
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+
+class TTLCache:
+    """키별 만료 시간이 있는 스레드 안전 캐시"""
+
+    def __init__(self, ttl: float, maxsize: int = 4096):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}  # 키 → [잠금, 대기 중인 스레드 수] (마지막 스레드가 나가면 제거)
+
+    def get(self, key):
+        """(값, 저장시각) 또는 None"""
+        with self._lock:
+            item = self._data.get(key)
+        if item is None or time.time() - item[1] > self.ttl:
+            return None
+        return item
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            if len(self._data) >= self.maxsize and key not in self._data:
+                # 만료된 항목 정리 후에도 가득 차면 가장 오래된 항목 제거
+                expired = [k for k, (_, ts) in self._data.items() if now - ts > self.ttl]
+                for k in expired:
+                    del self._data[k]
+                if len(self._data) >= self.maxsize:
+                    del self._data[min(self._data, key=lambda k: self._data[k][1])]
+            self._data[key] = (value, now)
+
+    @contextmanager
+    def key_lock(self, key):
+        """키 단위 잠금 - 잠금 객체는 기다리는 스레드가 없어지면 정리 (키가 계속 바뀌어도 쌓이지 않게)"""
+        with self._lock:
+            entry = self._key_locks.get(key)
+            if entry is None:
+                entry = self._key_locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._key_locks[key]
+
+    def get_or_compute(self, key, compute, cacheable=None):
+        """(값, 저장시각) 반환, 없으면 키 단위 잠금 후 한 번만 계산
+
+        cacheable(값)이 False면 저장하지 않고 그대로 반환 (오류 응답 등)
+        """
+        item = self.get(key)
+        if item is not None:
+            return item
+        with self.key_lock(key):
+            item = self.get(key)
+            if item is not None:
+                return item
+            value = compute()
+            if cacheable is not None and not cacheable(value):
+                return value, time.time()
+            self.set(key, value)
+            return self.get(key) or (value, time.time())
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def ttl_cache(ttl: float, maxsize: int = 4096, fallback=None, negative_ttl: float = 15):
+    """함수 결과를 인자 기준으로 TTL 동안 캐시하는 데코레이터 (st.cache_data 대용)
+
+    fallback이 있으면 예외는 캐시하지 않고 negative_ttl 동안만 기억, 그동안 fallback(같은 인자) 반환
+    """
+    def decorator(func):
+        cache = TTLCache(ttl, maxsize)
+        failures = TTLCache(negative_ttl, maxsize)
+        name = func.__name__
+
+        def compute(args, kwargs):
+            metrics.inc('cache_misses_total', function=name)
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                metrics.inc('cache_errors_total', function=name)
+                raise
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            metrics.inc('cache_lookups_total', function=name)
+            key = (args, tuple(sorted(kwargs.items())))
+            if fallback is None:
+                return cache.get_or_compute(key, lambda: compute(args, kwargs))[0]
+
+            if failures.get(key) is not None:
+                metrics.inc('cache_negative_hits_total', function=name)
+                return fallback(*args, **kwargs)
+            try:
+                return cache.get_or_compute(key, lambda: compute(args, kwargs))[0]
+            except Exception:
+                failures.set(key, True)
+                return fallback(*args, **kwargs)
+
+        wrapper.cache = cache
+        wrapper.failures = failures
+        return wrapper
+    return decorator
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+일봉 전용 캐시 - 종목당 압축 프레임 1개 (int32 가격/거래량 + datetime64 인덱스)
+days가 달라도 같은 프레임의 꼬리 조각(복사 없음)으로 응답, 전체 바이트 예산 초과 시 LRU 제거
+
+반환 프레임은 캐시와 메모리를 공유하므로 호출 측에서 수정하지 말 것
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import metrics
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+INT32_MAX = np.iinfo(np.int32).max
+
+
+def compact_candles(df: pd.DataFrame) -> pd.DataFrame:
+    """일봉 → int32 컬럼 / datetime64 인덱스 프레임 (거래량이 int32 범위를 넘으면 int64 유지)"""
+    if df.empty:
+        return df
+    columns = {c: df[c].to_numpy(dtype=np.int32) for c in PRICE_COLUMNS}
+    volume = df['volume'].to_numpy(dtype=np.int64)
+    columns['volume'] = volume.astype(np.int32) if volume.max() <= INT32_MAX else volume
+    index = pd.DatetimeIndex(df.index.values.astype('datetime64[ns]'), name='date')
+    return pd.DataFrame(columns, index=index)
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=False).sum())
+
+
+class CandleCache:
+    """종목코드 → (압축 프레임, 받은 일수, 저장시각) LRU 캐시"""
+
+    def __init__(self, fetch, max_bytes: int = 64 * 2 ** 20, ttl: float = 60, negative_ttl: float = 15):
+        self.fetch = fetch
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()
+        self._failures = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._code_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _code_lock(self, code: str) -> threading.Lock:
+        with self._lock:
+            lock = self._code_locks.get(code)
+            if lock is None:
+                lock = self._code_locks[code] = threading.Lock()
+            return lock
+
+    def _lookup(self, code: str, days: int):
+        """유효한 항목이 days를 채우면 꼬리 조각, 아니면 None"""
+        with self._lock:
+            entry = self._entries.get(code)
+            if entry is None or time.time() - entry['stored_at'] > self.ttl:
+                return None
+            if entry['days'] < days and not entry['complete']:
+                return None
+            self._entries.move_to_end(code)
+            self.hits += 1
+            frame = entry['frame']
+        metrics.inc('cache_lookups_total', function='candle_cache')
+        return frame.iloc[-days:] if len(frame) > days else frame
+
+    def get(self, code: str, days: int = 60) -> pd.DataFrame:
+        """최근 days개 일봉 (가져오기 실패 시 빈 DataFrame, negative_ttl 동안 재요청 안 함)"""
+        frame = self._lookup(code, days)
+        if frame is not None:
+            return frame
+
+        with self._code_lock(code):
+            frame = self._lookup(code, days)
+            if frame is not None:
+                return frame
+
+            metrics.inc('cache_lookups_total', function='candle_cache')
+            with self._lock:
+                failed_at = self._failures.get(code)
+                if failed_at is not None and time.time() - failed_at < self.negative_ttl:
+                    metrics.inc('cache_negative_hits_total', function='candle_cache')
+                    return pd.DataFrame()
+                self.misses += 1
+                entry = self._entries.get(code)
+                fetch_days = max(days, entry['days'] if entry else 0)
+
+            metrics.inc('cache_misses_total', function='candle_cache')
+            try:
+                df = self.fetch(code, fetch_days)
+            except Exception:
+                metrics.inc('cache_errors_total', function='candle_cache')
+                with self._lock:
+                    self._failures[code] = time.time()
+                return pd.DataFrame()
+
+            frame = compact_candles(df)
+            # 공유 캐시를 거친 경우 실제 수집 시각 기준으로 만료
+            self._store(code, frame, fetch_days, df.attrs.get('fetched_at', time.time()))
+            return frame.iloc[-days:] if len(frame) > days else frame
+
+    def _store(self, code: str, frame: pd.DataFrame, days: int, stored_at: float):
+        nbytes = frame_nbytes(frame)
+        with self._lock:
+            self._failures.pop(code, None)
+            old = self._entries.pop(code, None)
+            if old:
+                self._bytes -= old['nbytes']
+            self._entries[code] = {'frame': frame, 'days': days, 'complete': len(frame) < days,
+                                   'stored_at': stored_at, 'nbytes': nbytes}
+            self._bytes += nbytes
+            # 예산 초과 시 가장 오래 안 쓴 종목부터 제거 (방금 넣은 항목은 유지)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted['nbytes']
+                self.evictions += 1
+                metrics.inc('candle_cache_evictions_total')
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._failures.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'codes': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'usage_pct': round(self._bytes / self.max_bytes * 100, 1) if self.max_bytes else 0.0,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else None,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+공통 설정 - 로컬 데이터 경로 / 외부 데이터 소스 주소
+"""
+
+import os
+
+# 로컬 캐시/저장소 루트 (환경변수로 변경 가능)
+DATA_DIR = os.environ.get('OB_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+
+
+def data_path(*parts: str) -> str:
+    """DATA_DIR 하위 경로 (상위 디렉터리 자동 생성)"""
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def data_dir(*parts: str) -> str:
+    """DATA_DIR 하위 디렉터리 (없으면 생성)"""
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+# 외부 데이터 소스 주소 (오프라인 재생 서버 등으로 바꿀 때 환경변수 지정)
+NAVER_FINANCE_URL = os.environ.get('OB_NAVER_URL', 'https://finance.naver.com').rstrip('/')
+NAVER_CHART_URL = os.environ.get('OB_NAVER_CHART_URL', 'https://fchart.stock.naver.com').rstrip('/')
+KRX_URL = os.environ.get('OB_KRX_URL', 'http://data.krx.co.kr').rstrip('/')
+SHEETS_URL = os.environ.get('OB_SHEETS_URL', 'https://docs.google.com').rstrip('/')
+
+KRX_JSON_URL = f'{KRX_URL}/comm/bldAttendant/getJsonData.cmd'
+
+# 계측 지표 내보내기 (Prometheus /metrics 포트, 텍스트 파일 경로 - 지정 시에만 사용)
+METRICS_PORT = int(os.environ.get('OB_METRICS_PORT', '0'))
+METRICS_FILE = os.environ.get('OB_METRICS_FILE', '')
+METRICS_HOST = os.environ.get('OB_METRICS_HOST', '127.0.0.1')
+
+# 관리자 패널(?admin=1)의 지표 초기화 토큰 - 설정하고 ?token=값으로 열었을 때만 초기화 버튼 표시
+ADMIN_TOKEN = os.environ.get('OB_ADMIN_TOKEN', '')
+
+# 외부 요청 실패를 기억하는 시간(초) - 정상 결과 TTL보다 짧게, 이 시간 동안은 재요청하지 않음
+NEGATIVE_CACHE_TTL = float(os.environ.get('OB_NEGATIVE_TTL', '15'))
+
+# 일봉 캐시 메모리 예산 (MB, 프로세스당)
+CANDLE_CACHE_MB = float(os.environ.get('OB_CANDLE_CACHE_MB', '64'))
+
+# 캐시 예열: 조회 빈도 상위 종목 수 (0이면 사용 안 함) / 장전·장중 재예열 간격(초, 시세 캐시 TTL 60초보다 짧게)
+WARMUP_TOP = int(os.environ.get('OB_WARMUP_TOP', '0'))
+WARMUP_INTERVAL = float(os.environ.get('OB_WARMUP_INTERVAL', '55'))
+
+# 탭 간 선수집: 세션당 동시 선수집 수 (0이면 사용 안 함)
+PREFETCH_CONCURRENCY = int(os.environ.get('OB_PREFETCH_CONCURRENCY', '2'))
+
+# 프로세스 간 공유 캐시 SQLite 파일 (여러 서버 프로세스 운영 시 지정, 비우면 사용 안 함)
+SHARED_CACHE_PATH = os.environ.get('OB_SHARED_CACHE', '')
@@ -0,0 +1 @@
+# 저장소 루트를 sys.path에 올려 tests/에서 최상위 모듈을 바로 import
@@ -0,0 +1,449 @@
+# -*- coding: utf-8 -*-
+"""
+데이터 수집 함수 (네이버 금융 / KRX) - Streamlit 비의존
+fetch_* 는 요청 실패 시 예외 (캐시 래퍼가 실패를 짧게만 기억하도록),
+get_* / search_* 는 실패 시 빈 결과를 반환하는 기존 인터페이스
+"""
+
+import re
+import urllib.parse
+from datetime import datetime, timedelta
+
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup
+
+import http_client
+import metrics
+from config import KRX_JSON_URL, NAVER_CHART_URL, NAVER_FINANCE_URL
+from symbol_master import get_symbol_master
+
+# KRX 투자자별 거래실적 컬럼 → 필드명
+KRX_INVESTOR_FIELDS = [
+    ('TRDVAL1', 'financial'),
+    ('TRDVAL2', 'insurance'),
+    ('TRDVAL3', 'invest_trust'),
+    ('TRDVAL4', 'private'),
+    ('TRDVAL5', 'bank'),
+    ('TRDVAL6', 'other_fin'),
+    ('TRDVAL7', 'pension'),
+    ('TRDVAL8', 'corp'),
+    ('TRDVAL9', 'retail'),
+    ('TRDVAL10', 'foreign'),
+    ('TRDVAL11', 'other_foreign'),
+]
+
+# 기관합계 = 금융투자 ~ 연기금
+INST_FIELDS = ['financial', 'insurance', 'invest_trust', 'private', 'bank', 'other_fin', 'pension']
+
+# KRX 투자자 구분 코드 (전종목 일괄 조회용)
+KRX_INVESTOR_TYPE_CODES = {
+    'financial': '1000',
+    'insurance': '2000',
+    'invest_trust': '3000',
+    'private': '3100',
+    'bank': '4000',
+    'other_fin': '5000',
+    'pension': '6000',
+    'corp': '7100',
+    'retail': '8000',
+    'foreign': '9000',
+    'other_foreign': '9001',
+}
+
+# KRX 시장 구분 (코스피 / 코스닥)
+KRX_MARKETS = ['STK', 'KSQ']
+
+# 일별 시세 페이지 1장의 행 수 - 이 이하면 HTML 1회, 넘으면 차트 데이터 1회 요청이 더 싸다
+SISE_DAY_PAGE_ROWS = 10
+
+# 차트 데이터 XML 항목 (<item data="YYYYMMDD|시가|고가|저가|종가|거래량" />)
+CHART_ITEM_RE = re.compile(r'<item\s+data="([^"]*)"')
+
+
+@metrics.timed('parse.search_results')
+def parse_search_results(html: str) -> list:
+    """네이버 종목 검색 결과 HTML → [{'code', 'name'}] (최대 10개)"""
+    soup = BeautifulSoup(html, 'html.parser')
+    results = []
+
+    links = soup.select('a.tltle')
+    for link in links[:10]:
+        href = link.get('href', '')
+        name = link.text.strip()
+
+        if 'code=' in href:
+            code = href.split('code=')[1].split('&')[0]
+            if len(code) == 6 and code.isdigit():
+                results.append({'code': code, 'name': name})
+
+    return results
+
+
+@metrics.timed('fetch.stock_search')
+def fetch_stock_search(keyword: str) -> list:
+    """네이버 종목 검색 (요청 실패 시 예외, 결과 없음은 빈 리스트)"""
+    encoded_keyword = urllib.parse.quote(keyword, encoding='euc-kr')
+    url = f"{NAVER_FINANCE_URL}/search/searchList.naver?query={encoded_keyword}"
+    headers = {'User-Agent': 'Mozilla/5.0'}
+    response = http_client.get(url, headers=headers, timeout=10)
+    response.raise_for_status()
+    response.encoding = 'euc-kr'
+    return parse_search_results(response.text)
+
+
+def search_stock_code(keyword: str) -> list:
+    try:
+        return fetch_stock_search(keyword)
+    except Exception:
+        metrics.inc('fetch_errors_total', function='search_stock_code')
+        return []
+
+
+@metrics.timed('parse.stock_info')
+def parse_stock_info(html: str, stock_code: str) -> dict:
+    """네이버 종목 메인 HTML → 종목명 / 현재가 / 등락"""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    price_tag = soup.select_one('p.no_today span.blind')
+    current_price = int(price_tag.text.replace(',', '')) if price_tag else 0
+
+    name_tag = soup.select_one('div.wrap_company h2 a')
+    name = name_tag.text.strip() if name_tag else stock_code
+
+    change_tag = soup.select_one('p.no_exday em span.blind')
+    change_text = change_tag.text if change_tag else "0"
+
+    is_down = soup.select_one('p.no_exday em.no_down')
+    change_pct = float(change_text.replace('%', '').replace(',', ''))
+    if is_down:
+        change_pct = -change_pct
+
+    return {'name': name, 'price': current_price, 'change_pct': change_pct}
+
+
+@metrics.timed('fetch.stock_info')
+def fetch_stock_info(stock_code: str) -> dict:
+    """네이버 종목 현재가 (요청 실패 시 예외)"""
+    url = f"{NAVER_FINANCE_URL}/item/main.naver?code={stock_code}"
+    headers = {'User-Agent': 'Mozilla/5.0'}
+    response = http_client.get(url, headers=headers, timeout=10)
+    response.raise_for_status()
+    response.encoding = 'utf-8'
+    return parse_stock_info(response.text, stock_code)
+
+
+def get_stock_info_naver(stock_code: str) -> dict:
+    try:
+        return fetch_stock_info(stock_code)
+    except Exception:
+        metrics.inc('fetch_errors_total', function='get_stock_info_naver')
+        return {'name': stock_code, 'price': 0, 'change_pct': 0}
+
+
+@metrics.timed('parse.daily_candle_page')
+def parse_daily_candle_page(html: str):
+    """일별 시세 페이지 HTML → 캔들 dict 리스트 (최신순), 표가 없으면 None"""
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table', class_='type2')
+    if not table:
+        return None
+
+    page_data = []
+    rows = table.find_all('tr')
+    for row in rows:
+        cols = row.find_all('td')
+        if len(cols) >= 7:
+            date_text = cols[0].text.strip()
+            if not date_text:
+                continue
+            try:
+                date = datetime.strptime(date_text, '%Y.%m.%d')
+                page_data.append({
+                    'date': date,
+                    'open': int(cols[3].text.strip().replace(',', '')),
+                    'high': int(cols[4].text.strip().replace(',', '')),
+                    'low': int(cols[5].text.strip().replace(',', '')),
+                    'close': int(cols[1].text.strip().replace(',', '')),
+                    'volume': int(cols[6].text.strip().replace(',', ''))
+                })
+            except ValueError:
+                continue
+    return page_data
+
+
+@metrics.timed('parse.chart_data')
+def parse_chart_data(text: str) -> list:
+    """차트 데이터 XML → 캔들 dict 리스트 (오래된순), 값이 비거나 깨진 항목은 건너뜀"""
+    page_data = []
+    for item in CHART_ITEM_RE.findall(text):
+        fields = item.split('|')
+        if len(fields) < 6:
+            continue
+        try:
+            page_data.append({
+                'date': datetime.strptime(fields[0], '%Y%m%d'),
+                'open': int(fields[1]),
+                'high': int(fields[2]),
+                'low': int(fields[3]),
+                'close': int(fields[4]),
+                'volume': int(fields[5])
+            })
+        except ValueError:
+            continue
+    return page_data
+
+
+@metrics.timed('fetch.daily_candle_chart')
+def fetch_daily_candle_chart(stock_code: str, days: int = 60) -> pd.DataFrame:
+    """네이버 차트 데이터 - 한 번 요청으로 수년치 일봉 (요청 실패 시 예외)"""
+    url = f"{NAVER_CHART_URL}/sise.nhn?symbol={stock_code}&timeframe=day&count={days}&requestType=0"
+    headers = {'User-Agent': 'Mozilla/5.0'}
+    response = http_client.get(url, headers=headers, timeout=10)
+    response.raise_for_status()
+    response.encoding = 'euc-kr'
+
+    all_data = parse_chart_data(response.text)
+    if not all_data:
+        return pd.DataFrame()
+
+    df = pd.DataFrame(all_data)
+    df = df.set_index('date').sort_index(ascending=True)
+    df = df[~df.index.duplicated(keep='last')]
+    return df.tail(days)
+
+
+@metrics.timed('fetch.daily_candle')
+def fetch_daily_candle(stock_code: str, days: int = 60) -> pd.DataFrame:
+    """일봉 (days가 일별 시세 1페이지 이하면 HTML, 넘으면 차트 데이터 - 차트 호스트 장애 시 HTML로 대체)"""
+    if days <= SISE_DAY_PAGE_ROWS:
+        return fetch_daily_candle_pages(stock_code, days)
+    try:
+        return fetch_daily_candle_chart(stock_code, days)
+    except requests.RequestException:
+        metrics.inc('fetch_fallbacks_total', function='fetch_daily_candle')
+        return fetch_daily_candle_pages(stock_code, days)
+
+
+@metrics.timed('fetch.daily_candle_pages')
+def fetch_daily_candle_pages(stock_code: str, days: int = 60) -> pd.DataFrame:
+    """네이버 일별 시세 HTML (최대 10페이지 = 약 100거래일, 요청 실패 시 예외, 시세 없음은 빈 DataFrame)"""
+    url = f"{NAVER_FINANCE_URL}/item/sise_day.naver?code={stock_code}"
+    all_data = []
+    page = 1
+
+    while len(all_data) < days and page <= 10:
+        page_url = f"{url}&page={page}"
+        headers = {'User-Agent': 'Mozilla/5.0'}
+        response = http_client.get(page_url, headers=headers, timeout=10)
+        response.raise_for_status()
+        response.encoding = 'euc-kr'
+
+        page_data = parse_daily_candle_page(response.text)
+        if page_data is None:
+            break
+        all_data.extend(page_data)
+        page += 1
+
+    if not all_data:
+        return pd.DataFrame()
+
+    df = pd.DataFrame(all_data)
+    df = df.set_index('date').sort_index(ascending=True)
+    return df.tail(days)
+
+
+def get_daily_candle_naver(stock_code: str, days: int = 60) -> pd.DataFrame:
+    try:
+        return fetch_daily_candle(stock_code, days)
+    except Exception:
+        metrics.inc('fetch_errors_total', function='get_daily_candle_naver')
+        return pd.DataFrame()
+
+
+@metrics.timed('parse.supply_page')
+def parse_supply_page(html: str):
+    """외국인/기관 매매 페이지 HTML → 수급 dict 리스트 (최신순), 표가 없으면 None"""
+    soup = BeautifulSoup(html, 'html.parser')
+    # 두 번째 type2 테이블 사용
+    tables = soup.find_all('table', class_='type2')
+    if len(tables) < 2:
+        return None
+    table = tables[1]
+
+    page_data = []
+    rows = table.find_all('tr')
+    for row in rows:
+        cols = row.find_all('td')
+        if len(cols) >= 7:
+            date_text = cols[0].text.strip()
+            if not date_text or '.' not in date_text:
+                continue
+            try:
+                # 날짜
+                date = datetime.strptime(date_text, '%Y.%m.%d')
+
+                # 기관 순매매 (컬럼 5)
+                inst_text = cols[5].text.strip().replace(',', '').replace('+', '')
+                inst = int(inst_text) if inst_text and inst_text != '-' else 0
+
+                # 외국인 순매매 (컬럼 6)
+                foreign_text = cols[6].text.strip().replace(',', '').replace('+', '')
+                foreign = int(foreign_text) if foreign_text and foreign_text != '-' else 0
+
+                page_data.append({
+                    'date': date,
+                    'foreign': foreign,
+                    'inst': inst
+                })
+            except ValueError:
+                continue
+    return page_data
+
+
+@metrics.timed('fetch.supply_page')
+def fetch_supply_page(stock_code: str, page: int):
+    """외국인/기관 매매 페이지 1개 (최신순, 페이지당 20거래일) - 표가 없으면 None, 요청 실패 시 예외"""
+    url = f"{NAVER_FINANCE_URL}/item/frgn.naver?code={stock_code}&page={page}"
+    headers = {'User-Agent': 'Mozilla/5.0'}
+    response = http_client.get(url, headers=headers, timeout=10)
+    response.raise_for_status()
+    response.encoding = 'euc-kr'
+    return parse_supply_page(response.text)
+
+
+@metrics.timed('fetch.supply_data')
+def fetch_supply_data(stock_code: str, days: int = 10) -> list:
+    """네이버 외국인/기관 수급 (요청 실패 시 예외)"""
+    all_data = []
+    page = 1
+
+    while len(all_data) < days and page <= 3:
+        page_data = fetch_supply_page(stock_code, page)
+        if page_data is None:
+            break
+        all_data.extend(page_data)
+        page += 1
+
+    return all_data[:days]
+
+
+def get_supply_data_naver(stock_code: str, days: int = 10) -> list:
+    """네이버 금융에서 외국인/기관 수급 데이터 스크래핑"""
+    try:
+        return fetch_supply_data(stock_code, days)
+    except Exception:
+        metrics.inc('fetch_errors_total', function='get_supply_data_naver')
+        return []
+
+
+def _krx_isin_candidates(stock_code: str) -> list:
+    """종목 마스터에 ISIN이 있으면 우선, 없으면 여러 ISIN 형식 시도 (000~009)"""
+    candidates = [f'KR7{stock_code}{suffix}' for suffix in ['003', '000', '001', '002', '004', '005', '006', '007', '008', '009']]
+    # 조회만 - 수집 함수가 CLI / API 서버에서 종목 마스터 갱신 스레드를 띄우지 않도록
+    master_row = get_symbol_master(background=False).get(stock_code)
+    if master_row and master_row.get('isin'):
+        candidates = [master_row['isin']] + [c for c in candidates if c != master_row['isin']]
+    return candidates
+
+
+def _parse_krx_int(v) -> int:
+    try:
+        return int(str(v).replace(',', '').replace('+', ''))
+    except ValueError:
+        return 0
+
+
+@metrics.timed('parse.krx_investor_rows')
+def parse_krx_investor_rows(output: list) -> list:
+    """KRX 투자자별 거래실적 JSON output → 수급 dict 리스트"""
+    all_data = []
+    for row in output:
+        item = {'date': datetime.strptime(row['TRD_DD'], '%Y/%m/%d')}
+        for col, field in KRX_INVESTOR_FIELDS:
+            item[field] = _parse_krx_int(row.get(col, '0'))
+        all_data.append(item)
+    return all_data
+
+
+@metrics.timed('fetch.krx_investor_flows')
+def fetch_krx_investor_flows(stock_code: str, start_date: str, end_date: str) -> list:
+    """KRX 투자자별 일별 순매수 (기간 지정, 최신순). 날짜는 'YYYYMMDD'"""
+    headers = {
+        'User-Agent': 'Mozilla/5.0',
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'Referer': 'http://data.krx.co.kr/contents/MDC/MDI/mdiLoader/index.cmd?menuId=MDC0201020302'
+    }
+
+    for krx_code in _krx_isin_candidates(stock_code):
+        data = {
+            'bld': 'dbms/MDC/STAT/standard/MDCSTAT02303',
+            'locale': 'ko_KR',
+            'inqTpCd': '2',
+            'trdVolVal': '1',
+            'askBid': '3',
+            'strtDd': start_date,
+            'endDd': end_date,
+            'isuCd': krx_code,
+            'isuCd2': stock_code,
+            'share': '1',
+            'money': '1',
+            'csvxls_is498': 'false'
+        }
+
+        response = http_client.post(KRX_JSON_URL, headers=headers, data=data, timeout=10)
+        response.raise_for_status()
+        result = response.json()
+
+        if 'output' in result and result['output']:
+            return parse_krx_investor_rows(result['output'])
+
+    return []
+
+
+@metrics.timed('fetch.krx_market_investor')
+def fetch_krx_market_investor(date: str, market: str, investor_code: str) -> dict:
+    """KRX 특정 일자/시장/투자자의 전종목 순매수 수량 {종목코드: 순매수}. 날짜는 'YYYYMMDD'"""
+    headers = {
+        'User-Agent': 'Mozilla/5.0',
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'Referer': 'http://data.krx.co.kr/contents/MDC/MDI/mdiLoader/index.cmd?menuId=MDC0201020303'
+    }
+    data = {
+        'bld': 'dbms/MDC/STAT/standard/MDCSTAT02401',
+        'locale': 'ko_KR',
+        'mktId': market,
+        'invstTpCd': investor_code,
+        'strtDd': date,
+        'endDd': date,
+        'share': '1',
+        'money': '1',
+        'csvxls_isNo': 'false'
+    }
+    response = http_client.post(KRX_JSON_URL, headers=headers, data=data, timeout=15)
+    response.raise_for_status()
+    result = response.json()
+
+    flows = {}
+    for row in result.get('output') or []:
+        code = str(row.get('ISU_SRT_CD', '')).strip()
+        if len(code) == 6:
+            flows[code] = _parse_krx_int(row.get('NETBID_TRDVOL', '0'))
+    return flows
+
+
+@metrics.timed('fetch.detailed_supply')
+def fetch_detailed_supply(stock_code: str, days: int = 7) -> list:
+    """KRX 최근 투자자별 상세 수급 (요청 실패 시 예외)"""
+    end_date = datetime.now().strftime('%Y%m%d')
+    start_date = (datetime.now() - timedelta(days=days + 5)).strftime('%Y%m%d')
+    return fetch_krx_investor_flows(stock_code, start_date, end_date)[:days]
+
+
+def get_detailed_supply_pykrx(stock_code: str, days: int = 7) -> list:
+    """KRX API로 투자자별 상세 수급 데이터 (연기금, 사모 포함)"""
+    try:
+        return fetch_detailed_supply(stock_code, days)
+    except Exception:
+        metrics.inc('fetch_errors_total', function='get_detailed_supply_pykrx')
+        return []
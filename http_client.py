@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+공용 HTTP 클라이언트 - 호스트별 요청 속도 제한 / 회로 차단 + 스레드별 연결 재사용
+모든 수집 함수는 requests 대신 이 모듈의 get / post 를 사용
+"""
+
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+import metrics
+
+# 호스트별 초당 요청 수 기본값 (환경변수로 변경 가능)
+DEFAULT_RATE = float(os.environ.get('OB_HOST_RATE', '10'))
+DEFAULT_BURST = int(os.environ.get('OB_HOST_BURST', '10'))
+
+# 회로 차단: 연속 실패 횟수 / 차단 후 재시도(탐침)까지 초
+BREAKER_FAILURES = int(os.environ.get('OB_BREAKER_FAILURES', '5'))
+BREAKER_RESET = float(os.environ.get('OB_BREAKER_RESET', '30'))
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """호스트 회로가 열려 있어 요청하지 않고 즉시 실패"""
+
+
+class RateLimiter:
+    """토큰 버킷 (초당 rate개, 최대 burst개 누적)"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """토큰 1개 확보까지 대기, 대기한 초 반환"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class CircuitBreaker:
+    """호스트별 회로 차단기 (닫힘 → 연속 실패 시 열림 → reset초 뒤 탐침 1건 허용 → 성공 시 닫힘)"""
+
+    def __init__(self, host: str, failures: int = BREAKER_FAILURES, reset: float = BREAKER_RESET):
+        self.host = host
+        self.failures = failures
+        self.reset = reset
+        self.state = 'closed'
+        self.consecutive = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """요청 가능 여부 확인, 차단 중이면 CircuitOpenError"""
+        with self._lock:
+            if self.state == 'closed':
+                return
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset:
+                self.state = 'half_open'
+            if self.state == 'half_open' and not self._probing:
+                self._probing = True
+                return
+        metrics.inc('circuit_rejected_total', host=self.host)
+        raise CircuitOpenError(f'{self.host} 회로 차단 중 (연속 실패 {self.consecutive}회)')
+
+    def record_success(self):
+        with self._lock:
+            if self.state != 'closed':
+                metrics.inc('circuit_closed_total', host=self.host)
+            self.state = 'closed'
+            self.consecutive = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive += 1
+            self._probing = False
+            if self.state == 'half_open' or (self.state == 'closed' and self.consecutive >= self.failures):
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                metrics.inc('circuit_opened_total', host=self.host)
+
+    def status(self) -> dict:
+        with self._lock:
+            retry_in = max(0.0, self.reset - (time.monotonic() - self.opened_at)) if self.state == 'open' else 0.0
+            return {'host': self.host, 'state': self.state, 'consecutive_failures': self.consecutive,
+                    'retry_in_s': round(retry_in, 1)}
+
+
+_limiters = {}
+_breakers = {}
+_limiters_lock = threading.Lock()
+_local = threading.local()
+
+
+def get_limiter(host: str) -> RateLimiter:
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _limiters[host] = RateLimiter(DEFAULT_RATE, DEFAULT_BURST)
+        return limiter
+
+
+def set_rate_limit(host: str, rate: float, burst: int = None):
+    """호스트별 속도 제한 변경 (burst 생략 시 rate와 같게)"""
+    with _limiters_lock:
+        _limiters[host] = RateLimiter(rate, burst or max(1, int(rate)))
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    with _limiters_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker(host)
+        return breaker
+
+
+def breaker_states() -> list:
+    """호스트별 회로 상태 (관리자 화면용)"""
+    with _limiters_lock:
+        breakers = list(_breakers.values())
+    return [b.status() for b in breakers]
+
+
+def _session() -> requests.Session:
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    host = urlparse(url).hostname or ''
+    breaker = get_breaker(host)
+    breaker.before_request()
+    waited = get_limiter(host).acquire()
+    if waited:
+        metrics.inc('ratelimit_wait_seconds_total', waited, host=host)
+
+    started = time.perf_counter()
+    try:
+        response = _session().request(method, url, **kwargs)
+    except Exception:
+        breaker.record_failure()
+        metrics.inc('upstream_requests_total', host=host, status='error')
+        metrics.observe(f'upstream.{host}', time.perf_counter() - started, error=True)
+        raise
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    metrics.inc('upstream_requests_total', host=host, status=str(response.status_code))
+    metrics.observe(f'upstream.{host}', time.perf_counter() - started, error=response.status_code >= 500)
+    return response
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request('POST', url, **kwargs)
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+전종목 투자자 수급 일괄 수집 - 거래일당 KRX 전종목 스냅샷 1벌
+(종목별 2,500회 요청 대신 시장 x 투자자 구분 22회 요청)
+
+사용법:
+    python market_flows.py --days 5
+    python market_flows.py --date 20240105
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from config import data_dir
+from fetchers import INST_FIELDS, KRX_INVESTOR_TYPE_CODES, KRX_MARKETS, fetch_krx_market_investor
+from supply_analysis import SIGNALS, ACCUMULATION_SIGNALS, aggregate_stacked_flows, classify_signals
+from supply_store import FLOW_FIELDS, SupplyStore, merge_columns
+
+SNAPSHOT_FIELDS = list(KRX_INVESTOR_TYPE_CODES)
+
+
+def snapshot_path(date: str) -> str:
+    return os.path.join(data_dir('market_flows'), f'{date}.npz')
+
+
+def fetch_market_snapshot(date: str) -> dict:
+    """특정 거래일 전종목 투자자별 순매수 → 컬럼 배열 (종목코드 오름차순)"""
+    per_field = {}
+    codes = set()
+    for field, investor_code in KRX_INVESTOR_TYPE_CODES.items():
+        merged = {}
+        for market in KRX_MARKETS:
+            merged.update(fetch_krx_market_investor(date, market, investor_code))
+        per_field[field] = merged
+        codes.update(merged)
+
+    code_arr = np.array(sorted(codes), dtype='U6')
+    snapshot = {'codes': code_arr}
+    for field in SNAPSHOT_FIELDS:
+        values = per_field[field]
+        snapshot[field] = np.fromiter((values.get(c, 0) for c in code_arr), dtype=np.int64, count=len(code_arr))
+    snapshot['inst'] = sum(snapshot[f] for f in INST_FIELDS) if len(code_arr) else np.zeros(0, dtype=np.int64)
+    return snapshot
+
+
+def save_snapshot(date: str, snapshot: dict):
+    path = snapshot_path(date)
+    tmp = path + '.tmp.npz'
+    np.savez(tmp, **snapshot)
+    os.replace(tmp, path)
+
+
+def load_snapshot(date: str):
+    path = snapshot_path(date)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as f:
+        return {k: f[k] for k in f.files}
+
+
+def snapshot_size(date: str) -> int:
+    """저장된 스냅샷 종목 수 (없으면 0, 휴장일 빈 스냅샷도 0) - 종목코드 배열만 읽음"""
+    path = snapshot_path(date)
+    if not os.path.exists(path):
+        return 0
+    with np.load(path) as f:
+        return len(f['codes'])
+
+
+def snapshot_version() -> int:
+    """가장 최근에 기록된 스냅샷 파일 시각 (ns, 없으면 0) - 스크리너 결과 캐시 키"""
+    with os.scandir(data_dir('market_flows')) as entries:
+        return max((e.stat().st_mtime_ns for e in entries if e.name.endswith('.npz')), default=0)
+
+
+def recent_weekdays(end: datetime, count: int) -> list:
+    """end 이전(포함) 평일 count개, 'YYYYMMDD' 오름차순 (휴장일은 빈 스냅샷으로 처리)"""
+    days = []
+    day = end
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day.strftime('%Y%m%d'))
+        day -= timedelta(days=1)
+    return sorted(days)
+
+
+def snapshots_to_store(snapshots: dict, store: SupplyStore) -> int:
+    """여러 날짜 스냅샷을 종목별로 묶어 저장소에 한 번씩 병합, 갱신 종목 수 반환"""
+    parts = [(int(date), snap) for date, snap in snapshots.items() if snap is not None and len(snap['codes'])]
+    if not parts:
+        return 0
+
+    codes = np.concatenate([snap['codes'] for _, snap in parts])
+    dates = np.concatenate([np.full(len(snap['codes']), date, dtype=np.int32) for date, snap in parts])
+    columns = {field: np.concatenate([snap[field] for _, snap in parts]) for field in FLOW_FIELDS}
+
+    order = np.lexsort((dates, codes))
+    codes = codes[order]
+    dates = dates[order]
+    columns = {field: values[order] for field, values in columns.items()}
+
+    bounds = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    starts = np.concatenate([[0], bounds])
+    ends = np.concatenate([bounds, [len(codes)]])
+
+    for s, e in zip(starts, ends):
+        code = str(codes[s])
+        cols = {'dates': dates[s:e], 'has_detail': np.ones(e - s, dtype=bool)}
+        for field in FLOW_FIELDS:
+            cols[field] = columns[field][s:e]
+        store.save(code, merge_columns(store.load(code), cols))
+    return len(starts)
+
+
+def ingest(dates: list, store: SupplyStore = None, refetch: bool = False) -> dict:
+    """날짜별 스냅샷 수집(이미 있으면 재사용) 후 종목별 저장소에 반영"""
+    store = store or SupplyStore()
+    today = datetime.now().strftime('%Y%m%d')
+    snapshots = {}
+    for date in dates:
+        # 당일 스냅샷은 장중 부분 데이터일 수 있으므로 항상 다시 수집
+        snap = None if (refetch or date == today) else load_snapshot(date)
+        if snap is None:
+            snap = fetch_market_snapshot(date)
+            save_snapshot(date, snap)
+        snapshots[date] = snap
+
+    updated = snapshots_to_store(snapshots, store)
+    return {'dates': len(dates), 'tickers': updated}
+
+
+def stack_snapshots(dates: list) -> tuple:
+    """저장된 스냅샷을 [일자(최신순), 종목] 2차원 배열로 정렬 (없는 종목은 0, present=False)"""
+    snaps = [load_snapshot(d) for d in sorted(dates, reverse=True)]
+    snaps = [s for s in snaps if s is not None and len(s['codes'])]
+    if not snaps:
+        return np.zeros(0, dtype='U6'), {}, np.zeros((0, 0), dtype=bool)
+
+    codes = np.unique(np.concatenate([s['codes'] for s in snaps]))
+    present = np.zeros((len(snaps), len(codes)), dtype=bool)
+    stacks = {field: np.zeros((len(snaps), len(codes)), dtype=np.int64) for field in FLOW_FIELDS}
+    for row, snap in enumerate(snaps):
+        pos = np.searchsorted(codes, snap['codes'])
+        present[row, pos] = True
+        for field in FLOW_FIELDS:
+            stacks[field][row, pos] = snap[field]
+    return codes, stacks, present
+
+
+def screen_signals(days: int = 7, end: datetime = None, signals: list = None) -> list:
+    """저장된 최근 스냅샷으로 전종목 종합 수급 판단 (네트워크 없음), 해당 신호 종목만 반환
+
+    휴장일(빈 스냅샷)은 건너뛰고 실제 거래일 days개로 집계
+    """
+    signals = signals or ACCUMULATION_SIGNALS
+    dates = [d for d in recent_weekdays(end or datetime.now(), days * 2) if snapshot_size(d)][-days:]
+    codes, stacks, present = stack_snapshots(dates)
+    if not len(codes):
+        return []
+
+    columns = aggregate_stacked_flows(stacks, present)
+    labels = classify_signals(columns)
+    wanted = np.isin(labels, [i for i, s in enumerate(SIGNALS) if s['text'] in signals])
+
+    results = []
+    for i in np.flatnonzero(wanted):
+        results.append({
+            'code': str(codes[i]),
+            'signal': SIGNALS[labels[i]]['text'],
+            'total_foreign': int(columns['total_foreign'][i]),
+            'total_inst': int(columns['total_inst'][i]),
+            'total_pension': int(columns['total_pension'][i]),
+            'buy_days': int(columns['buy_days'][i]),
+        })
+    # 신호 순서(강한 신호 먼저) → 외국인+기관 순매수 큰 순
+    order = {s: i for i, s in enumerate(signals)}
+    results.sort(key=lambda r: (order[r['signal']], -(r['total_foreign'] + r['total_inst'])))
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='KRX 전종목 투자자 수급 일괄 수집')
+    parser.add_argument('--days', type=int, default=1, help='최근 평일 수 (기본 1)')
+    parser.add_argument('--date', help='기준일 YYYYMMDD (기본 오늘)')
+    parser.add_argument('--refetch', action='store_true', help='저장된 스냅샷 무시하고 다시 수집')
+    args = parser.parse_args(argv)
+
+    end = datetime.strptime(args.date, '%Y%m%d') if args.date else datetime.now()
+    result = ingest(recent_weekdays(end, args.days), refetch=args.refetch)
+    print(f"{result['dates']}일 / {result['tickers']}종목 반영")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+계측 - 단계별 소요시간(span) / 캐시 조회·미스·오류 / 외부 요청 카운터 (Streamlit 비의존)
+
+    with metrics.span('render.tab1'): ...
+    @metrics.timed('fetch.get_daily_candle_naver')
+    metrics.inc('cache_lookups_total', function='get_stock_info_naver')
+
+Prometheus 텍스트: metrics.to_prometheus() / start_exporter(port=..., path=...)
+"""
+
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 소요시간 히스토그램 구간 (초)
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PREFIX = 'ob_'
+
+
+class Registry:
+    """카운터 + 단계별 소요시간 히스토그램 (스레드 안전)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.stages = {}
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, stage: str, seconds: float, error: bool = False):
+        with self._lock:
+            s = self.stages.get(stage)
+            if s is None:
+                s = self.stages[stage] = {'count': 0, 'sum': 0.0, 'max': 0.0, 'errors': 0,
+                                          'buckets': [0] * len(BUCKETS)}
+            s['count'] += 1
+            s['sum'] += seconds
+            s['max'] = max(s['max'], seconds)
+            s['errors'] += error
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    s['buckets'][i] += 1
+                    break
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {'counters': dict(self.counters),
+                    'stages': {k: dict(v, buckets=list(v['buckets'])) for k, v in self.stages.items()}}
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.stages.clear()
+
+
+registry = Registry()
+
+
+def inc(name: str, amount: float = 1, **labels):
+    registry.inc(name, amount, **labels)
+
+
+def observe(stage: str, seconds: float, error: bool = False):
+    registry.observe(stage, seconds, error)
+
+
+@contextmanager
+def span(stage: str):
+    """with 블록 소요시간 기록 (예외가 빠져나가면 오류로 집계)"""
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        registry.observe(stage, time.perf_counter() - started, error)
+
+
+def timed(stage: str):
+    """함수 호출 소요시간 기록 데코레이터"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def stage_table() -> list:
+    """단계별 요약 (관리자 화면용)"""
+    rows = []
+    for stage, s in sorted(registry.snapshot()['stages'].items()):
+        rows.append({'stage': stage, 'count': s['count'], 'avg_ms': round(s['sum'] / s['count'] * 1000, 1),
+                     'max_ms': round(s['max'] * 1000, 1), 'total_s': round(s['sum'], 2), 'errors': s['errors']})
+    return rows
+
+
+def cache_table() -> list:
+    """함수별 캐시 조회 / 적중 / 미스 / 오류 (적중 = 조회 - 미스)"""
+    by_func = {}
+    for (name, labels), value in registry.snapshot()['counters'].items():
+        labels = dict(labels)
+        if name.startswith('cache_') and 'function' in labels:
+            by_func.setdefault(labels['function'], {})[name[len('cache_'):-len('_total')]] = int(value)
+    rows = []
+    for func, c in sorted(by_func.items()):
+        lookups, misses = c.get('lookups', 0), c.get('misses', 0)
+        rows.append({'function': func, 'lookups': lookups, 'hits': max(0, lookups - misses), 'misses': misses,
+                     'errors': c.get('errors', 0),
+                     'hit_ratio': round((lookups - misses) / lookups, 3) if lookups else None})
+    return rows
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+
+def to_prometheus() -> str:
+    """Prometheus 텍스트 노출 형식"""
+    snap = registry.snapshot()
+    lines = []
+
+    by_name = {}
+    for (name, labels), value in sorted(snap['counters'].items()):
+        by_name.setdefault(name, []).append((labels, value))
+    for name, series in by_name.items():
+        lines.append(f'# TYPE {PREFIX}{name} counter')
+        for labels, value in series:
+            lines.append(f'{PREFIX}{name}{_labels(labels)} {value:g}')
+
+    if snap['stages']:
+        lines.append(f'# TYPE {PREFIX}stage_seconds histogram')
+        for stage, s in sorted(snap['stages'].items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS, s['buckets']):
+                cumulative += n
+                lines.append(f'{PREFIX}stage_seconds_bucket{_labels([("stage", stage), ("le", f"{bound:g}")])} {cumulative}')
+            lines.append(f'{PREFIX}stage_seconds_bucket{_labels([("stage", stage), ("le", "+Inf")])} {s["count"]}')
+            lines.append(f'{PREFIX}stage_seconds_sum{_labels([("stage", stage)])} {s["sum"]:.6f}')
+            lines.append(f'{PREFIX}stage_seconds_count{_labels([("stage", stage)])} {s["count"]}')
+        lines.append(f'# TYPE {PREFIX}stage_errors_total counter')
+        for stage, s in sorted(snap['stages'].items()):
+            lines.append(f'{PREFIX}stage_errors_total{_labels([("stage", stage)])} {s["errors"]}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(path: str):
+    """Prometheus 텍스트 파일 저장 (node_exporter textfile 수집기용, 원자적 교체)"""
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(to_prometheus())
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = to_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_exporter(port: int = None, path: str = None, interval: float = 15, host: str = '127.0.0.1'):
+    """/metrics HTTP 엔드포인트 및/또는 주기적 파일 저장 (백그라운드 데몬 스레드)
+
+    HTTP는 기본으로 로컬에서만 접근 (외부 수집기가 직접 긁어야 하면 host='0.0.0.0')
+    """
+    if port:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+
+    if path:
+        def loop():
+            while True:
+                try:
+                    write_prometheus(path)
+                except OSError:
+                    pass
+                time.sleep(interval)
+        threading.Thread(target=loop, name='metrics-file', daemon=True).start()
@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+"""
+전종목 다년 일봉 컬럼 저장소 - 필드별 연속 배열 파일(np.memmap) + 종목별 구간 인덱스
+
+구조 (data/ohlcv/):
+    date.bin (int32 YYYYMMDD) / open, high, low, close.bin (int32) / volume.bin (int64)
+    index.npz  codes, starts, lengths, capacity  (종목 i = 각 필드[starts[i] : starts[i] + lengths[i]])
+
+종목마다 여유 공간(headroom)을 두어 새 거래일은 자기 구간 끝에 제자리 기록 → 전체 재작성 없음.
+여유가 없으면 해당 종목만 파일 끝으로 옮기고 (빈 자리는 compact 때 정리), 신규 상장 종목도 파일 끝에 추가.
+bars(code)는 memmap 뷰(복사 없음)를 반환하므로 detect_order_blocks_arrays에 바로 넘길 수 있다.
+
+사용법:
+    python ohlcv_archive.py build --watchlist watchlist.txt     # 수집해서 새로 만들기
+    python ohlcv_archive.py update                              # 저장된 전 종목 최근 일봉 추가
+    python ohlcv_archive.py scan --lookback 250                 # 전 종목 오더블록 스캔
+    python ohlcv_archive.py info
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from config import data_dir
+from orderblock import detect_order_blocks_arrays
+
+FIELDS = {
+    'date': np.int32,
+    'open': np.int32,
+    'high': np.int32,
+    'low': np.int32,
+    'close': np.int32,
+    'volume': np.int64,
+}
+DEFAULT_HEADROOM = 260  # 종목당 여유 거래일 (약 1년)
+
+
+def frame_to_columns(df: pd.DataFrame) -> dict:
+    """일봉 DataFrame(날짜 인덱스) → 필드별 배열 (날짜 오름차순, 중복 날짜 제거)"""
+    if df is None or df.empty:
+        return {f: np.empty(0, dtype=t) for f, t in FIELDS.items()}
+    df = df[~df.index.duplicated(keep='last')].sort_index()
+    idx = pd.DatetimeIndex(df.index)
+    columns = {'date': (idx.year * 10000 + idx.month * 100 + idx.day).to_numpy(dtype=np.int32)}
+    for field in ('open', 'high', 'low', 'close', 'volume'):
+        columns[field] = df[field].to_numpy(dtype=FIELDS[field])
+    return columns
+
+
+class OHLCVArchive:
+    """필드별 memmap + 종목 인덱스 (쓰기는 프로세스 1개, 읽기는 여러 프로세스 가능)"""
+
+    def __init__(self, root: str = None, writable: bool = False):
+        self.root = root or data_dir('ohlcv')
+        self.writable = writable
+        self._load_index()
+        self._open_fields()
+
+    # ---------- 파일 ----------
+
+    def _field_path(self, field: str) -> str:
+        return os.path.join(self.root, f'{field}.bin')
+
+    def _load_index(self):
+        path = os.path.join(self.root, 'index.npz')
+        if os.path.exists(path):
+            with np.load(path) as z:
+                self.codes = z['codes'].astype('U6')
+                self.starts = z['starts'].astype(np.int64)
+                self.lengths = z['lengths'].astype(np.int64)
+                self.capacity = z['capacity'].astype(np.int64)
+        else:
+            self.codes = np.empty(0, dtype='U6')
+            self.starts = np.empty(0, dtype=np.int64)
+            self.lengths = np.empty(0, dtype=np.int64)
+            self.capacity = np.empty(0, dtype=np.int64)
+        self._pos = {c: i for i, c in enumerate(self.codes.tolist())}
+
+    def _save_index(self):
+        tmp = os.path.join(self.root, 'index.tmp.npz')
+        np.savez(tmp, codes=self.codes, starts=self.starts, lengths=self.lengths, capacity=self.capacity)
+        os.replace(tmp, os.path.join(self.root, 'index.npz'))
+
+    def _open_fields(self):
+        self.total = int((self.starts + self.capacity).max()) if len(self.codes) else 0
+        mode = 'r+' if self.writable else 'r'
+        self.arrays = {}
+        for field, dtype in FIELDS.items():
+            path = self._field_path(field)
+            if self.total == 0 or not os.path.exists(path):
+                self.arrays[field] = np.empty(0, dtype=dtype)
+            else:
+                self.arrays[field] = np.memmap(path, dtype=dtype, mode=mode, shape=(self.total,))
+
+    def refresh(self):
+        """다른 프로세스가 추가한 내용 다시 읽기"""
+        self._load_index()
+        self._open_fields()
+
+    # ---------- 읽기 ----------
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._pos
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def bars(self, code: str, days: int = None) -> dict:
+        """필드별 memmap 뷰 (복사 없음, 날짜 오름차순). days 지정 시 최근 days개"""
+        i = self._pos.get(code)
+        if i is None:
+            return {f: np.empty(0, dtype=t) for f, t in FIELDS.items()}
+        start, length = int(self.starts[i]), int(self.lengths[i])
+        if days is not None:
+            start, length = start + max(0, length - days), min(length, days)
+        return {f: a[start:start + length] for f, a in self.arrays.items()}
+
+    def frame(self, code: str, days: int = None) -> pd.DataFrame:
+        """get_daily_candle_naver와 같은 형식의 DataFrame (복사본)"""
+        bars = self.bars(code, days)
+        index = pd.to_datetime(bars['date'].astype(str), format='%Y%m%d')
+        return pd.DataFrame({f: np.asarray(bars[f]) for f in ('open', 'high', 'low', 'close', 'volume')},
+                            index=pd.DatetimeIndex(index, name='date'))
+
+    def last_date(self, code: str):
+        i = self._pos.get(code)
+        if i is None or self.lengths[i] == 0:
+            return None
+        return int(self.arrays['date'][self.starts[i] + self.lengths[i] - 1])
+
+    def info(self) -> dict:
+        used = int(self.lengths.sum())
+        return {'codes': len(self.codes), 'bars': used, 'slots': self.total,
+                'fill_pct': round(used / self.total * 100, 1) if self.total else 0.0,
+                'bytes': sum(os.path.getsize(self._field_path(f)) for f in FIELDS
+                             if os.path.exists(self._field_path(f)))}
+
+    # ---------- 쓰기 ----------
+
+    @classmethod
+    def create(cls, root: str, frames: dict, headroom: int = DEFAULT_HEADROOM) -> 'OHLCVArchive':
+        """{종목코드: 일봉 DataFrame} → 새 저장소 (기존 파일 덮어씀)"""
+        os.makedirs(root, exist_ok=True)
+        codes = sorted(frames)
+        columns = [frame_to_columns(frames[c]) for c in codes]
+        lengths = np.array([len(c['date']) for c in columns], dtype=np.int64)
+        capacity = lengths + headroom
+        starts = np.concatenate([[0], np.cumsum(capacity)[:-1]]).astype(np.int64) if codes else np.empty(0, np.int64)
+        total = int(capacity.sum())
+
+        for field, dtype in FIELDS.items():
+            data = np.zeros(total, dtype=dtype)
+            for start, col in zip(starts, columns):
+                data[start:start + len(col[field])] = col[field]
+            tmp = os.path.join(root, f'{field}.bin.tmp')
+            data.tofile(tmp)
+            os.replace(tmp, os.path.join(root, f'{field}.bin'))
+
+        archive = cls.__new__(cls)
+        archive.root = root
+        archive.writable = True
+        archive.codes = np.array(codes, dtype='U6')
+        archive.starts, archive.lengths, archive.capacity = starts, lengths, capacity
+        archive._pos = {c: i for i, c in enumerate(codes)}
+        archive._save_index()
+        archive._open_fields()
+        return archive
+
+    def _grow(self, extra: int) -> int:
+        """모든 필드 파일 끝에 extra칸 추가, 추가된 구간 시작 위치 반환"""
+        start = self.total
+        for field, dtype in FIELDS.items():
+            with open(self._field_path(field), 'ab') as f:
+                f.write(np.zeros(extra, dtype=dtype).tobytes())
+        self.total += extra
+        mode = 'r+' if self.writable else 'r'
+        for field, dtype in FIELDS.items():
+            self.arrays[field] = np.memmap(self._field_path(field), dtype=dtype, mode=mode, shape=(self.total,))
+        return start
+
+    def _relocate(self, i: int, need: int, headroom: int):
+        """종목 i를 파일 끝의 더 큰 구간으로 이동"""
+        start, length = int(self.starts[i]), int(self.lengths[i])
+        new_capacity = need + headroom
+        new_start = self._grow(new_capacity)
+        for a in self.arrays.values():
+            a[new_start:new_start + length] = a[start:start + length]
+        self.starts[i] = new_start
+        self.capacity[i] = new_capacity
+
+    def _add_code(self, code: str, capacity: int) -> int:
+        start = self._grow(capacity)
+        self.codes = np.append(self.codes, np.array([code], dtype='U6'))
+        self.starts = np.append(self.starts, start)
+        self.lengths = np.append(self.lengths, 0)
+        self.capacity = np.append(self.capacity, capacity)
+        self._pos[code] = len(self.codes) - 1
+        return self._pos[code]
+
+    def append(self, frames: dict, headroom: int = DEFAULT_HEADROOM) -> int:
+        """{종목코드: 일봉 DataFrame} 중 저장된 마지막 날짜 이후 봉만 추가, 추가된 봉 수 반환"""
+        if not self.writable:
+            raise PermissionError('읽기 전용으로 연 저장소')
+        added = 0
+        for code, df in frames.items():
+            col = frame_to_columns(df)
+            last = self.last_date(code)
+            if last is not None:
+                keep = col['date'] > last
+                col = {f: v[keep] for f, v in col.items()}
+            n = len(col['date'])
+            if n == 0:
+                continue
+
+            i = self._pos.get(code)
+            if i is None:
+                i = self._add_code(code, n + headroom)
+            elif self.lengths[i] + n > self.capacity[i]:
+                self._relocate(i, int(self.lengths[i]) + n, headroom)
+
+            at = int(self.starts[i] + self.lengths[i])
+            for field, values in col.items():
+                self.arrays[field][at:at + n] = values
+            self.lengths[i] += n
+            added += n
+
+        if added:
+            for a in self.arrays.values():
+                if isinstance(a, np.memmap):
+                    a.flush()
+            # 데이터를 먼저 기록한 뒤 인덱스 교체 (중간에 중단돼도 인덱스는 일관됨)
+            self._save_index()
+        return added
+
+    def compact(self, headroom: int = DEFAULT_HEADROOM) -> 'OHLCVArchive':
+        """빈 구간 정리 + 여유 공간 재배정 (저장소 전체 재작성, 가끔 실행)"""
+        frames = {code: self.frame(code) for code in self.codes.tolist()}
+        for a in self.arrays.values():
+            if isinstance(a, np.memmap):
+                a.flush()
+        self.arrays = {}
+        return OHLCVArchive.create(self.root, frames, headroom)
+
+    # ---------- 분석 ----------
+
+    def scan_order_blocks(self, lookback: int = 50, body_multiplier: float = 1.5, days: int = None) -> dict:
+        """전 종목 오더블록 (memmap 뷰로 바로 계산)"""
+        results = {}
+        for code in self.codes.tolist():
+            b = self.bars(code, days)
+            results[code] = detect_order_blocks_arrays(b['open'], b['high'], b['low'], b['close'], b['date'],
+                                                       lookback, body_multiplier)
+        return results
+
+
+def _fetch_frames(codes: list, days: int, concurrency: int) -> dict:
+    import fetchers
+
+    def fetch(code):
+        try:
+            return code, fetchers.fetch_daily_candle(code, days)
+        except Exception as e:
+            print(f'{code} 수집 실패: {e}', file=sys.stderr)
+            return code, None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return {code: df for code, df in pool.map(fetch, codes) if df is not None and not df.empty}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='전종목 일봉 컬럼 저장소 (memmap)')
+    parser.add_argument('--root', help='저장소 디렉터리 (기본 data/ohlcv)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help='수집해서 새로 만들기')
+    build.add_argument('--watchlist', help='종목코드 파일 (생략 시 종목 마스터 전체)')
+    build.add_argument('--days', type=int, default=100)
+    build.add_argument('--concurrency', type=int, default=8)
+    build.add_argument('--headroom', type=int, default=DEFAULT_HEADROOM)
+
+    update = sub.add_parser('update', help='저장된 전 종목 최근 일봉 추가')
+    update.add_argument('--days', type=int, default=10)
+    update.add_argument('--concurrency', type=int, default=8)
+
+    scan = sub.add_parser('scan', help='전 종목 오더블록 스캔')
+    scan.add_argument('--lookback', type=int, default=50)
+    scan.add_argument('--days', type=int)
+
+    sub.add_parser('compact', help='빈 구간 정리')
+    sub.add_parser('info', help='저장소 요약')
+    args = parser.parse_args(argv)
+    root = args.root or data_dir('ohlcv')
+
+    if args.command == 'build':
+        if args.watchlist:
+            from batch_cli import read_watchlist
+            codes = read_watchlist(args.watchlist)
+        else:
+            from symbol_master import get_symbol_master
+            master = get_symbol_master(background=False)
+            if not master.index.rows:
+                master.refresh()
+            codes = [r['code'] for r in master.index.rows]
+        frames = _fetch_frames(codes, args.days, args.concurrency)
+        archive = OHLCVArchive.create(root, frames, args.headroom)
+        print(json.dumps(archive.info(), ensure_ascii=False))
+        return 0 if frames else 2
+
+    if args.command == 'update':
+        archive = OHLCVArchive(root, writable=True)
+        frames = _fetch_frames(archive.codes.tolist(), args.days, args.concurrency)
+        added = archive.append(frames)
+        print(json.dumps(dict(archive.info(), added=added), ensure_ascii=False))
+        return 0
+
+    if args.command == 'compact':
+        archive = OHLCVArchive(root, writable=True).compact()
+        print(json.dumps(archive.info(), ensure_ascii=False))
+        return 0
+
+    archive = OHLCVArchive(root)
+    if args.command == 'scan':
+        started = time.perf_counter()
+        results = archive.scan_order_blocks(args.lookback, days=args.days)
+        elapsed = time.perf_counter() - started
+        found = {code: blocks for code, blocks in results.items() if blocks}
+        json.dump(found, sys.stdout, ensure_ascii=False, default=lambda v: v.item())
+        sys.stdout.write('\n')
+        print(f'{len(results)}종목 중 {len(found)}종목 오더블록, {elapsed:.2f}초', file=sys.stderr)
+        return 0
+
+    print(json.dumps(archive.info(), ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
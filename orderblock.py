@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+오더블록 감지 / 손절·진입·익절 레벨 계산 / 미티게이션(형성 이후 가격 재진입) 추적
+
+레벨 계산은 오더블록 dict의 원 단위 정수 가격으로 바로 하고 (중간값은 top + bottom, ±5%는 정수 비율 비교),
+손절가는 KRX 호가단위에 맞춰 내림 → 표시 / 주문에 그대로 쓸 수 있는 가격
+"""
+
+from bisect import bisect_right
+
+import numpy as np
+import pandas as pd
+
+import metrics
+
+
+def detect_order_blocks(df: pd.DataFrame, lookback: int = 50, body_multiplier: float = 1.5) -> list:
+    if df is None or len(df) < 15:
+        return []
+    return detect_order_blocks_arrays(df['open'].values, df['high'].values, df['low'].values,
+                                      df['close'].values, df.index, lookback, body_multiplier)
+
+
+def format_date(value) -> str:
+    """Timestamp / datetime64 / YYYYMMDD 정수 → 'YYYY-MM-DD'"""
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, (int, np.integer)):
+        value = int(value)
+        return f'{value // 10000:04d}-{value // 100 % 100:02d}-{value % 100:02d}'
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
+
+
+class SparseTable:
+    """정적 배열 구간 최소 / 최대 (전처리 O(n log n), 조회 O(1))
+
+    levels[j][i] = values[i : i + 2**j] 의 최소(최대)
+    """
+
+    def __init__(self, values, op=np.minimum):
+        self.op = op
+        levels = [np.asarray(values)]
+        width = 1
+        while width * 2 <= len(levels[0]):
+            prev = levels[-1]
+            levels.append(op(prev[:-width], prev[width:]))
+            width *= 2
+        self.levels = levels
+        self.n = len(levels[0])
+
+    def query(self, lo: int, hi: int):
+        """values[lo:hi] 의 최소(최대), lo < hi"""
+        j = int(hi - lo).bit_length() - 1
+        level = self.levels[j]
+        return self.op(level[lo], level[hi - (1 << j)])
+
+    def first_reaching(self, start: int, limit, strict: bool = False) -> int:
+        """start 이후 처음으로 limit에 닿는 위치 (최소 테이블: 값 <= limit, 최대 테이블: 값 >= limit), 없으면 -1
+
+        strict면 넘어선 위치 (값 < limit / 값 > limit)
+        큰 구간부터 '아직 닿지 않음'이 확인된 만큼 건너뛰므로 O(log n)
+        """
+        if self.op is np.minimum:
+            reached = (lambda v: v < limit) if strict else (lambda v: v <= limit)
+        else:
+            reached = (lambda v: v > limit) if strict else (lambda v: v >= limit)
+        pos = start
+        for j in range(len(self.levels) - 1, -1, -1):
+            if pos + (1 << j) <= self.n and not reached(self.levels[j][pos]):
+                pos += 1 << j
+        return pos if pos < self.n else -1
+
+
+def annotate_mitigation(order_blocks: list, highs, lows, dates, positions: list) -> list:
+    """오더블록별 형성 이후 미티게이션 여부 / 날짜 / 이탈 여부 / 날짜 기록 (오더블록 dict에 직접 추가)
+
+    positions[k] = order_blocks[k] 기준봉 위치. 확인봉(기준봉 다음 봉) 이후부터 검사
+    상승 OB: 저가가 상단 이하로 내려오면 미티게이션, 하단 아래로 내려가면 이탈 (하락 OB는 반대)
+    """
+    if not order_blocks:
+        return order_blocks
+    # 가장 오래된 오더블록 이후 구간만 테이블로 (긴 배열에서 최근 lookback만 볼 때 전처리 비용 절감)
+    base = min(positions) + 2
+    n = len(lows) - base
+    if n > 0:
+        low_table = SparseTable(lows[base:], np.minimum)
+        high_table = SparseTable(highs[base:], np.maximum)
+
+    for ob, i in zip(order_blocks, positions):
+        start = i + 2 - base
+        at = broken_at = -1
+        if start < n:
+            if ob['type'] == 'bullish':
+                at = low_table.first_reaching(start, ob['top'])
+                broken_at = low_table.first_reaching(start, ob['bottom'], strict=True)
+            else:
+                at = high_table.first_reaching(start, ob['bottom'])
+                broken_at = high_table.first_reaching(start, ob['top'], strict=True)
+        ob['mitigated'] = at >= 0
+        ob['mitigated_date'] = format_date(dates[base + at]) if at >= 0 else None
+        ob['broken'] = broken_at >= 0
+        ob['broken_date'] = format_date(dates[base + broken_at]) if broken_at >= 0 else None
+    return order_blocks
+
+
+@metrics.timed('analysis.detect_order_blocks')
+def detect_order_blocks_arrays(opens, highs, lows, closes, dates, lookback: int = 50,
+                               body_multiplier: float = 1.5) -> list:
+    """배열 입력 오더블록 감지 (memmap 뷰 등을 복사 없이 사용)
+
+    dates: DatetimeIndex / datetime64 배열 / YYYYMMDD 정수 배열 (오더블록이 나온 봉만 문자열로 변환)
+    """
+    n = len(closes)
+    if n < 15:
+        return []
+    order_blocks = []
+    positions = []
+
+    for i in range(n - 2, max(n - lookback, 10), -1):
+        try:
+            curr_open = opens[i + 1]
+            curr_close = closes[i + 1]
+            curr_body = abs(curr_close - curr_open)
+
+            prev_open = opens[i]
+            prev_close = closes[i]
+            prev_high = highs[i]
+            prev_low = lows[i]
+
+            avg_body = np.mean([abs(closes[k] - opens[k]) for k in range(max(0, i - 10), i)])
+            if avg_body == 0:
+                continue
+
+            if (prev_close < prev_open) and (curr_close > curr_open) and \
+               (curr_close > prev_high) and (curr_body > avg_body * body_multiplier):
+                order_blocks.append({
+                    'type': 'bullish', 'type_kr': '상승',
+                    'date': format_date(dates[i]), 'top': prev_high, 'bottom': prev_low,
+                    'strength': curr_body / avg_body
+                })
+                positions.append(i)
+
+            if (prev_close > prev_open) and (curr_close < curr_open) and \
+               (curr_close < prev_low) and (curr_body > avg_body * body_multiplier):
+                order_blocks.append({
+                    'type': 'bearish', 'type_kr': '하락',
+                    'date': format_date(dates[i]), 'top': prev_high, 'bottom': prev_low,
+                    'strength': curr_body / avg_body
+                })
+                positions.append(i)
+        except Exception:
+            continue
+
+    annotate_mitigation(order_blocks, highs, lows, dates, positions)
+    order_blocks.sort(key=lambda x: x['strength'], reverse=True)
+    return order_blocks
+
+
+# KRX 호가단위 (유가증권 / 코스닥 공통, 2023년 개편 기준): 가격 < 경계 → 단위
+TICK_BOUNDS = (2000, 5000, 20000, 50000, 200000, 500000)
+TICK_SIZES = (1, 5, 10, 50, 100, 500, 1000)
+
+STOP_LOSS_PERMILLE = 998  # 손절가 = 상승 OB 하단의 99.8% 이하 첫 호가
+
+
+def tick_size(price: int) -> int:
+    """가격별 호가단위"""
+    return TICK_SIZES[bisect_right(TICK_BOUNDS, price)]
+
+
+def stop_loss_price(bottom) -> int:
+    """상승 OB 하단 → 손절가 (하단의 99.8%에서 호가단위로 내림)"""
+    stop = int(round(bottom)) * STOP_LOSS_PERMILLE // 1000
+    return stop - stop % tick_size(stop)
+
+
+@metrics.timed('analysis.calculate_levels')
+def calculate_levels(current_price: float, order_blocks: list, exclude_mitigated: bool = False) -> dict:
+    """exclude_mitigated: 형성 이후 이미 가격이 다녀간 오더블록은 진입 / 익절 / 손절 계산에서 제외
+
+    가격은 원 단위 정수로, 중간값은 2배(top + bottom)로 비교해 소수 없이 계산 (±5%도 정수 비율로)
+    """
+    if exclude_mitigated:
+        order_blocks = [ob for ob in order_blocks if not ob.get('mitigated')]
+    price = int(round(current_price))
+    result = {
+        'entry_zones': [], 'take_profit_zones': [],
+        'stop_loss': None, 'nearest_support': None, 'nearest_resistance': None
+    }
+
+    bullish_obs = [ob for ob in order_blocks if ob['type'] == 'bullish']
+    bearish_obs = [ob for ob in order_blocks if ob['type'] == 'bearish']
+
+    # 중간값 x 2 = top + bottom
+    result['entry_zones'] = [ob for ob in bullish_obs if (ob['top'] + ob['bottom']) * 10 <= price * 21]
+    result['take_profit_zones'] = [ob for ob in bearish_obs if (ob['top'] + ob['bottom']) * 10 >= price * 19]
+
+    supports = [ob for ob in bullish_obs if ob['top'] + ob['bottom'] < 2 * price]
+    if supports:
+        nearest = max(supports, key=lambda x: x['top'] + x['bottom'])
+        result['nearest_support'] = nearest
+        result['stop_loss'] = stop_loss_price(nearest['bottom'])
+
+    resistances = [ob for ob in bearish_obs if ob['top'] + ob['bottom'] > 2 * price]
+    if resistances:
+        result['nearest_resistance'] = min(resistances, key=lambda x: x['top'] + x['bottom'])
+
+    return result
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+탭 간 추측 선수집 - 한 탭에서 분석한 종목의 다른 탭 데이터를 백그라운드로 미리 캐시에 채움
+
+오더블록 탭 분석 → 수급 탭 데이터, 수급 탭 조회 → 일봉을 미리 수집 (대부분 두 탭을 번갈아 봄)
+세션별 동시 선수집 수를 제한해 한 사용자가 외부 요청을 독점하지 않게 하고,
+선수집한 데이터를 같은 세션이 실제로 조회했는지(사용률)를 집계
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+MAX_WORKERS = 8   # 프로세스 전체 선수집 스레드 수
+USE_WINDOW = 300  # 이 시간(초) 안에 조회해야 사용으로 집계 (수급 캐시 TTL과 같게)
+
+
+class Prefetcher:
+    """세션별 동시 실행 수가 제한된 백그라운드 선수집 (스레드 안전)"""
+
+    def __init__(self, per_session: int = 2, max_workers: int = MAX_WORKERS, use_window: float = USE_WINDOW):
+        self.per_session = per_session
+        self.use_window = use_window
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prefetch')
+        self._lock = threading.Lock()
+        self._running = {}  # 세션 → 실행 중인 선수집 수
+        self._issued = {}   # (세션, 키) → (시작 시각, Future)
+        self._stats = {'issued': 0, 'used': 0, 'unused': 0, 'limited': 0, 'waited': 0, 'errors': 0}
+
+    def _count(self, name: str):
+        self._stats[name] += 1
+        metrics.inc('prefetch_total', result=name)
+
+    def _expire(self, now: float):
+        """USE_WINDOW 동안 조회되지 않은 선수집은 미사용으로 집계하고 정리"""
+        for item, (started, _) in list(self._issued.items()):
+            if now - started > self.use_window:
+                del self._issued[item]
+                self._count('unused')
+
+    def _run(self, session_id: str, func):
+        try:
+            with metrics.span('prefetch.run'):
+                func()
+        except Exception:
+            with self._lock:
+                self._count('errors')
+        finally:
+            with self._lock:
+                self._running[session_id] -= 1
+                if not self._running[session_id]:
+                    del self._running[session_id]
+
+    def submit(self, session_id: str, key: tuple, func) -> bool:
+        """선수집 시작 (같은 키가 이미 있거나 세션 한도에 걸리면 False)"""
+        with self._lock:
+            self._expire(time.time())
+            if (session_id, key) in self._issued:
+                return False
+            if self._running.get(session_id, 0) >= self.per_session:
+                self._count('limited')
+                return False
+            self._running[session_id] = self._running.get(session_id, 0) + 1
+            self._count('issued')
+            future = self._pool.submit(self._run, session_id, func)
+            self._issued[(session_id, key)] = (time.time(), future)
+        return True
+
+    def claim(self, session_id: str, key: tuple, wait: float = 5.0) -> bool:
+        """같은 세션이 선수집한 데이터를 조회 - 사용으로 집계, 아직 실행 중이면 wait초까지 기다려 중복 요청 방지"""
+        with self._lock:
+            entry = self._issued.pop((session_id, key), None)
+            if entry is None:
+                return False
+            self._count('used')
+            if not entry[1].done():
+                self._count('waited')
+        try:
+            entry[1].result(timeout=wait)
+        except Exception:
+            pass
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._expire(time.time())
+            stats = dict(self._stats, running=sum(self._running.values()), pending=len(self._issued))
+        settled = stats['used'] + stats['unused']
+        stats['use_rate'] = round(stats['used'] / settled, 3) if settled else None
+        return stats
@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+"""
+외부 데이터 소스 오프라인 대역 서버 - 네이버 금융 / KRX / Google Sheets 응답 녹화 · 재생
+
+사용법:
+    python replay_server.py --port 8700 --latency 80 --jitter 40 --error-rate 0.02 --pages 10
+    python replay_server.py --port 8700 --record          # 실제 사이트로 전달하면서 응답 녹화
+
+    # 앱 / CLI를 대역 서버로 연결
+    OB_NAVER_URL=http://127.0.0.1:8700 OB_NAVER_CHART_URL=http://127.0.0.1:8700 OB_KRX_URL=http://127.0.0.1:8700 \\
+    OB_SHEETS_URL=http://127.0.0.1:8700 streamlit run app.py
+
+재생 시 녹화된 응답이 없으면 종목코드 기준으로 고정된 합성 데이터로 응답 (--no-synthetic 이면 404)
+GET /__stats : 경로별 요청 수 / 주입된 오류 수
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote_to_bytes, urlparse
+
+import numpy as np
+
+import http_client
+from benchmarks import fixtures
+from config import data_dir
+from fetchers import KRX_INVESTOR_FIELDS
+
+# 녹화 시 전달할 실제 주소 (경로 앞부분으로 구분)
+UPSTREAMS = [
+    ('/comm/', 'http://data.krx.co.kr'),
+    ('/spreadsheets/', 'https://docs.google.com'),
+    ('/sise.nhn', 'https://fchart.stock.naver.com'),
+    ('/', 'https://finance.naver.com'),
+]
+
+ROWS_PER_PAGE = {'sise_day': 10, 'frgn': 20}
+MEMO_SIZE = 4096   # 종목별 합성 데이터 보관 수
+
+# 합성 종목 목록 (앞쪽은 실제 종목명, 나머지는 번호)
+KNOWN_NAMES = {
+    '005930': '삼성전자', '000660': 'SK하이닉스', '373220': 'LG에너지솔루션', '207940': '삼성바이오로직스',
+    '005380': '현대차', '035420': 'NAVER', '035720': '카카오', '068270': '셀트리온',
+}
+
+
+def build_universe(size: int) -> list:
+    """[(종목코드, 종목명, 시장)] - 짝수 번째 코스피, 홀수 번째 코스닥"""
+    rows = [(code, name, 'KOSPI') for code, name in KNOWN_NAMES.items()]
+    i = 1
+    while len(rows) < size:
+        code = f'{i * 1000 + 100:06d}'[-6:]
+        if code not in KNOWN_NAMES:
+            rows.append((code, f'합성종목{i}', 'KOSPI' if i % 2 == 0 else 'KOSDAQ'))
+        i += 1
+    return rows[:size]
+
+
+def cassette_key(method: str, path: str, params: dict) -> str:
+    raw = json.dumps([method, path, sorted(params.items())], ensure_ascii=False)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class CassetteStore:
+    """녹화 응답 파일 저장소 (요청 1개 = JSON 파일 1개)"""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f'{key}.json')
+
+    def load(self, key: str):
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                item = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return item['status'], item['content_type'], base64.b64decode(item['body'])
+
+    def save(self, key: str, request: dict, status: int, content_type: str, body: bytes):
+        item = dict(request, status=status, content_type=content_type,
+                    body=base64.b64encode(body).decode('ascii'))
+        tmp = self._path(key) + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(item, f, ensure_ascii=False)
+        os.replace(tmp, self._path(key))
+
+
+class SyntheticUpstream:
+    """녹화가 없을 때 쓰는 합성 응답 (같은 요청 → 항상 같은 응답)"""
+
+    def __init__(self, pages: int = 10, universe: int = 200, history: int = 750):
+        self.pages = pages
+        self.history = max(history, pages * ROWS_PER_PAGE['frgn'])
+        self.universe = build_universe(universe)
+        self.names = {code: name for code, name, _ in self.universe}
+        self.today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self._candles = {}  # 종목 → 합성 일봉 (인스턴스별, 가득 차면 비움)
+        self._supply = {}   # 종목 → 합성 수급 행
+
+    @staticmethod
+    def _seed(code: str) -> int:
+        return int(code) if code.isdigit() else int(hashlib.sha1(code.encode()).hexdigest()[:8], 16)
+
+    @staticmethod
+    def _memo(cache: dict, code: str, make):
+        value = cache.get(code)
+        if value is None:
+            if len(cache) >= MEMO_SIZE:
+                cache.clear()
+            value = cache[code] = make(code)
+        return value
+
+    def candles(self, code: str):
+        return self._memo(self._candles, code, lambda c: fixtures.make_candles(self.history, seed=self._seed(c),
+                                                                               end=self.today))
+
+    def supply_rows(self, code: str) -> list:
+        return self._memo(self._supply, code, self._make_supply_rows)
+
+    def _make_supply_rows(self, code: str) -> list:
+        # 일봉과 같은 거래일 (백필 연속성 확인이 통과하도록)
+        dates = self.candles(code).index[::-1][:self.pages * ROWS_PER_PAGE['frgn']]
+        rows = fixtures.make_supply_rows(len(dates), seed=self._seed(code), end=self.today)
+        return [dict(r, date=d.to_pydatetime()) for r, d in zip(rows, dates)]
+
+    def _page(self, rows, page: int, kind: str):
+        size = ROWS_PER_PAGE[kind]
+        if page < 1 or page > self.pages:
+            return rows[:0]
+        return rows[(page - 1) * size:page * size]
+
+    def route(self, method: str, path: str, params: dict):
+        """(상태코드, Content-Type, 본문) 또는 None (합성 불가 경로)"""
+        code = params.get('code', '')
+        page = int(params.get('page', 1) or 1)
+        html = 'text/html; charset=euc-kr'
+
+        if path == '/item/sise_day.naver':
+            df = self.candles(code)
+            rows = self._page(df.iloc[::-1], page, 'sise_day')
+            if rows.empty:
+                return 200, html, b'<html><body></body></html>'
+            return 200, html, fixtures.sise_day_html(rows).encode('euc-kr')
+
+        if path == '/sise.nhn':
+            symbol = params.get('symbol', '')
+            df = self.candles(symbol).tail(max(0, int(params.get('count', 0) or 0)))
+            body = fixtures.chart_xml(df, symbol, self.names.get(symbol, symbol))
+            return 200, 'text/xml; charset=euc-kr', body.encode('euc-kr')
+
+        if path == '/item/frgn.naver':
+            rows = self._page(self.supply_rows(code), page, 'frgn')
+            if not rows:
+                return 200, html, b'<html><body></body></html>'
+            close = int(self.candles(code)['close'].iloc[-1])
+            return 200, html, fixtures.frgn_html(rows, close).encode('euc-kr')
+
+        if path == '/item/main.naver':
+            df = self.candles(code)
+            change = (df['close'].iloc[-1] / df['close'].iloc[-2] - 1) * 100
+            body = fixtures.item_main_html(self.names.get(code, code), int(df['close'].iloc[-1]), float(change))
+            return 200, 'text/html; charset=utf-8', body.encode('utf-8')
+
+        if path == '/search/searchList.naver':
+            query = params.get('query', '')
+            items = [(c, n) for c, n, _ in self.universe if query and query in n]
+            return 200, html, fixtures.search_list_html(items[:10]).encode('euc-kr')
+
+        if path == '/comm/bldAttendant/getJsonData.cmd':
+            return self._krx(params)
+
+        if path.startswith('/spreadsheets/'):
+            body = fixtures.make_cycle_csv(20) if params.get('sheet') == 'cycle' else fixtures.make_theme_csv(30)
+            return 200, 'text/csv; charset=utf-8', body.encode('utf-8')
+
+        return None
+
+    def _krx(self, params: dict):
+        bld = params.get('bld', '').rsplit('/', 1)[-1]
+
+        if bld == 'MDCSTAT01901':
+            rows = [{'ISU_SRT_CD': c, 'ISU_ABBRV': n, 'MKT_TP_NM': m, 'ISU_CD': f'KR7{c}003'}
+                    for c, n, m in self.universe]
+            payload = {'OutBlock_1': rows}
+
+        elif bld == 'MDCSTAT02303':
+            code = params.get('isuCd2', '')
+            start = datetime.strptime(params['strtDd'], '%Y%m%d')
+            end = datetime.strptime(params['endDd'], '%Y%m%d')
+            output = []
+            day = end
+            while day >= start:
+                if day.weekday() < 5 and day <= self.today:
+                    rng = np.random.default_rng(self._seed(code) * 100000 + int(day.strftime('%y%m%d')))
+                    item = {'TRD_DD': day.strftime('%Y/%m/%d')}
+                    for col, _ in KRX_INVESTOR_FIELDS:
+                        item[col] = f'{int(rng.integers(-200000, 200000)):,}'
+                    output.append(item)
+                day -= timedelta(days=1)
+            payload = {'output': output}
+
+        elif bld == 'MDCSTAT02401':
+            market = 'KOSPI' if params.get('mktId') == 'STK' else 'KOSDAQ'
+            seed = int(params.get('invstTpCd', '0')) * 100000000 + int(params.get('strtDd', '0'))
+            rng = np.random.default_rng(seed)
+            output = []
+            for c, n, m in self.universe:
+                value = int(rng.integers(-500000, 500000))
+                if m == market:
+                    output.append({'ISU_SRT_CD': c, 'ISU_ABBRV': n, 'NETBID_TRDVOL': f'{value:,}'})
+            payload = {'output': output}
+
+        else:
+            return None
+        return 200, 'application/json; charset=utf-8', json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+
+class ReplayState:
+    """서버 설정 + 요청 통계 (핸들러 스레드 공유)"""
+
+    def __init__(self, store: CassetteStore, synthetic, record: bool,
+                 latency: float, jitter: float, error_rate: float, seed: int = None):
+        self.store = store
+        self.synthetic = synthetic
+        self.record = record
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {'requests': {}, 'recorded': 0, 'not_recorded': 0, 'replayed': 0, 'synthetic': 0,
+                      'injected_errors': 0, 'not_found': 0}
+
+    def count(self, key: str, path: str = None):
+        with self.lock:
+            if path is not None:
+                self.stats['requests'][path] = self.stats['requests'].get(path, 0) + 1
+            else:
+                self.stats[key] += 1
+
+    def delay_and_fail(self) -> bool:
+        """지연 적용 후 오류 주입 여부 반환"""
+        with self.lock:
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)) / 1000
+            fail = self.random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        return fail
+
+
+def _decode_params(raw: str) -> dict:
+    """쿼리/폼 문자열 → dict (네이버 검색어는 EUC-KR 퍼센트 인코딩)"""
+    params = {}
+    for part in raw.split('&'):
+        if not part:
+            continue
+        key, _, value = part.partition('=')
+        data = unquote_to_bytes(value.replace('+', ' '))
+        try:
+            params[key] = data.decode('utf-8')
+        except UnicodeDecodeError:
+            params[key] = data.decode('euc-kr', errors='replace')
+    return params
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    server_version = 'ReplayUpstream/1.0'
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    state: ReplayState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, content_type: str, body: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/__stats':
+            with self.state.lock:
+                body = json.dumps(self.state.stats, ensure_ascii=False).encode('utf-8')
+            return self._send(200, 'application/json; charset=utf-8', body)
+        self._handle('GET', url.path, _decode_params(url.query), url.query, b'')
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        params = _decode_params(url.query)
+        params.update(_decode_params(body.decode('latin-1')))
+        self._handle('POST', url.path, params, url.query, body)
+
+    def _handle(self, method: str, path: str, params: dict, raw_query: str, raw_body: bytes):
+        state = self.state
+        state.count('requests', path)
+        if state.delay_and_fail():
+            state.count('injected_errors')
+            return self._send(503, 'text/plain; charset=utf-8', b'injected error')
+
+        key = cassette_key(method, path, params)
+        if state.record:
+            response = self._forward(method, path, raw_query, raw_body)
+            # 오류 응답은 녹화하지 않음 (재생 때 일시 장애가 그대로 굳지 않게)
+            if 200 <= response[0] < 300:
+                state.store.save(key, {'method': method, 'path': path, 'params': params},
+                                 response[0], response[1], response[2])
+                state.count('recorded')
+            else:
+                state.count('not_recorded')
+            return self._send(*response)
+
+        cached = state.store.load(key)
+        if cached:
+            state.count('replayed')
+            return self._send(*cached)
+
+        response = state.synthetic.route(method, path, params) if state.synthetic else None
+        if response is None:
+            state.count('not_found')
+            return self._send(404, 'text/plain; charset=utf-8', b'no recording')
+        state.count('synthetic')
+        self._send(*response)
+
+    def _forward(self, method: str, path: str, raw_query: str, raw_body: bytes) -> tuple:
+        base = next(url for prefix, url in UPSTREAMS if path.startswith(prefix))
+        headers = {'User-Agent': 'Mozilla/5.0'}
+        for name in ('Content-Type', 'Referer'):
+            if self.headers.get(name):
+                headers[name] = self.headers[name]
+        url = f'{base}{path}' + (f'?{raw_query}' if raw_query else '')
+        response = http_client.request(method, url, headers=headers, data=raw_body or None, timeout=20)
+        return response.status_code, response.headers.get('Content-Type', 'application/octet-stream'), response.content
+
+
+def make_server(host: str = '127.0.0.1', port: int = 8700, record: bool = False, synthetic: bool = True,
+                latency: float = 0, jitter: float = 0, error_rate: float = 0, pages: int = 10,
+                universe: int = 200, cassettes: str = None, seed: int = None,
+                history: int = 750) -> ThreadingHTTPServer:
+    """대역 서버 생성 (port=0이면 빈 포트 자동 선택, server.server_port로 확인)"""
+    state = ReplayState(CassetteStore(cassettes or data_dir('replay')),
+                        SyntheticUpstream(pages, universe, history) if synthetic else None,
+                        record, latency, jitter, error_rate, seed)
+    handler = type('BoundReplayHandler', (ReplayHandler,), {'state': state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.state = state
+    return server
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='네이버 / KRX / Sheets 오프라인 대역 서버')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8700)
+    parser.add_argument('--record', action='store_true', help='실제 사이트로 전달하며 응답 녹화')
+    parser.add_argument('--no-synthetic', action='store_true', help='녹화가 없으면 404')
+    parser.add_argument('--cassettes', help='녹화 파일 디렉터리 (기본 data/replay)')
+    parser.add_argument('--latency', type=float, default=0, help='응답 지연 평균(ms)')
+    parser.add_argument('--jitter', type=float, default=0, help='응답 지연 편차(ms, 균등분포 ±)')
+    parser.add_argument('--error-rate', type=float, default=0, help='503 오류 주입 확률 (0~1)')
+    parser.add_argument('--pages', type=int, default=10, help='일별 시세 / 수급 페이지 수')
+    parser.add_argument('--history', type=int, default=750, help='차트 데이터 일봉 수')
+    parser.add_argument('--universe', type=int, default=200, help='합성 종목 수')
+    parser.add_argument('--seed', type=int, help='지연 / 오류 주입 난수 시드')
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, args.record, not args.no_synthetic, args.latency, args.jitter,
+                         args.error_rate, args.pages, args.universe, args.cassettes, args.seed, args.history)
+    mode = 'record' if args.record else 'replay'
+    print(f'{mode} upstream on http://{args.host}:{server.server_port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+"""
+전종목 오더블록 근접 스크리너 인덱스 - 종목별 detect_order_blocks 결과를 최근 종가 대비 상대 구간으로 보관
+
+구간 종류(상승/하락)별로 '종가와 구간 사이 거리' 오름차순 정렬 컬럼 배열을 유지하므로
+"신선한 상승 OB에서 2% 이내" 같은 조회는 searchsorted 한 번 + 작은 구간 필터로 끝난다.
+종목 1개의 오더블록 / 종가가 바뀌면 그 종목 행만 빼고 정렬 위치에 다시 끼워 넣는다 (전체 재정렬 없음).
+여러 프로세스(앱 서버 / CLI)가 같은 파일에 저장하므로 저장은 파일 잠금 안에서 디스크 내용을 다시 읽고
+이 프로세스가 바꾼 종목만 덮어쓴 뒤 고유 임시 파일 → 교체 (다른 프로세스의 갱신을 지우지 않음).
+
+사용법:
+    python screener_index.py build --watchlist watchlist.txt     # 수집 + 감지 후 인덱스 생성
+    python screener_index.py build --archive                     # OHLCV 저장소(data/ohlcv)에서 생성 (네트워크 없음)
+    python screener_index.py query --type bullish --within 2 --min-strength 2
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows - 프로세스 간 잠금 없이 (단일 프로세스 가정)
+    fcntl = None
+
+import metrics
+from config import data_path
+from orderblock import detect_order_blocks, detect_order_blocks_arrays
+
+KINDS = ('bullish', 'bearish')
+
+# 오더블록 행 컬럼 (구간 종류별 테이블, distance 오름차순)
+BLOCK_COLUMNS = {
+    'code': 'U6',
+    'date': np.int32,        # 기준봉 YYYYMMDD
+    'top': np.int32,         # 원 (호가 단위 정수)
+    'bottom': np.int32,
+    'strength': np.float32,
+    'mitigated': bool,
+    'broken': bool,
+    'rel_top': np.float32,     # top / 종가 - 1
+    'rel_bottom': np.float32,  # bottom / 종가 - 1
+    'distance': np.float32,    # 종가와 구간 사이 거리 / 종가 (구간 안이면 0)
+}
+
+
+def empty_table() -> dict:
+    return {name: np.zeros(0, dtype=dtype) for name, dtype in BLOCK_COLUMNS.items()}
+
+
+def date_to_int(value: str) -> int:
+    return int(value.replace('-', '')) if value else 0
+
+
+def block_rows(code: str, order_blocks: list, close: float) -> dict:
+    """오더블록 리스트 → 종류별 컬럼 배열 (정렬 전)"""
+    tables = {}
+    for kind in KINDS:
+        blocks = [ob for ob in order_blocks if ob['type'] == kind]
+        top = np.rint(np.array([ob['top'] for ob in blocks], dtype=np.float64)).astype(np.int32)
+        bottom = np.rint(np.array([ob['bottom'] for ob in blocks], dtype=np.float64)).astype(np.int32)
+        rel_top = (top / close - 1).astype(np.float32)
+        rel_bottom = (bottom / close - 1).astype(np.float32)
+        tables[kind] = {
+            'code': np.full(len(blocks), code, dtype='U6'),
+            'date': np.array([date_to_int(ob['date']) for ob in blocks], dtype=np.int32),
+            'top': top,
+            'bottom': bottom,
+            'strength': np.array([ob['strength'] for ob in blocks], dtype=np.float32),
+            'mitigated': np.array([bool(ob.get('mitigated')) for ob in blocks], dtype=bool),
+            'broken': np.array([bool(ob.get('broken')) for ob in blocks], dtype=bool),
+            'rel_top': rel_top,
+            'rel_bottom': rel_bottom,
+            'distance': np.maximum(np.maximum(rel_bottom, -rel_top), np.float32(0)),
+        }
+    return tables
+
+
+class ScreenerIndex:
+    """근접 스크리너 인덱스 (data/screener/orderblocks.npz, 스레드 안전)"""
+
+    def __init__(self, path: str = None):
+        self.path = path or data_path('screener', 'orderblocks.npz')
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # 저장은 프로세스 안에서도 한 번에 하나
+        self.tables = {kind: empty_table() for kind in KINDS}
+        self.quotes = {}  # 종목코드 → (종가, 기준일 YYYYMMDD)
+        self.dirty = set()  # 마지막 저장 이후 이 프로세스가 바꾼 종목 (저장 / 다시 읽기 때 디스크 위에 덮어씀)
+        self.mtime = 0
+        self.load()
+
+    # ---------- 저장 ----------
+
+    def _stat(self) -> int:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def _read(self) -> tuple:
+        tables = {kind: empty_table() for kind in KINDS}
+        with np.load(self.path) as f:
+            for kind in KINDS:
+                for name in BLOCK_COLUMNS:
+                    key = f'{kind}.{name}'
+                    if key in f.files:
+                        # 이전 형식(float64 가격) 파일도 현재 컬럼 형식으로
+                        tables[kind][name] = f[key].astype(BLOCK_COLUMNS[name], copy=False)
+            quotes = {str(c): (float(p), int(d)) for c, p, d in
+                      zip(f['quote_code'], f['quote_close'], f['quote_date'])}
+        return tables, quotes
+
+    def _merge(self, tables: dict, quotes: dict):
+        """디스크에서 읽은 내용으로 교체하되 아직 저장 안 한 종목(dirty)은 이 프로세스 값 유지 (잠금 안에서 호출)"""
+        mine = {}
+        for code in self.dirty:
+            mine[code] = {kind: {name: col[self.tables[kind]['code'] == code]
+                                 for name, col in self.tables[kind].items()} for kind in KINDS}
+        own_quotes = self.quotes
+        self.tables, self.quotes = tables, quotes
+        for code, rows in mine.items():
+            self._replace_code(code, rows)
+            if code in own_quotes:
+                self.quotes[code] = own_quotes[code]
+            else:
+                self.quotes.pop(code, None)
+
+    def load(self):
+        """파일 다시 읽기 (저장 안 한 이 프로세스의 갱신은 유지)"""
+        mtime = self._stat()
+        if not mtime:
+            return
+        tables, quotes = self._read()
+        with self._lock:
+            self._merge(tables, quotes)
+            self.mtime = mtime
+
+    def refresh(self) -> bool:
+        """다른 프로세스(CLI)가 파일을 새로 썼으면 다시 읽기"""
+        if self._stat() != self.mtime:
+            self.load()
+            return True
+        return False
+
+    @contextmanager
+    def _file_lock(self):
+        """프로세스 간 저장 잠금 (옆 .lock 파일에 fcntl.flock)"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + '.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @metrics.timed('screener.save')
+    def save(self):
+        """다시 읽기 → 이 프로세스가 바꾼 종목 병합 → 고유 임시 파일에 쓰고 교체 (잠금 안에서 한 번에)"""
+        with self._save_lock, self._file_lock():
+            mtime = self._stat()
+            disk = self._read() if mtime and mtime != self.mtime else None
+            with self._lock:
+                if disk is not None:
+                    self._merge(*disk)
+                arrays = {f'{kind}.{name}': col for kind in KINDS for name, col in self.tables[kind].items()}
+                codes = list(self.quotes)
+                arrays['quote_code'] = np.array(codes, dtype='U6')
+                arrays['quote_close'] = np.array([self.quotes[c][0] for c in codes], dtype=np.float64)
+                arrays['quote_date'] = np.array([self.quotes[c][1] for c in codes], dtype=np.int32)
+                saved, self.dirty = self.dirty, set()
+
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix='.orderblocks.', suffix='.npz')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez(f, **arrays)
+                os.replace(tmp, self.path)
+            except BaseException:
+                with self._lock:
+                    self.dirty |= saved
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+                raise
+            self.mtime = self._stat()
+
+    # ---------- 갱신 ----------
+
+    def _replace_code(self, code: str, tables: dict):
+        """code의 기존 행 제거 후 새 행을 distance 정렬 위치에 삽입 (잠금 안에서 호출)"""
+        for kind in KINDS:
+            table = self.tables[kind]
+            keep = table['code'] != code
+            if not keep.all():
+                table = {name: col[keep] for name, col in table.items()}
+            new = tables[kind]
+            if len(new['code']):
+                order = np.argsort(new['distance'], kind='stable')
+                at = np.searchsorted(table['distance'], new['distance'][order], side='right')
+                table = {name: np.insert(col, at, new[name][order]) for name, col in table.items()}
+            self.tables[kind] = table
+
+    @metrics.timed('screener.update')
+    def update(self, code: str, order_blocks: list, close: float, as_of: str = None):
+        """종목 1개의 오더블록 / 종가 반영"""
+        if not close or close <= 0:
+            return
+        tables = block_rows(code, order_blocks, float(close))
+        with self._lock:
+            self._replace_code(code, tables)
+            self.quotes[code] = (float(close), date_to_int(as_of) if as_of else self.quotes.get(code, (0, 0))[1])
+            self.dirty.add(code)
+
+    def update_price(self, code: str, close: float):
+        """종가만 바뀐 경우 - 저장된 구간으로 상대 위치 / 거리만 다시 계산"""
+        if code not in self.quotes or not close or close <= 0:
+            return
+        with self._lock:
+            blocks = []
+            for kind in KINDS:
+                table = self.tables[kind]
+                for i in np.flatnonzero(table['code'] == code):
+                    blocks.append({'type': kind, 'date': str(table['date'][i]), 'top': table['top'][i],
+                                   'bottom': table['bottom'][i], 'strength': float(table['strength'][i]),
+                                   'mitigated': bool(table['mitigated'][i]), 'broken': bool(table['broken'][i])})
+            tables = block_rows(code, blocks, float(close))
+            self._replace_code(code, tables)
+            self.quotes[code] = (float(close), self.quotes[code][1])
+            self.dirty.add(code)
+
+    def remove(self, code: str):
+        with self._lock:
+            self._replace_code(code, {kind: empty_table() for kind in KINDS})
+            self.quotes.pop(code, None)
+            self.dirty.add(code)
+
+    # ---------- 조회 ----------
+
+    @metrics.timed('screener.query')
+    def query(self, kind: str = 'bullish', within: float = 0.02, min_strength: float = 0,
+              fresh_only: bool = True, limit: int = 100) -> list:
+        """종가가 구간에서 within(비율) 이내인 오더블록, 가까운 순 (종목당 가장 가까운 1개)"""
+        with self._lock:
+            table = self.tables[kind]
+            end = np.searchsorted(table['distance'], within, side='right')
+            rows = {name: col[:end] for name, col in table.items()}
+        mask = rows['strength'] >= min_strength
+        if fresh_only:
+            mask &= ~rows['mitigated']
+
+        results, seen = [], set()
+        for i in np.flatnonzero(mask):
+            code = str(rows['code'][i])
+            if code in seen:
+                continue
+            seen.add(code)
+            date = int(rows['date'][i])
+            close, as_of = self.quotes.get(code, (0.0, 0))
+            results.append({
+                'code': code, 'type': kind,
+                'date': f'{date // 10000:04d}-{date // 100 % 100:02d}-{date % 100:02d}',
+                'top': int(rows['top'][i]), 'bottom': int(rows['bottom'][i]),
+                'strength': float(rows['strength'][i]), 'mitigated': bool(rows['mitigated'][i]),
+                'close': close, 'as_of': as_of,
+                'rel_top': float(rows['rel_top'][i]), 'rel_bottom': float(rows['rel_bottom'][i]),
+                'distance': float(rows['distance'][i]),
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+    def info(self) -> dict:
+        with self._lock:
+            return {'codes': len(self.quotes), **{kind: len(self.tables[kind]['code']) for kind in KINDS}}
+
+
+def build_from_fetch(index: ScreenerIndex, codes: list, days: int, concurrency: int) -> int:
+    """네이버 일봉 수집 → 감지 → 인덱스 반영, 반영한 종목 수"""
+    import fetchers
+
+    def analyze(code):
+        try:
+            df = fetchers.fetch_daily_candle(code, days)
+        except Exception as e:
+            print(f'{code} 수집 실패: {e}', file=sys.stderr)
+            return 0
+        if df.empty:
+            return 0
+        index.update(code, detect_order_blocks(df), float(df['close'].iloc[-1]), df.index[-1].strftime('%Y-%m-%d'))
+        return 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return sum(pool.map(analyze, codes))
+
+
+def build_from_archive(index: ScreenerIndex, archive, days: int) -> int:
+    """OHLCV 저장소의 memmap 뷰로 감지 (네트워크 없음)"""
+    done = 0
+    for code in archive.codes.tolist():
+        b = archive.bars(code, days)
+        if len(b['close']) == 0:
+            continue
+        blocks = detect_order_blocks_arrays(b['open'], b['high'], b['low'], b['close'], b['date'])
+        last = int(b['date'][-1])
+        index.update(code, blocks, float(b['close'][-1]), f'{last // 10000:04d}-{last // 100 % 100:02d}-{last % 100:02d}')
+        done += 1
+    return done
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='전종목 오더블록 근접 스크리너 인덱스')
+    parser.add_argument('--path', help='인덱스 파일 (기본 data/screener/orderblocks.npz)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help='인덱스 생성 / 갱신 (종목 단위 반영)')
+    source = build.add_mutually_exclusive_group()
+    source.add_argument('--watchlist', help='종목코드 파일 (생략 시 종목 마스터 전체)')
+    source.add_argument('--archive', nargs='?', const='', help='OHLCV 저장소에서 생성 (경로 생략 시 data/ohlcv)')
+    build.add_argument('--days', type=int, default=60, help='감지에 쓰는 일봉 수 (기본 60)')
+    build.add_argument('--concurrency', type=int, default=8)
+
+    query = sub.add_parser('query', help='근접 종목 조회')
+    query.add_argument('--type', choices=KINDS, default='bullish')
+    query.add_argument('--within', type=float, default=2, help='구간까지 거리(%%, 기본 2)')
+    query.add_argument('--min-strength', type=float, default=0)
+    query.add_argument('--include-mitigated', action='store_true', help='이미 가격이 다녀간 오더블록 포함')
+    query.add_argument('--limit', type=int, default=50)
+
+    sub.add_parser('info', help='인덱스 요약')
+    args = parser.parse_args(argv)
+    index = ScreenerIndex(args.path)
+
+    if args.command == 'build':
+        if args.archive is not None:
+            from ohlcv_archive import OHLCVArchive
+            done = build_from_archive(index, OHLCVArchive(args.archive or None), args.days)
+        else:
+            if args.watchlist:
+                from batch_cli import read_watchlist
+                codes = read_watchlist(args.watchlist)
+            else:
+                from symbol_master import get_symbol_master
+                master = get_symbol_master(background=False)
+                if not master.index.rows:
+                    master.refresh()
+                codes = [r['code'] for r in master.index.rows]
+            done = build_from_fetch(index, codes, args.days, max(1, args.concurrency))
+        index.save()
+        print(json.dumps(dict(index.info(), updated=done), ensure_ascii=False))
+        return 0 if done else 2
+
+    if args.command == 'query':
+        results = index.query(args.type, args.within / 100, args.min_strength,
+                              not args.include_mitigated, args.limit)
+        for r in results:
+            print(f"{r['code']}  {r['bottom']:>10,.0f} ~ {r['top']:>10,.0f}  종가 {r['close']:>10,.0f}  "
+                  f"거리 {r['distance'] * 100:5.2f}%  강도 {r['strength']:.1f}  {r['date']}")
+        print(f'{len(results)}종목', file=sys.stderr)
+        return 0
+
+    print(json.dumps(index.info(), ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+프로세스 간 공유 캐시 (SQLite WAL) - 여러 Streamlit 서버 프로세스가 같은 수집 결과를 나눠 쓴다
+
+- 항목마다 만료 시각 저장 (TTL 의미 유지, 프로세스 내 메모 캐시도 같은 만료 시각 사용)
+- 갱신은 키별 임대(lease)를 얻은 프로세스 1개만 수행, 나머지는 이전 값을 쓰거나 잠시 대기
+  → 프로세스가 N개여도 키당 TTL마다 외부 요청은 약 1번
+- 임대는 갱신하는 동안 주기적으로 연장 (느린 수집도 살아 있는 동안은 다른 프로세스가 인수하지 않음)
+
+OB_SHARED_CACHE=경로 를 지정했을 때만 사용 (미지정 시 shared_fetch는 원래 함수를 그대로 반환)
+"""
+
+import functools
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import metrics
+from cache import TTLCache
+from config import SHARED_CACHE_PATH
+
+LEASE_TTL = 30        # 임대 유지 시간(초) - 갱신 중에는 LEASE_TTL / 3마다 연장, 프로세스가 죽으면 이 시간 뒤 인수
+WAIT_TIMEOUT = 15     # 이전 값이 없을 때 다른 프로세스의 갱신을 기다리는 시간(초) - 넘으면 대기자 1개만 직접 계산
+RETRY_SUFFIX = '#retry'  # 대기 시간 초과 후 직접 계산할 대기자 1개를 정하는 임대 키
+POLL_INTERVAL = 0.05
+KEEP_EXPIRED = 24 * 60 * 60  # 만료 후에도 이전 값으로 쓰기 위해 보관하는 시간(초)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+'''
+
+
+class SharedCache:
+    """SQLite WAL 기반 키-값 캐시 + 키별 단일 갱신 임대"""
+
+    def __init__(self, path: str, memo_size: int = 4096):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        # 프로세스 내 메모 (직렬화된 값, 저장시각, 만료시각) - 읽을 때마다 새 객체로 복원 (st.cache_data와 같음)
+        self._memo = TTLCache(KEEP_EXPIRED, maxsize=memo_size)
+        self._writes = 0
+        self._held = set()  # 이 프로세스가 보유 중인 임대 (키, 소유자) - 연장 스레드가 주기적으로 연장
+        self._held_lock = threading.Lock()
+        self._renewer = None
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def read(self, key: str):
+        """(값, 저장시각, 만료시각) 또는 None (만료된 이전 값도 반환)"""
+        item = self._memo.get(key)
+        if item is not None and item[0][2] > time.time():
+            row = item[0]
+        else:
+            row = self._conn().execute(
+                'SELECT value, stored_at, expires_at FROM entries WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._memo.set(key, row)
+        return pickle.loads(row[0]), row[1], row[2]
+
+    def write(self, key: str, value, ttl: float) -> tuple:
+        now = time.time()
+        row = (pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), now, now + ttl)
+        self._conn().execute(
+            'INSERT OR REPLACE INTO entries (value, stored_at, expires_at, key) VALUES (?, ?, ?, ?)',
+            row + (key,)
+        )
+        self._memo.set(key, row)
+        self._writes += 1
+        if self._writes % 500 == 0:
+            self.purge()
+        return value, now, now + ttl
+
+    def _acquire(self, key: str, owner: str) -> bool:
+        """임대가 없거나 만료됐으면 owner로 획득 (원자적 UPSERT)"""
+        now = time.time()
+        cur = self._conn().execute(
+            'INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at '
+            'WHERE leases.expires_at < ?',
+            (key, owner, now + LEASE_TTL, now)
+        )
+        return cur.rowcount == 1
+
+    def _release(self, key: str, owner: str):
+        self._conn().execute('DELETE FROM leases WHERE key = ? AND owner = ?', (key, owner))
+
+    @contextmanager
+    def _leased(self, key: str, owner: str):
+        """획득한 임대를 블록 동안 연장하고 끝나면 반납"""
+        with self._held_lock:
+            self._held.add((key, owner))
+            if self._renewer is None:
+                self._renewer = threading.Thread(target=self._renew_loop, name='shared-cache-lease', daemon=True)
+                self._renewer.start()
+        try:
+            yield
+        finally:
+            with self._held_lock:
+                self._held.discard((key, owner))
+            self._release(key, owner)
+
+    def _renew_loop(self):
+        """보유 중인 임대 만료 시각을 LEASE_TTL / 3마다 연장 (소유자가 같은 경우만 - 반납 / 인수된 임대는 그대로)"""
+        while True:
+            time.sleep(LEASE_TTL / 3)
+            with self._held_lock:
+                held = list(self._held)
+            for key, owner in held:
+                try:
+                    self._conn().execute('UPDATE leases SET expires_at = ? WHERE key = ? AND owner = ?',
+                                         (time.time() + LEASE_TTL, key, owner))
+                except sqlite3.Error:
+                    pass
+
+    def get_or_compute(self, key: str, ttl: float, compute) -> tuple:
+        """(값, 저장시각, 만료시각). 만료됐으면 임대를 얻은 프로세스만 compute 실행
+
+        임대를 못 얻으면 이전 값이 있으면 그대로 반환, 없으면 갱신이 끝날 때까지 대기
+        (WAIT_TIMEOUT 초과 시 재시도 임대를 얻은 대기자 1개만 직접 계산, 나머지는 계속 대기)
+        compute 예외는 저장하지 않고 그대로 전달
+        """
+        entry = self.read(key)
+        if entry is not None and entry[2] > time.time():
+            metrics.inc('shared_cache_total', result='hit')
+            return entry
+
+        owner = f'{os.getpid()}:{threading.get_ident()}:{uuid.uuid4().hex[:8]}'
+        deadline = time.time() + WAIT_TIMEOUT
+        while True:
+            if self._acquire(key, owner):
+                with self._leased(key, owner):
+                    # 임대를 얻는 사이 다른 프로세스가 갱신했을 수 있음
+                    entry = self.read(key)
+                    if entry is not None and entry[2] > time.time():
+                        metrics.inc('shared_cache_total', result='hit')
+                        return entry
+                    metrics.inc('shared_cache_total', result='refresh')
+                    return self.write(key, compute(), ttl)
+
+            if entry is not None:
+                metrics.inc('shared_cache_total', result='stale')
+                return entry
+            if time.time() > deadline:
+                if self._acquire(key + RETRY_SUFFIX, owner):
+                    with self._leased(key + RETRY_SUFFIX, owner):
+                        metrics.inc('shared_cache_total', result='wait_timeout')
+                        return self.write(key, compute(), ttl)
+                deadline = time.time() + WAIT_TIMEOUT
+
+            time.sleep(POLL_INTERVAL)
+            fresh = self.read(key)
+            if fresh is not None and fresh[2] > time.time():
+                metrics.inc('shared_cache_total', result='waited')
+                return fresh
+
+    def delete_prefix(self, prefix: str):
+        self._conn().execute("DELETE FROM entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+        self._memo.clear()
+
+    def purge(self):
+        """오래 전에 만료된 항목 / 죽은 임대 정리"""
+        now = time.time()
+        conn = self._conn()
+        conn.execute('DELETE FROM entries WHERE expires_at < ?', (now - KEEP_EXPIRED,))
+        conn.execute('DELETE FROM leases WHERE expires_at < ?', (now,))
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        now = time.time()
+        total, fresh = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(expires_at > ?), 0) FROM entries', (now,)
+        ).fetchone()
+        leases = conn.execute('SELECT COUNT(*) FROM leases WHERE expires_at >= ?', (now,)).fetchone()[0]
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return {'path': self.path, 'entries': total, 'fresh': fresh, 'active_leases': leases, 'file_bytes': size}
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_cache():
+    """OB_SHARED_CACHE 지정 시 프로세스 싱글톤, 아니면 None"""
+    global _shared
+    if not SHARED_CACHE_PATH:
+        return None
+    with _shared_lock:
+        if _shared is None:
+            _shared = SharedCache(SHARED_CACHE_PATH)
+        return _shared
+
+
+def shared_fetch(func, ttl: float, name: str = None):
+    """공유 캐시를 거치는 함수 (미사용 시 func 그대로). 키 = 함수명 + 인자 repr
+
+    DataFrame 결과에는 attrs['fetched_at']에 실제 수집 시각을 기록 (상위 캐시의 TTL 계산용)
+    """
+    cache = get_shared_cache()
+    if cache is None:
+        return func
+    prefix = f'{name or func.__name__}:'
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = prefix + repr((args, sorted(kwargs.items())))
+        value, stored_at, _ = cache.get_or_compute(key, ttl, lambda: func(*args, **kwargs))
+        if hasattr(value, 'attrs'):
+            value.attrs['fetched_at'] = stored_at
+        return value
+
+    wrapper.clear = lambda: cache.delete_prefix(prefix)
+    return wrapper
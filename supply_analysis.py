@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+수급 분석 - 일별 집계 + 종합 수급 판단 규칙 엔진
+규칙은 컬럼 배열 단위로 평가되므로 종목 1개(UI)와 전종목(스크리너)에 같은 결과를 낸다
+"""
+
+import numpy as np
+
+
+def analyze_supply_arrays(flows: dict, windows=(), present: np.ndarray = None) -> dict:
+    """투자자별 순매수 컬럼(최신순, [일자] 또는 [일자, 종목]) 일괄 분석
+
+    모든 필드 + 외국인+기관 합계를 한 배열로 쌓아 누적합 한 번으로
+    전체 합계 / 기간별 합계 / 최근 3일 vs 이전 합계를 계산한다.
+    present가 있으면 False 칸은 거래일에서 제외 (종목별 상장일 차이 등)
+    """
+    fields = list(flows)
+    columns = [np.asarray(flows[f], dtype=np.int64) for f in fields]
+    if 'foreign' in flows and 'inst' in flows:
+        smart_net = columns[fields.index('foreign')] + columns[fields.index('inst')]
+    else:
+        smart_net = np.zeros_like(columns[0])
+    stacked = np.stack(columns + [smart_net])
+    if present is not None:
+        stacked = stacked * present
+    n_rows = stacked.shape[1]
+    tail_shape = stacked.shape[2:]
+
+    if n_rows == 0:
+        zero = np.zeros(tail_shape, dtype=np.int64)
+        return {'days': zero, 'totals': {f: zero for f in fields}, 'total_smart': zero,
+                'buy_days': zero, 'sell_days': zero, 'recent_3': zero, 'prev_4': zero,
+                'windows': {w: {f: zero for f in fields} for w in windows}}
+
+    cum = np.cumsum(stacked, axis=1)
+    smart = stacked[-1]
+    if present is None:
+        n_days = np.full(tail_shape, n_rows, dtype=np.int64)
+        buy_days = (smart > 0).sum(axis=0)
+    else:
+        n_days = present.sum(axis=0)
+        buy_days = ((smart > 0) & present).sum(axis=0)
+
+    total_smart = cum[-1, -1]
+    if present is None:
+        recent_3 = cum[-1, min(3, n_rows) - 1]
+        window_sums = {w: {f: cum[i, min(w, n_rows) - 1] for i, f in enumerate(fields)} for w in windows}
+    else:
+        # 최근 N일 = 종목별로 present인 최근 N개 행 (최근 며칠이 빠진 종목도 같은 거래일 수로)
+        rank = np.cumsum(present, axis=0)
+        recent_3 = (smart * (present & (rank <= 3))).sum(axis=0)
+        window_sums = {w: {f: (stacked[i] * (rank <= w)).sum(axis=0) for i, f in enumerate(fields)}
+                       for w in windows}
+    enough = n_days >= 5
+
+    return {
+        'days': n_days,
+        'totals': {f: cum[i, -1] for i, f in enumerate(fields)},
+        'total_smart': total_smart,
+        'buy_days': buy_days,
+        'sell_days': n_days - buy_days,
+        'recent_3': np.where(enough, recent_3, 0),
+        'prev_4': np.where(enough, total_smart - recent_3, 0),
+        'windows': window_sums,
+    }
+
+
+def pack_flows(data: list, fields: list) -> dict:
+    """수집 함수 결과(dict 리스트) → 필드별 int64 배열 (순서 유지)"""
+    return {f: np.fromiter((row.get(f, 0) for row in data), dtype=np.int64, count=len(data)) for f in fields}
+
+
+def analyze_supply(data: list) -> dict:
+    """수급 데이터 분석 (날짜 표시 형식은 UI에서 처리)"""
+    if not data:
+        return {'daily_data': [], 'total_foreign': 0, 'total_inst': 0, 'buy_days': 0, 'sell_days': 0,
+                'recent_3': 0, 'prev_4': 0}
+
+    flows = pack_flows(data, ['foreign', 'inst'])
+    result = analyze_supply_arrays(flows)
+    smart_net = flows['foreign'] + flows['inst']
+
+    daily_data = [{
+        'date': row['date'],
+        'foreign': row['foreign'],
+        'inst': row['inst'],
+        'smart_net': int(net),
+        'is_buy': bool(net > 0)
+    } for row, net in zip(data, smart_net)]
+
+    return {
+        'daily_data': daily_data,
+        'total_foreign': int(result['totals']['foreign']),
+        'total_inst': int(result['totals']['inst']),
+        'buy_days': int(result['buy_days']),
+        'sell_days': int(result['sell_days']),
+        'recent_3': int(result['recent_3']),
+        'prev_4': int(result['prev_4'])
+    }
+
+
+# ============================================================
+# 종합 수급 판단 규칙 (위에서부터 먼저 맞는 규칙 적용)
+# ============================================================
+
+def _derive(c: dict) -> dict:
+    """규칙 평가용 파생 컬럼"""
+    smart = c['total_foreign'] + c['total_inst']
+    all_smart = smart + c['total_pension'] + c['total_private'] + c['total_invest_trust']
+    buy_count = ((c['total_foreign'] > 0).astype(np.int8) + (c['total_inst'] > 0) + (c['total_pension'] > 0)
+                 + (c['total_private'] > 0) + (c['total_invest_trust'] > 0))
+    turning = ((c['recent_3'] > 0) & (c['prev_4'] < 0)) | ((c['recent_3'] < 0) & (c['prev_4'] > 0))
+    return dict(c, total_smart=smart, total_all_smart=all_smart,
+                buy_count=buy_count, sell_count=5 - buy_count, trend_turning=turning)
+
+
+SIGNAL_RULES = [
+    {'text': '전방위 매집', 'color': '#28a745', 'icon': 'fa-arrows-up-to-line',
+     'tip': '외국인+기관+연기금+사모 모두 매수 중! 강력한 상승 신호',
+     'when': lambda d: d['has_detail'] & (d['total_all_smart'] > 0) & (d['buy_count'] >= 4)},
+    {'text': '장기 스마트머니 매집', 'color': '#28a745', 'icon': 'fa-landmark',
+     'tip': '연기금(국민연금 등) + 외국인/기관 동반 매수. 장기 상승 기대',
+     'when': lambda d: d['has_detail'] & (d['total_pension'] > 0) & (d['total_smart'] > 0)},
+    {'text': '연기금 단독 매집', 'color': '#17a2b8', 'icon': 'fa-landmark',
+     'tip': '연기금 매수 vs 외국인/기관 매도. 장기 관점에서 긍정적',
+     'when': lambda d: d['has_detail'] & (d['total_pension'] > 0) & (d['total_smart'] < 0)},
+    {'text': '강한 매집', 'color': '#28a745', 'icon': 'fa-arrow-up',
+     'tip': '스마트머니가 적극 매수 중. 단기 상승 가능성 높음',
+     'when': lambda d: (d['total_smart'] > 0) & (d['buy_days'] >= 5)},
+    {'text': '매집 중', 'color': '#28a745', 'icon': 'fa-arrow-up',
+     'tip': '외국인+기관 순매수 우위. 상승 추세 지속 가능',
+     'when': lambda d: (d['total_smart'] > 0) & (d['buy_days'] >= 4)},
+    {'text': '전방위 매도', 'color': '#dc3545', 'icon': 'fa-arrows-down-to-line',
+     'tip': '외국인+기관+연기금+사모 모두 매도! 강력한 하락 신호',
+     'when': lambda d: d['has_detail'] & (d['total_all_smart'] < 0) & (d['sell_count'] >= 4)},
+    {'text': '장기 자금 이탈', 'color': '#dc3545', 'icon': 'fa-landmark',
+     'tip': '연기금까지 매도 중. 장기 하락 주의',
+     'when': lambda d: d['has_detail'] & (d['total_pension'] < 0) & (d['total_smart'] < 0)},
+    {'text': '강한 매도', 'color': '#dc3545', 'icon': 'fa-arrow-down',
+     'tip': '스마트머니 대량 이탈 중. 하락 주의',
+     'when': lambda d: (d['total_smart'] < 0) & (d['sell_days'] >= 5)},
+    {'text': '물량 정리', 'color': '#dc3545', 'icon': 'fa-arrow-down',
+     'tip': '외국인+기관 순매도 우위. 추가 하락 가능성',
+     'when': lambda d: (d['total_smart'] < 0) & (d['sell_days'] >= 4)},
+    {'text': '매수 전환', 'color': '#17a2b8', 'icon': 'fa-rotate',
+     'tip': '최근 3일 매수로 전환! 추세 변화 가능성',
+     'when': lambda d: d['trend_turning'] & (d['recent_3'] > 0)},
+    {'text': '매도 전환', 'color': '#fd7e14', 'icon': 'fa-rotate',
+     'tip': '최근 3일 매도로 전환. 차익실현 또는 하락 전조',
+     'when': lambda d: d['trend_turning'] & (d['recent_3'] < 0)},
+    {'text': '외국인 주도', 'color': '#17a2b8', 'icon': 'fa-globe',
+     'tip': '외국인 매수 vs 기관 매도. 외국인 방향 주시',
+     'when': lambda d: (d['total_foreign'] > 0) & (d['total_inst'] < 0)},
+    {'text': '기관 주도', 'color': '#fd7e14', 'icon': 'fa-building',
+     'tip': '기관 매수 vs 외국인 매도. 기관 방향 주시',
+     'when': lambda d: (d['total_foreign'] < 0) & (d['total_inst'] > 0)},
+]
+
+DEFAULT_SIGNAL = {'text': '관망', 'color': '#6c757d', 'icon': 'fa-minus', 'tip': '뚜렷한 방향 없음. 추가 관찰 필요'}
+
+# 규칙 번호 → 신호 (마지막은 기본값)
+SIGNALS = SIGNAL_RULES + [DEFAULT_SIGNAL]
+
+SIGNAL_INPUTS = ['total_foreign', 'total_inst', 'total_pension', 'total_private', 'total_invest_trust',
+                 'buy_days', 'sell_days', 'recent_3', 'prev_4']
+
+# 스크리너 기본 대상 (매집 계열)
+ACCUMULATION_SIGNALS = ['전방위 매집', '장기 스마트머니 매집', '연기금 단독 매집', '강한 매집', '매집 중', '매수 전환']
+
+
+def classify_signals(columns: dict) -> np.ndarray:
+    """컬럼 배열(SIGNAL_INPUTS + has_detail) → 종목별 규칙 번호 배열 (SIGNALS 인덱스)"""
+    cols = {k: np.asarray(columns[k], dtype=np.int64) for k in SIGNAL_INPUTS}
+    cols['has_detail'] = np.asarray(columns['has_detail'], dtype=bool)
+    derived = _derive(cols)
+    conds = [np.broadcast_to(rule['when'](derived), cols['buy_days'].shape) for rule in SIGNAL_RULES]
+    return np.select(conds, np.arange(len(SIGNAL_RULES)), default=len(SIGNAL_RULES))
+
+
+def classify_supply_signal(**values) -> dict:
+    """종목 1개 종합 수급 판단 (classify_signals와 동일 규칙)"""
+    columns = {k: np.array([values[k]]) for k in SIGNAL_INPUTS + ['has_detail']}
+    return SIGNALS[int(classify_signals(columns)[0])]
+
+
+def aggregate_stacked_flows(stacks: dict, present: np.ndarray) -> dict:
+    """[일자, 종목] 2차원 순매수(최신순) → 판단 규칙 입력 컬럼"""
+    result = analyze_supply_arrays(stacks, present=present)
+    totals = result['totals']
+    return {
+        'total_foreign': totals['foreign'],
+        'total_inst': totals['inst'],
+        'total_pension': totals['pension'],
+        'total_private': totals['private'],
+        'total_invest_trust': totals['invest_trust'],
+        'buy_days': result['buy_days'],
+        'sell_days': result['sell_days'],
+        'recent_3': result['recent_3'],
+        'prev_4': result['prev_4'],
+        'has_detail': np.ones(present.shape[1], dtype=bool),
+    }
+
+
+def summarize_supply(supply_data: list, detailed_data: list) -> dict:
+    """수급 탭과 같은 기준의 요약 (합계 + 종합 수급 판단), CLI/API용"""
+    analysis = analyze_supply(supply_data)
+    detail_fields = ['pension', 'private', 'invest_trust', 'financial']
+    if detailed_data:
+        detail_totals = analyze_supply_arrays(pack_flows(detailed_data, detail_fields))['totals']
+        details = {f: int(detail_totals[f]) for f in detail_fields}
+    else:
+        details = {f: 0 for f in detail_fields}
+
+    signal = classify_supply_signal(
+        total_foreign=analysis['total_foreign'], total_inst=analysis['total_inst'],
+        total_pension=details['pension'], total_private=details['private'],
+        total_invest_trust=details['invest_trust'],
+        buy_days=analysis['buy_days'], sell_days=analysis['sell_days'],
+        recent_3=analysis['recent_3'], prev_4=analysis['prev_4'], has_detail=bool(detailed_data)
+    )
+    return {
+        'signal': signal['text'],
+        'days': len(analysis['daily_data']),
+        'total_foreign': analysis['total_foreign'],
+        'total_inst': analysis['total_inst'],
+        'total_pension': details['pension'],
+        'total_private': details['private'],
+        'total_invest_trust': details['invest_trust'],
+        'total_financial': details['financial'],
+        'buy_days': analysis['buy_days'],
+        'sell_days': analysis['sell_days'],
+    }
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+외국인/기관 수급 장기 백필 - 네이버 frgn.naver 페이지(20거래일씩)를 묶음 단위로 동시 수집해 수급 저장소에 병합
+
+- 페이지 묶음을 동시에 요청 (호스트별 속도 제한 / 회로 차단은 http_client가 그대로 적용)
+- 묶음마다 페이지 사이 날짜 연속성을 확인한 뒤 저장소(data/supply/{code}.npz)에 병합하고 체크포인트 기록
+  → 중단되면 마지막으로 기록한 다음 페이지부터 재개, 완료된 종목은 건너뜀
+- 연속성: 다음 페이지 첫 날짜는 앞 페이지 마지막 날짜의 직전 거래일이어야 함
+  (거래일 달력은 차트 데이터 일봉 1회 요청, 받지 못하면 MAX_GAP_DAYS 넘게 떨어졌는지만 확인)
+  끊기면 그 페이지부터 한 번 다시 받고, 그래도 끊겨 있으면 (거래정지 등) 구간을 체크포인트에 기록하고 계속
+- 페이지가 겹치면 (수집 중 새 거래일 추가로 행이 밀림) 겹친 날짜는 버림
+
+사용법:
+    python supply_backfill.py run --watchlist watchlist.txt --pages 300 --concurrency 4
+    python supply_backfill.py run --since 2015-01-01      # 종목 마스터 전체 (밤새 실행, 중단 후 같은 명령으로 재개)
+    python supply_backfill.py status
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import metrics
+from config import data_dir
+from fetchers import fetch_daily_candle, fetch_supply_page
+from supply_store import SupplyStore, date_to_int, rows_to_columns
+
+MAX_PAGES = 500      # 종목당 최대 페이지 (약 40년)
+PAGE_ROWS = 20       # frgn.naver 페이지당 거래일
+MAX_GAP_DAYS = 12    # 거래일 달력이 없을 때 페이지 사이 허용 간격(일) - 최장 연휴(추석 + 임시공휴일) 기준
+
+
+def is_gap(newer: datetime, older: datetime, calendar: list = None) -> bool:
+    """newer(앞 페이지 마지막 날짜)와 older(다음 페이지 첫 날짜) 사이에 빠진 거래일이 있는지"""
+    if calendar:
+        i = bisect_left(calendar, newer)
+        if i > 0 and calendar[0] <= older:
+            return older < calendar[i - 1]
+    return (newer - older).days > MAX_GAP_DAYS
+
+
+def verify_pages(pages: list, newest_before=None, allowed_gaps=(), calendar: list = None) -> dict:
+    """연속한 페이지 묶음(최신순) 검사
+
+    newest_before: 앞 묶음의 가장 오래된 날짜 (이보다 오래된 행만 이어 붙임)
+    allowed_gaps: 공백을 인정할 페이지 위치 (다시 받아도 같은 공백)
+    calendar: 거래일 목록 (오름차순 datetime)
+    반환: rows(이어 붙일 행), accepted(통과한 페이지 수), end(마지막 페이지 도달), gap(끊긴 페이지 위치 / 날짜)
+    """
+    rows, gap, end = [], None, False
+    accepted = 0
+    oldest = newest_before
+    for i, page in enumerate(pages):
+        if not page:
+            end = True
+            break
+        dates = [r['date'] for r in page]
+        if any(a <= b for a, b in zip(dates, dates[1:])):
+            gap = {'index': i, 'reason': 'order'}
+            break
+        if oldest is not None:
+            if dates[-1] >= oldest:
+                # 마지막 페이지를 넘기면 같은 페이지가 반복됨
+                end = True
+                break
+            if dates[0] >= oldest:
+                page = [r for r in page if r['date'] < oldest]
+            elif i not in allowed_gaps and is_gap(oldest, dates[0], calendar):
+                gap = {'index': i, 'reason': 'gap', 'from': oldest.strftime('%Y-%m-%d'),
+                       'to': dates[0].strftime('%Y-%m-%d')}
+                break
+        rows.extend(page)
+        oldest = page[-1]['date']
+        accepted += 1
+    return {'rows': rows, 'accepted': accepted, 'end': end, 'gap': gap, 'oldest': oldest}
+
+
+class Checkpoint:
+    """종목별 백필 진행 상태 (data/supply_backfill/{code}.json, 묶음마다 원자적 교체)"""
+
+    def __init__(self, root: str = None):
+        self.root = root or data_dir('supply_backfill')
+
+    def _path(self, code: str) -> str:
+        return os.path.join(self.root, f'{code}.json')
+
+    def load(self, code: str) -> dict:
+        try:
+            with open(self._path(code), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'code': code, 'status': 'new', 'next_page': 1, 'pages': 0, 'rows': 0, 'oldest': None,
+                    'gaps': []}
+
+    def save(self, state: dict):
+        state['updated'] = datetime.now().isoformat(timespec='seconds')
+        tmp = self._path(state['code']) + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, self._path(state['code']))
+
+    def reset(self, code: str):
+        try:
+            os.remove(self._path(code))
+        except FileNotFoundError:
+            pass
+
+    def all(self) -> list:
+        return [self.load(name[:-5]) for name in sorted(os.listdir(self.root)) if name.endswith('.json')]
+
+
+class SupplyBackfill:
+    """종목 1개씩, 종목 안에서는 페이지 concurrency개를 동시에 수집"""
+
+    def __init__(self, store: SupplyStore = None, checkpoint: Checkpoint = None, concurrency: int = 4,
+                 max_pages: int = MAX_PAGES, since: datetime = None, fetch_page=fetch_supply_page,
+                 fetch_candles=fetch_daily_candle):
+        self.store = store or SupplyStore()
+        self.checkpoint = checkpoint or Checkpoint()
+        self.concurrency = concurrency
+        self.max_pages = max_pages
+        self.since = since
+        self.fetch_page = fetch_page
+        self.fetch_candles = fetch_candles
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='backfill')
+
+    def _fetch(self, code: str, pages: range) -> list:
+        return list(self._pool.map(lambda page: self.fetch_page(code, page), pages))
+
+    def _calendar(self, code: str) -> list:
+        """종목 거래일 달력 (일봉 날짜, 오름차순) - 실패하면 빈 목록 (간격 기준으로만 확인)"""
+        try:
+            df = self.fetch_candles(code, self.max_pages * PAGE_ROWS)
+        except Exception:
+            return []
+        return list(df.index.to_pydatetime()) if not df.empty else []
+
+    def _finish(self, state: dict, reason: str) -> dict:
+        state['status'] = 'done'
+        state['reason'] = reason
+        self.checkpoint.save(state)
+        return state
+
+    def run(self, code: str) -> dict:
+        """체크포인트부터 이어서 백필, 최종 상태 반환 (요청 실패 시 status='error'로 기록하고 반환)"""
+        state = self.checkpoint.load(code)
+        if state['status'] == 'done':
+            return state
+        state.update(status='running', error=None)
+        oldest = datetime.strptime(state['oldest'], '%Y%m%d') if state['oldest'] else None
+        calendar = self._calendar(code)
+
+        while state['next_page'] <= self.max_pages:
+            first = state['next_page']
+            pages = range(first, min(first + self.concurrency, self.max_pages + 1))
+            try:
+                with metrics.span('backfill.batch'):
+                    fetched = self._fetch(code, pages)
+                    checked = verify_pages(fetched, oldest, calendar=calendar)
+                    if checked['gap']:
+                        # 일시적인 잘못된 응답일 수 있으니 끊긴 페이지부터 한 번 다시 받아 확인
+                        at = checked['gap']['index']
+                        fetched[at:] = self._fetch(code, pages[at:])
+                        checked = verify_pages(fetched, oldest, calendar=calendar)
+            except Exception as e:
+                metrics.inc('backfill_batches_total', result='error')
+                state.update(status='error', error=f'{type(e).__name__}: {e}')
+                self.checkpoint.save(state)
+                return state
+
+            # 다시 받아도 같은 공백은 실제 공백 (거래정지 등) - 기록하고 이어 붙임
+            allowed = set()
+            while checked['gap'] and checked['gap']['reason'] == 'gap':
+                gap = checked['gap']
+                state['gaps'].append({'page': first + gap['index'], 'from': gap['from'], 'to': gap['to']})
+                allowed.add(gap['index'])
+                checked = verify_pages(fetched, oldest, allowed, calendar)
+            if checked['gap']:
+                state.update(status='error', error=f"페이지 {first + checked['gap']['index']} 날짜 순서 오류")
+                self.checkpoint.save(state)
+                return state
+
+            rows = checked['rows']
+            if self.since is not None:
+                rows = [r for r in rows if r['date'] >= self.since]
+            # 저장소 먼저 기록 후 체크포인트 (중간에 중단되면 같은 묶음을 다시 받아 병합 - 날짜 기준이라 중복 없음)
+            if rows:
+                self.store.merge(code, rows_to_columns(rows))
+            metrics.inc('backfill_batches_total', result='ok')
+            metrics.inc('backfill_rows_total', len(rows))
+            state['pages'] += checked['accepted']
+            state['rows'] += len(rows)
+            state['next_page'] = first + checked['accepted']
+            if checked['oldest'] is not None:
+                oldest = checked['oldest']
+                state['oldest'] = str(date_to_int(oldest))
+
+            if checked['end']:
+                return self._finish(state, 'last_page')
+            if self.since is not None and oldest is not None and oldest < self.since:
+                return self._finish(state, 'since')
+            self.checkpoint.save(state)
+        return self._finish(state, 'max_pages')
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='외국인/기관 수급 장기 백필 (frgn.naver → data/supply)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help='백필 실행 / 재개')
+    run.add_argument('--watchlist', help='종목코드 파일 (생략 시 종목 마스터 전체)')
+    run.add_argument('--pages', type=int, default=MAX_PAGES, help='종목당 최대 페이지 (페이지당 20거래일)')
+    run.add_argument('--since', help='이 날짜(YYYY-MM-DD)까지만 (생략 시 마지막 페이지까지)')
+    run.add_argument('--concurrency', type=int, default=4, help='종목당 동시 요청 페이지 수')
+    run.add_argument('--reset', action='store_true', help='체크포인트를 지우고 처음부터')
+
+    sub.add_parser('status', help='종목별 진행 상태 요약')
+    args = parser.parse_args(argv)
+    checkpoint = Checkpoint()
+
+    if args.command == 'status':
+        states = checkpoint.all()
+        summary = {}
+        for state in states:
+            summary[state['status']] = summary.get(state['status'], 0) + 1
+        print(json.dumps({'codes': len(states), 'status': summary, 'rows': sum(s['rows'] for s in states),
+                          'gaps': sum(len(s['gaps']) for s in states),
+                          'errors': [{'code': s['code'], 'error': s.get('error')} for s in states
+                                     if s['status'] == 'error'][:20]}, ensure_ascii=False))
+        return 0
+
+    if args.watchlist:
+        from batch_cli import read_watchlist
+        codes = read_watchlist(args.watchlist)
+    else:
+        from symbol_master import get_symbol_master
+        master = get_symbol_master(background=False)
+        if not master.index.rows:
+            master.refresh()
+        codes = [r['code'] for r in master.index.rows]
+
+    since = datetime.strptime(args.since, '%Y-%m-%d') if args.since else None
+    backfill = SupplyBackfill(checkpoint=checkpoint, concurrency=args.concurrency, max_pages=args.pages, since=since)
+    failed = 0
+    try:
+        for n, code in enumerate(codes, 1):
+            if args.reset:
+                checkpoint.reset(code)
+            started = time.perf_counter()
+            state = backfill.run(code)
+            failed += state['status'] == 'error'
+            print(f"[{n}/{len(codes)}] {code} {state['status']} 페이지 {state['pages']} / {state['rows']}거래일"
+                  f" (~{state['oldest'] or '-'}) 공백 {len(state['gaps'])} {time.perf_counter() - started:.1f}s"
+                  + (f" {state['error']}" if state.get('error') else ''), file=sys.stderr)
+    finally:
+        backfill.close()
+
+    if failed == len(codes):
+        return 2
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+수급 시계열 저장소 - 종목별 투자자 순매수를 로컬 컬럼 파일(.npz)로 보관
+최초 1회 백필 후에는 새 거래일만 증분 수집, 조회는 네트워크 없이 처리
+KRX 상세 행(has_detail)과 네이버 외국인/기관 행(supply_backfill)이 섞일 수 있으므로
+백필 / 증분 범위와 상세 항목 합계는 상세 행 기준
+"""
+
+import os
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from config import data_dir
+from fetchers import INST_FIELDS, KRX_INVESTOR_FIELDS, fetch_krx_investor_flows
+from supply_analysis import analyze_supply_arrays
+
+# 저장 필드 (주식수 기준 순매수)
+FLOW_FIELDS = ['foreign', 'inst'] + [f for _, f in KRX_INVESTOR_FIELDS if f != 'foreign']
+DETAIL_FIELDS = FLOW_FIELDS[2:]  # KRX 상세 행에만 있는 필드 (비상세 행은 0으로 저장)
+
+BACKFILL_DAYS = 730  # 최초 백필 기간 (약 2년)
+KRX_CHUNK_DAYS = 365  # KRX 1회 조회 최대 기간
+COVERAGE_SLACK_DAYS = 14  # 백필 시작일 이후 첫 거래일까지 허용 간격 (연휴)
+
+# 날짜별 컬럼이 아닌 저장 키 (YYYYMMDD, 길이 1)
+# covered_from: KRX 백필을 요청한 가장 이른 날짜 / fetched_to: KRX에 마지막으로 요청한 종료일
+META_KEYS = ('covered_from', 'fetched_to')
+
+
+def date_to_int(date: datetime) -> int:
+    return date.year * 10000 + date.month * 100 + date.day
+
+
+def int_to_date(value: int) -> datetime:
+    return datetime(value // 10000, value // 100 % 100, value % 100)
+
+
+def empty_columns() -> dict:
+    cols = {'dates': np.zeros(0, dtype=np.int32), 'has_detail': np.zeros(0, dtype=bool)}
+    for field in FLOW_FIELDS:
+        cols[field] = np.zeros(0, dtype=np.int64)
+    return cols
+
+
+def rows_to_columns(rows: list) -> dict:
+    """수집 함수 결과(dict 리스트) → 날짜 오름차순 컬럼 배열"""
+    rows = sorted(rows, key=lambda r: r['date'])
+    cols = {
+        'dates': np.array([date_to_int(r['date']) for r in rows], dtype=np.int32),
+        'has_detail': np.array([('pension' in r) for r in rows], dtype=bool),
+    }
+    for field in FLOW_FIELDS:
+        cols[field] = np.array([r.get(field, 0) for r in rows], dtype=np.int64)
+
+    # KRX 상세 데이터는 기관 합계가 없으므로 세부 항목 합으로 계산
+    if len(rows) and 'inst' not in rows[0]:
+        cols['inst'] = sum(cols[f] for f in INST_FIELDS)
+    return cols
+
+
+def merge_columns(old: dict, new: dict) -> dict:
+    """날짜 기준 병합 (같은 날짜는 새 데이터 우선, 단 상세 데이터를 비상세로 덮지 않음)"""
+    meta = {k: new.get(k, old.get(k)) for k in META_KEYS if k in new or k in old}
+    if len(old['dates']) == 0:
+        return dict(new, **meta)
+    if len(new['dates']) == 0:
+        return dict(old, **meta)
+
+    dates = np.concatenate([old['dates'], new['dates']])
+    has_detail = np.concatenate([old['has_detail'], new['has_detail']])
+    # 우선순위: 상세 여부 > 새 데이터
+    priority = has_detail.astype(np.int8) * 2
+    priority[len(old['dates']):] += 1
+
+    order = np.lexsort((-priority, dates))
+    sorted_dates = dates[order]
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = sorted_dates[1:] != sorted_dates[:-1]
+    pick = order[keep]
+
+    merged = {'dates': dates[pick], 'has_detail': has_detail[pick]}
+    for field in FLOW_FIELDS:
+        merged[field] = np.concatenate([old[field], new[field]])[pick]
+    merged.update(meta)
+    return merged
+
+
+class SupplyStore:
+    """종목별 수급 컬럼 저장소 (data/supply/{code}.npz)"""
+
+    def __init__(self, root: str = None):
+        self.root = root or data_dir('supply')
+        os.makedirs(self.root, exist_ok=True)
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _path(self, code: str) -> str:
+        return os.path.join(self.root, f'{code}.npz')
+
+    def _mtime(self, code: str):
+        try:
+            return os.stat(self._path(code)).st_mtime_ns
+        except OSError:
+            return None
+
+    def load(self, code: str) -> dict:
+        # 다른 프로세스(백필 등)가 파일을 바꿨으면 다시 읽음 - 오래된 메모리 사본으로 덮어쓰지 않도록
+        mtime = self._mtime(code)
+        with self._lock:
+            if code in self._cache and self._cache[code][0] == mtime:
+                return self._cache[code][1]
+        if mtime is not None:
+            with np.load(self._path(code)) as f:
+                cols = {k: f[k] for k in f.files}
+        else:
+            cols = empty_columns()
+        with self._lock:
+            self._cache[code] = (mtime, cols)
+        return cols
+
+    def save(self, code: str, cols: dict):
+        path = self._path(code)
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, **cols)
+        os.replace(tmp, path)
+        with self._lock:
+            self._cache[code] = (self._mtime(code), cols)
+
+    def merge(self, code: str, cols: dict) -> int:
+        """새 컬럼 데이터 병합 후 저장, 추가된 거래일 수 반환"""
+        old = self.load(code)
+        merged = merge_columns(old, cols)
+        self.save(code, merged)
+        return len(merged['dates']) - len(old['dates'])
+
+    def last_date(self, code: str):
+        dates = self.load(code)['dates']
+        return int_to_date(int(dates[-1])) if len(dates) else None
+
+    def detail_range(self, code: str) -> tuple:
+        """KRX 상세 행의 (첫 날짜, 마지막 날짜), 없으면 (None, None)"""
+        cols = self.load(code)
+        dates = cols['dates'][cols['has_detail']]
+        if not len(dates):
+            return None, None
+        return int_to_date(int(dates[0])), int_to_date(int(dates[-1]))
+
+    def covered_from(self, code: str):
+        """KRX 상세 이력이 시작되는 날짜 (백필 기록이 없으면 첫 상세 행 날짜, 없으면 None)
+
+        네이버 외국인/기관 행은 상세 이력으로 치지 않음 (장기 백필만 된 종목도 KRX 백필 대상)
+        """
+        cols = self.load(code)
+        if 'covered_from' in cols:
+            return int_to_date(int(cols['covered_from'][0]))
+        return self.detail_range(code)[0]
+
+    def fetched_to(self, code: str):
+        """KRX에 마지막으로 요청한 종료일 (기록이 없으면 None)"""
+        cols = self.load(code)
+        return int_to_date(int(cols['fetched_to'][0])) if 'fetched_to' in cols else None
+
+    def update(self, code: str, backfill_days: int = BACKFILL_DAYS) -> int:
+        """상세 이력이 backfill_days보다 짧으면 (첫 조회 / 며칠치만 일괄 수집 / 네이버 행만 있는 종목) 그 기간 전체를
+        백필, 아니면 마지막 상세 행 / 마지막 요청일 중 늦은 날짜(장중 부분 데이터 갱신용)부터 오늘까지만 수집
+
+        상세 행이 하나도 없는 종목(KRX 결과 없음)도 백필 기록이 있으면 증분 - 매번 전체 기간을 다시 요청하지 않음
+        """
+        today = datetime.now()
+        floor = today - timedelta(days=backfill_days)
+        covered = self.covered_from(code)
+        backfill = covered is None or covered > floor + timedelta(days=COVERAGE_SLACK_DAYS)
+        fetched_to = self.fetched_to(code)
+        if backfill:
+            start = floor
+        else:
+            start = max(d for d in (covered, self.detail_range(code)[1], fetched_to) if d is not None)
+
+        rows = []
+        while start <= today:
+            end = min(start + timedelta(days=KRX_CHUNK_DAYS - 1), today)
+            rows.extend(fetch_krx_investor_flows(code, start.strftime('%Y%m%d'), end.strftime('%Y%m%d')))
+            start = end + timedelta(days=1)
+
+        if not backfill and not rows and fetched_to is not None and fetched_to.date() == today.date():
+            return 0
+        cols = rows_to_columns(rows)
+        # 상장 직후 종목처럼 이력이 실제로 짧아도 같은 기간을 매번 다시 요청하지 않도록 기록
+        if backfill:
+            cols['covered_from'] = np.array([date_to_int(floor)], dtype=np.int32)
+        cols['fetched_to'] = np.array([date_to_int(today)], dtype=np.int32)
+        return self.merge(code, cols)
+
+    def window(self, code: str, days: int) -> dict:
+        """최근 days 거래일 컬럼 (날짜 오름차순, 복사 없는 슬라이스)"""
+        cols = self.load(code)
+        fields = [k for k in cols if k not in META_KEYS]
+        if days <= 0:
+            return {k: cols[k][:0] for k in fields}
+        return {k: cols[k][-days:] for k in fields}
+
+    def rows(self, code: str, days: int) -> list:
+        """최근 days 거래일을 수집 함수와 같은 형식(최신순 dict 리스트)으로 반환"""
+        cols = self.window(code, days)
+        out = []
+        for i in range(len(cols['dates']) - 1, -1, -1):
+            row = {'date': int_to_date(int(cols['dates'][i]))}
+            for field in FLOW_FIELDS:
+                row[field] = int(cols[field][i])
+            out.append(row)
+        return out
+
+    def window_sums(self, code: str, windows=(20, 60, 120)) -> dict:
+        """기간별 투자자 순매수 합계 {기간: {필드: 합계, days, detail_days}}
+
+        상세 필드(DETAIL_FIELDS)는 기간 안의 상세 행만 합산 - 상세 행이 없으면 None (0으로 보이지 않게)
+        detail_days < days면 일부 거래일만 합산한 값
+        """
+        cols = self.load(code)
+        n = len(cols['dates'])
+        flows = {field: cols[field][::-1] for field in FLOW_FIELDS}
+        sums = analyze_supply_arrays(flows, windows)['windows']
+        detail_rank = np.cumsum(cols['has_detail'][::-1])
+        result = {}
+        for w in windows:
+            detail_days = int(detail_rank[min(w, n) - 1]) if n else 0
+            result[w] = {field: int(sums[w][field]) for field in FLOW_FIELDS}
+            if not detail_days:
+                result[w].update(dict.fromkeys(DETAIL_FIELDS))
+            result[w]['days'] = min(w, n)
+            result[w]['detail_days'] = detail_days
+        return result
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+종목 마스터 - KRX 상장종목 목록 로컬 캐시 + 메모리 자동완성 인덱스
+(접두어 / 부분일치 / 초성 검색, 하루 한 번 백그라운드 갱신)
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import http_client
+from config import KRX_JSON_URL, data_path
+
+MASTER_FILE = 'symbol_master.json'  # DATA_DIR 기준 (경로는 SymbolMaster 생성 시 결정 - 임포트만으로 디렉터리를 만들지 않음)
+REFRESH_INTERVAL = 24 * 60 * 60  # 하루
+
+CHOSUNG = ['ㄱ', 'ㄲ', 'ㄴ', 'ㄷ', 'ㄸ', 'ㄹ', 'ㅁ', 'ㅂ', 'ㅃ', 'ㅅ',
+           'ㅆ', 'ㅇ', 'ㅈ', 'ㅉ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
+CHOSUNG_SET = set(CHOSUNG)
+
+
+def to_chosung(text: str) -> str:
+    """한글 음절을 초성으로 변환 (한글 외 문자는 그대로)"""
+    out = []
+    for ch in text:
+        cp = ord(ch)
+        if 0xAC00 <= cp <= 0xD7A3:
+            out.append(CHOSUNG[(cp - 0xAC00) // 588])
+        else:
+            out.append(ch)
+    return ''.join(out)
+
+
+def normalize(text: str) -> str:
+    """검색용 정규화 (공백 제거 + 소문자)"""
+    return ''.join(text.split()).lower()
+
+
+def fetch_krx_listing() -> list:
+    """KRX 전종목 기본정보 (코스피/코스닥/코넥스)"""
+    headers = {
+        'User-Agent': 'Mozilla/5.0',
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'Referer': 'http://data.krx.co.kr/contents/MDC/MDI/mdiLoader/index.cmd?menuId=MDC0201020201'
+    }
+    data = {
+        'bld': 'dbms/MDC/STAT/standard/MDCSTAT01901',
+        'locale': 'ko_KR',
+        'mktId': 'ALL',
+        'share': '1',
+        'csvxls_isNo': 'false'
+    }
+    response = http_client.post(KRX_JSON_URL, headers=headers, data=data, timeout=15)
+    response.raise_for_status()
+    result = response.json()
+    rows = result.get('OutBlock_1') or result.get('output') or []
+
+    listing = []
+    for row in rows:
+        code = str(row.get('ISU_SRT_CD', '')).strip()
+        if len(code) != 6:
+            continue
+        listing.append({
+            'code': code,
+            'name': str(row.get('ISU_ABBRV') or row.get('ISU_NM', '')).strip(),
+            'market': str(row.get('MKT_TP_NM', '')).strip(),
+            'isin': str(row.get('ISU_CD', '')).strip()
+        })
+    return listing
+
+
+class SymbolIndex:
+    """종목명/코드/초성 메모리 인덱스"""
+
+    def __init__(self, rows: list):
+        self.rows = rows
+        self.by_code = {r['code']: r for r in rows}
+
+        # 접두어 검색용 정렬 키 (정규화 이름, 행 번호)
+        keys = sorted((normalize(r['name']), i) for i, r in enumerate(rows))
+        self._prefix_keys = [k for k, _ in keys]
+        self._prefix_rows = [i for _, i in keys]
+
+        # 부분일치 검색용 연결 문자열 (이름/초성) + 시작 오프셋
+        self._name_blob, self._name_starts = self._build_blob([normalize(r['name']) for r in rows])
+        self._cho_blob, self._cho_starts = self._build_blob([to_chosung(normalize(r['name'])) for r in rows])
+
+    @staticmethod
+    def _build_blob(texts: list) -> tuple:
+        starts = []
+        pos = 0
+        for t in texts:
+            starts.append(pos)
+            pos += len(t) + 1
+        return '\n'.join(texts), starts
+
+    @staticmethod
+    def _blob_search(blob: str, starts: list, query: str, limit: int) -> list:
+        found = []
+        seen = set()
+        pos = blob.find(query)
+        while pos != -1 and len(found) < limit:
+            i = bisect.bisect_right(starts, pos) - 1
+            if i not in seen:
+                seen.add(i)
+                found.append(i)
+            pos = blob.find(query, pos + 1)
+        return found
+
+    def search(self, keyword: str, limit: int = 10) -> list:
+        """코드 → 접두어 → 부분일치 순으로 최대 limit개 반환"""
+        query = normalize(keyword)
+        if not query:
+            return []
+
+        if query.isdigit() and query in self.by_code:
+            return [self.by_code[query]]
+
+        hits = []
+        seen = set()
+
+        def add(i):
+            if i not in seen and len(hits) < limit:
+                seen.add(i)
+                hits.append(self.rows[i])
+
+        if all(ch in CHOSUNG_SET for ch in query):
+            for i in self._blob_search(self._cho_blob, self._cho_starts, query, limit * 4):
+                add(i)
+            return hits
+
+        # 정확히 일치 / 접두어
+        lo = bisect.bisect_left(self._prefix_keys, query)
+        hi = bisect.bisect_left(self._prefix_keys, query + '\uffff')
+        for k in range(lo, hi):
+            add(self._prefix_rows[k])
+            if len(hits) >= limit:
+                return hits
+
+        # 부분일치
+        for i in self._blob_search(self._name_blob, self._name_starts, query, limit * 4):
+            add(i)
+        return hits
+
+
+class SymbolMaster:
+    """로컬 파일 기반 종목 마스터 (하루 한 번 백그라운드 갱신)"""
+
+    def __init__(self, path: str = None, refresh_interval: int = REFRESH_INTERVAL):
+        self.path = path or data_path(MASTER_FILE)
+        self.refresh_interval = refresh_interval
+        self.updated = 0.0
+        self.index = SymbolIndex([])
+        self._lock = threading.Lock()
+        self._thread = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                saved = json.load(f)
+            self.index = SymbolIndex(saved.get('rows', []))
+            self.updated = saved.get('updated', 0.0)
+        except Exception:
+            pass
+
+    def _save(self, rows: list):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'updated': self.updated, 'rows': rows}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def is_stale(self) -> bool:
+        if not self.index.rows:
+            return True
+        return datetime.fromtimestamp(self.updated).date() != datetime.now().date() or \
+            time.time() - self.updated > self.refresh_interval
+
+    def refresh(self) -> bool:
+        """KRX에서 목록을 새로 받아 인덱스 교체 (실패 시 기존 인덱스 유지)"""
+        with self._lock:
+            try:
+                rows = fetch_krx_listing()
+            except Exception:
+                return False
+            if not rows:
+                return False
+            self.index = SymbolIndex(rows)
+            self.updated = time.time()
+            try:
+                self._save(rows)
+            except OSError:
+                pass
+            return True
+
+    def start_background_refresh(self):
+        """데몬 스레드에서 주기적으로 갱신 (중복 시작 방지)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def loop():
+            while True:
+                if self.is_stale() and not self.refresh():
+                    time.sleep(10 * 60)  # 실패 시 10분 후 재시도
+                    continue
+                time.sleep(60 * 60)  # 1시간마다 날짜 변경 확인
+
+        self._thread = threading.Thread(target=loop, name='symbol-master-refresh', daemon=True)
+        self._thread.start()
+
+    def search(self, keyword: str, limit: int = 10) -> list:
+        return self.index.search(keyword, limit)
+
+    def get(self, code: str):
+        return self.index.by_code.get(code)
+
+
+_master = None
+_master_lock = threading.Lock()
+
+
+def get_symbol_master(background: bool = True) -> SymbolMaster:
+    """프로세스 공용 종목 마스터
+
+    background: 백그라운드 갱신 스레드 시작 (앱 / 자동완성용). False면 로컬 파일만 읽음 (CLI / 수집 함수용)
+    """
+    global _master
+    with _master_lock:
+        if _master is None:
+            _master = SymbolMaster()
+        if background:
+            _master.start_background_refresh()
+        return _master
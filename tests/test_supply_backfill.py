@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+from supply_backfill import MAX_GAP_DAYS, is_gap, verify_pages
+
+
+def page(*days) -> list:
+    """2024-01-{day} 행 목록 (최신순으로 넘김)"""
+    return [{'date': datetime(2024, 1, d), 'foreign': 0, 'inst': 0} for d in days]
+
+
+def test_is_gap_without_calendar_uses_max_gap_days():
+    newer = datetime(2024, 2, 13)
+    assert not is_gap(newer, newer - timedelta(days=MAX_GAP_DAYS))
+    assert is_gap(newer, newer - timedelta(days=MAX_GAP_DAYS + 1))
+
+
+def test_is_gap_with_calendar_checks_previous_trading_day():
+    calendar = [datetime(2024, 1, d) for d in (2, 3, 4, 5, 8, 9)]
+    assert not is_gap(datetime(2024, 1, 8), datetime(2024, 1, 5), calendar)  # 주말
+    assert is_gap(datetime(2024, 1, 8), datetime(2024, 1, 4), calendar)      # 1/5 빠짐
+    # 달력 밖(달력보다 오래된 날짜)은 간격 기준
+    assert not is_gap(datetime(2024, 1, 3), datetime(2023, 12, 28), calendar)
+
+
+def test_verify_pages_continuous():
+    result = verify_pages([page(10, 9), page(8, 5)], calendar=[datetime(2024, 1, d) for d in (5, 8, 9, 10)])
+    assert result['accepted'] == 2 and result['gap'] is None and not result['end']
+    assert [r['date'].day for r in result['rows']] == [10, 9, 8, 5]
+    assert result['oldest'] == datetime(2024, 1, 5)
+
+
+def test_verify_pages_drops_overlap():
+    result = verify_pages([page(10, 9), page(9, 8)])
+    assert [r['date'].day for r in result['rows']] == [10, 9, 8]
+    assert result['accepted'] == 2
+
+
+def test_verify_pages_stops_at_gap_unless_allowed():
+    pages = [page(30, 29), page(5, 4)]
+    result = verify_pages(pages)
+    assert result['accepted'] == 1
+    assert result['gap'] == {'index': 1, 'reason': 'gap', 'from': '2024-01-29', 'to': '2024-01-05'}
+
+    result = verify_pages(pages, allowed_gaps=(1,))
+    assert result['gap'] is None and result['accepted'] == 2
+
+
+def test_verify_pages_repeated_last_page_ends():
+    # 마지막 페이지를 넘기면 같은 페이지가 다시 옴
+    result = verify_pages([page(10, 9), page(10, 9)])
+    assert result['end'] and result['accepted'] == 1
+    assert verify_pages([page(10, 9)], newest_before=datetime(2024, 1, 9))['end']
+
+
+def test_verify_pages_empty_page_ends_and_bad_order_is_gap():
+    assert verify_pages([page(10), []])['end']
+    assert verify_pages([page(9, 10)])['gap'] == {'index': 0, 'reason': 'order'}
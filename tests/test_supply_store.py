@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import supply_store
+from supply_store import KRX_INVESTOR_FIELDS, SupplyStore, merge_columns, rows_to_columns
+
+
+def krx_row(date: datetime, value: int = 1) -> dict:
+    """KRX 상세 행 (기관 합계 없음, pension 포함)"""
+    return dict({field: value for _, field in KRX_INVESTOR_FIELDS}, date=date)
+
+
+def naver_row(date: datetime, value: int = 1) -> dict:
+    """네이버 외국인/기관 행 (상세 없음)"""
+    return {'date': date, 'foreign': value, 'inst': value}
+
+
+class FakeKRX:
+    """fetch_krx_investor_flows 대체 - 요청 범위 기록, rows 중 범위 안의 행 반환"""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.requests = []
+
+    def __call__(self, code, start, end):
+        self.requests.append((start, end))
+        lo = datetime.strptime(start, '%Y%m%d')
+        hi = datetime.strptime(end, '%Y%m%d') + timedelta(days=1)
+        return [r for r in self.rows if lo <= r['date'] < hi]
+
+
+@pytest.fixture
+def krx(monkeypatch):
+    fake = FakeKRX()
+    monkeypatch.setattr(supply_store, 'fetch_krx_investor_flows', fake)
+    return fake
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SupplyStore(root=str(tmp_path))
+
+
+def today_str(offset: int = 0) -> str:
+    return (datetime.now() - timedelta(days=offset)).strftime('%Y%m%d')
+
+
+def test_update_empty_ticker_backfills_once(store, krx):
+    assert store.update('000000', backfill_days=730) == 0
+    assert krx.requests[0][0] == today_str(730) and krx.requests[-1][1] == today_str()
+
+    krx.requests.clear()
+    assert store.update('000000', backfill_days=730) == 0
+    assert krx.requests == [(today_str(), today_str())]  # 장중 갱신용 오늘 하루만
+
+    # 다음 날: 백필 기록이 있으므로 마지막 요청일부터만
+    krx.requests.clear()
+    cols = dict(store.load('000000'))
+    cols['fetched_to'] = np.array([int(today_str(1))], dtype=np.int32)
+    store.save('000000', cols)
+    assert store.update('000000', backfill_days=730) == 0
+    assert krx.requests == [(today_str(1), today_str())]
+
+
+def test_update_incremental_from_last_detail(store, krx):
+    now = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    krx.rows = [krx_row(now - timedelta(days=d)) for d in range(3, 700, 7)]
+    assert store.update('005930') == len(krx.rows)
+
+    krx.requests.clear()
+    krx.rows.append(krx_row(now - timedelta(days=1)))
+    cols = dict(store.load('005930'))
+    del cols['fetched_to']  # 이전 버전 파일 (마지막 요청일 기록 없음)
+    store.save('005930', cols)
+    assert store.update('005930') == 1
+    assert krx.requests == [(today_str(3), today_str())]
+
+
+def test_update_backfills_when_only_short_history(store, krx):
+    now = datetime.now()
+    # 며칠치 일괄 수집만 된 종목 (백필 기록 없음) → 전체 기간 백필
+    store.merge('005930', rows_to_columns([krx_row(now - timedelta(days=2))]))
+    store.update('005930')
+    assert krx.requests[0][0] == today_str(supply_store.BACKFILL_DAYS)
+    assert store.covered_from('005930').strftime('%Y%m%d') == today_str(supply_store.BACKFILL_DAYS)
+
+
+def test_update_backfills_naver_only_history(store, krx):
+    now = datetime.now()
+    store.merge('005930', rows_to_columns([naver_row(now - timedelta(days=d)) for d in range(1, 800, 5)]))
+    assert store.covered_from('005930') is None
+    store.update('005930')
+    assert krx.requests[0][0] == today_str(supply_store.BACKFILL_DAYS)
+
+
+def test_merge_detail_rows_win_over_non_detail():
+    day = datetime(2024, 1, 2)
+    detail = rows_to_columns([krx_row(day, 5)])
+    naver = rows_to_columns([naver_row(day, 9), naver_row(datetime(2024, 1, 3), 9)])
+
+    merged = merge_columns(detail, naver)
+    assert merged['dates'].tolist() == [20240102, 20240103]
+    assert merged['has_detail'].tolist() == [True, False]
+    assert merged['foreign'].tolist() == [5, 9]
+
+    # 반대 순서로 병합해도 상세 행 유지, 상세끼리는 새 데이터 우선
+    assert merge_columns(naver, detail)['foreign'].tolist() == [5, 9]
+    assert merge_columns(detail, rows_to_columns([krx_row(day, 7)]))['foreign'].tolist() == [7]
+
+
+def test_merge_keeps_meta_with_empty_sides():
+    empty = rows_to_columns([])
+    first = dict(empty, covered_from=np.array([20240101], dtype=np.int32))
+    merged = merge_columns(first, dict(empty, fetched_to=np.array([20240105], dtype=np.int32)))
+    assert int(merged['covered_from'][0]) == 20240101
+    assert int(merged['fetched_to'][0]) == 20240105
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+주도 테마 분석 - 시트 CSV 파싱 / 주도력 · 종합점수 계산
+"""
+
+import io
+
+import pandas as pd
+
+import metrics
+
+# 분석에 필요한 컬럼 (표시용 한글 컬럼명)
+THEME_COLUMNS = ['테마', '출현일수', '연속일(최대)', '현재연속', '거래대금(억)', '주도일수', '평균상승률']
+
+
+@metrics.timed('parse.theme_csv')
+def parse_theme_csv(content: str) -> tuple:
+    """Google Sheets CSV 본문 → (DataFrame, 오류 메시지)"""
+    # CSV 파싱
+    df = pd.read_csv(io.StringIO(content))
+
+    if df.empty:
+        return None, "시트에 데이터가 없습니다"
+
+    # 컬럼명 정리
+    df.columns = df.columns.str.strip()
+
+    # 필수 컬럼 확인 (영어 컬럼명)
+    required_cols = ['theme', 'days']
+    if not all(col in df.columns for col in required_cols):
+        return None, f"필수 컬럼 없음. 현재 컬럼: {list(df.columns)}"
+
+    # 컬럼명 한글로 변환 (표시용)
+    df = df.rename(columns={
+        'theme': '테마',
+        'days': '출현일수',
+        'max_streak': '연속일(최대)',
+        'current_streak': '현재연속',
+        'stocks': '총 종목수',
+        'volume': '거래대금(억)',
+        'leading': '주도일수',
+        'avg_change': '평균상승률'
+    })
+
+    return df, None
+
+
+@metrics.timed('analysis.score_themes')
+def score_themes(df_theme: pd.DataFrame) -> pd.DataFrame:
+    """숫자형 변환 후 주도력 / 종합점수 컬럼 추가 (THEME_COLUMNS 필요)"""
+    # 데이터 타입 변환
+    df_theme['출현일수'] = pd.to_numeric(df_theme['출현일수'], errors='coerce').fillna(0).astype(int)
+    df_theme['현재연속'] = pd.to_numeric(df_theme['현재연속'], errors='coerce').fillna(0).astype(int)
+    df_theme['거래대금(억)'] = pd.to_numeric(df_theme['거래대금(억)'], errors='coerce').fillna(0)
+    df_theme['주도일수'] = pd.to_numeric(df_theme['주도일수'], errors='coerce').fillna(0).astype(int)
+    df_theme['평균상승률'] = pd.to_numeric(df_theme['평균상승률'], errors='coerce').fillna(0)
+
+    # 주도력 계산 (주도일수 / 출현일수)
+    df_theme['주도력'] = df_theme.apply(
+        lambda x: (x['주도일수'] / x['출현일수'] * 100) if x['출현일수'] > 0 else 0, axis=1
+    )
+
+    # 종합 점수 계산 (다음 주도 테마 예측용)
+    # 가중치: 현재연속(40%) + 거래대금정규화(30%) + 주도력(20%) + 평균상승률(10%)
+    max_volume = df_theme['거래대금(억)'].max() if df_theme['거래대금(억)'].max() > 0 else 1
+    max_consecutive = df_theme['현재연속'].max() if df_theme['현재연속'].max() > 0 else 1
+
+    df_theme['종합점수'] = (
+        (df_theme['현재연속'] / max_consecutive * 40) +
+        (df_theme['거래대금(억)'] / max_volume * 30) +
+        (df_theme['주도력'] / 100 * 20) +
+        (df_theme['평균상승률'] / 100 * 10)
+    )
+    return df_theme
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+장 시작 전 캐시 예열 - 많이 조회된 종목을 미리 수집해 09:00 첫 요청도 캐시 적중
+
+AccessCounter: 종목별 조회 빈도 (시간 감쇠 점수, data/warmup/access.json)
+WarmupScheduler: 평일 08:50 KST부터 장 마감(15:30)까지 interval초마다 상위 N종목 예열
+    (interval을 시세 / 일봉 캐시 TTL(60초)보다 짧게 두면 상위 종목은 장중 내내 캐시에 남는다)
+예열 함수(warm)는 앱 / API 서버가 자기 캐시 경로로 넘긴다 (외부 요청은 http_client 속도 제한을 그대로 따름)
+공휴일은 구분하지 않음 - 휴장일 예열은 요청 몇 건 낭비일 뿐
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import metrics
+from config import data_path
+
+KST = timezone(timedelta(hours=9), 'KST')  # 서머타임 없음
+
+PREMARKET = (8, 50)      # 장전 예열 시작 시각
+MARKET_CLOSE = (15, 30)
+HALF_LIFE = 3 * 86400    # 조회 점수 반감기 (최근 관심 종목 우선)
+
+
+class AccessCounter:
+    """종목별 조회 빈도 - 조회마다 1점, 점수는 반감기로 감쇠 (스레드 안전)"""
+
+    def __init__(self, path: str = None, half_life: float = HALF_LIFE):
+        self.path = path or data_path('warmup', 'access.json')
+        self.half_life = half_life
+        self._scores = {}  # 종목코드 → (점수, 갱신 시각)
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # 저장은 한 번에 하나 (세션 / 예열 스레드가 동시에 저장)
+        self._dirty = False
+        self.load()
+
+    def _decayed(self, score: float, ts: float, now: float) -> float:
+        return score * 0.5 ** ((now - ts) / self.half_life)
+
+    def record(self, code: str, weight: float = 1.0):
+        now = time.time()
+        with self._lock:
+            score, ts = self._scores.get(code, (0.0, now))
+            self._scores[code] = (self._decayed(score, ts, now) + weight, now)
+            self._dirty = True
+
+    def top(self, n: int) -> list:
+        """현재 점수 상위 n개 종목코드"""
+        now = time.time()
+        with self._lock:
+            scored = [(self._decayed(s, ts, now), code) for code, (s, ts) in self._scores.items()]
+        scored.sort(reverse=True)
+        return [code for _, code in scored[:n]]
+
+    def table(self, n: int = 20) -> list:
+        now = time.time()
+        with self._lock:
+            rows = [{'code': code, 'score': round(self._decayed(s, ts, now), 2)} for code, (s, ts) in self._scores.items()]
+        rows.sort(key=lambda r: r['score'], reverse=True)
+        return rows[:n]
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                saved = json.load(f)
+        except OSError:
+            return
+        except ValueError:
+            # 깨진 파일은 옆으로 옮겨 보존 (빈 점수로 덮어써 기록이 사라진 것을 모르고 지나가지 않게)
+            metrics.inc('warmup_counter_corrupt_total')
+            try:
+                os.replace(self.path, self.path + '.corrupt')
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._scores = {code: (float(s), float(ts)) for code, (s, ts) in saved.items()}
+
+    def save(self):
+        """고유 임시 파일에 쓰고 교체 (저장 잠금 안에서 - 늦게 시작한 저장이 먼저 끝난 최신 점수를 덮지 않게)"""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                # 점수가 거의 0인 종목은 정리
+                now = time.time()
+                self._scores = {c: (s, ts) for c, (s, ts) in self._scores.items()
+                                if self._decayed(s, ts, now) >= 0.01}
+                payload = dict(self._scores)
+                self._dirty = False
+
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix='.access.', suffix='.json')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(payload, f)
+                os.replace(tmp, self.path)
+            except BaseException:
+                with self._lock:
+                    self._dirty = True
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+                raise
+
+
+def _at(day: datetime, hm: tuple) -> datetime:
+    return day.replace(hour=hm[0], minute=hm[1], second=0, microsecond=0)
+
+
+def next_run(now: datetime, interval: float) -> datetime:
+    """다음 예열 시각 (KST) - 평일 장전 PREMARKET, 장중엔 interval초 간격, 장 마감 후엔 다음 평일 장전"""
+    now = now.astimezone(KST)
+    if now.weekday() < 5:
+        if now < _at(now, PREMARKET):
+            return _at(now, PREMARKET)
+        candidate = now + timedelta(seconds=interval)
+        if candidate <= _at(now, MARKET_CLOSE):
+            return candidate
+    day = now + timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return _at(day, PREMARKET)
+
+
+class WarmupScheduler:
+    """상위 N종목 주기적 예열 (백그라운드 데몬 스레드 1개)"""
+
+    def __init__(self, counter: AccessCounter, warm, top_n: int = 20, interval: float = 55,
+                 concurrency: int = 4, after_round=None):
+        """after_round: 라운드마다 예열이 모두 끝난 뒤 1번 호출 (예열 결과를 모아 한 번에 저장할 때)"""
+        self.counter = counter
+        self.warm = warm
+        self.after_round = after_round
+        self.top_n = top_n
+        self.interval = interval
+        self.concurrency = concurrency
+        self.stats = {'rounds': 0, 'warmed': 0, 'errors': 0, 'last_round_s': 0.0,
+                      'last_run': None, 'next_run': None}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _warm_one(self, code: str) -> bool:
+        try:
+            self.warm(code)
+            return True
+        except Exception:
+            return False
+
+    def run_round(self) -> int:
+        """상위 종목 예열 1회, 성공한 종목 수"""
+        codes = self.counter.top(self.top_n)
+        started = time.perf_counter()
+        with metrics.span('warmup.round'), ThreadPoolExecutor(max_workers=self.concurrency,
+                                                              thread_name_prefix='warmup') as pool:
+            ok = sum(pool.map(self._warm_one, codes))
+        metrics.inc('warmup_codes_total', len(codes) - ok, result='error')
+        metrics.inc('warmup_codes_total', ok, result='ok')
+        self.stats['rounds'] += 1
+        self.stats['warmed'] += ok
+        self.stats['errors'] += len(codes) - ok
+        self.stats['last_round_s'] = round(time.perf_counter() - started, 3)
+        self.stats['last_run'] = datetime.now(KST).isoformat(timespec='seconds')
+        if self.after_round is not None:
+            try:
+                self.after_round()
+            except Exception:
+                metrics.inc('warmup_after_round_errors_total')
+        try:
+            self.counter.save()
+        except OSError:
+            pass
+        return ok
+
+    def _loop(self):
+        while not self._stop.is_set():
+            target = next_run(datetime.now(KST), self.interval)
+            self.stats['next_run'] = target.isoformat(timespec='seconds')
+            # 긴 대기도 중간에 깨어나 시계 변경 / 중지를 반영
+            while not self._stop.is_set():
+                remaining = (target - datetime.now(KST)).total_seconds()
+                if remaining <= 0:
+                    break
+                self._stop.wait(min(remaining, 300))
+            if not self._stop.is_set():
+                self.run_round()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='warmup', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()